@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Advertisement
+from .models import Advertisement, AdvertisementUpload, ArchivedAdvertisement, DeletionLog
 
 @admin.register(Advertisement)
 class AdvertisementAdmin(admin.ModelAdmin):
@@ -21,3 +21,27 @@ class AdvertisementAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(AdvertisementUpload)
+class AdvertisementUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'advertisement', 'user', 'field', 'offset', 'size', 'status', 'created_at']
+    list_filter = ['status', 'field', 'created_at']
+    search_fields = ['filename', 'advertisement__title', 'user__email']
+    readonly_fields = ['id', 'storage_name', 'offset', 'sha256', 'created_at', 'updated_at']
+
+
+@admin.register(DeletionLog)
+class DeletionLogAdmin(admin.ModelAdmin):
+    list_display = ['object_type', 'object_id', 'user_id', 'deleted_at']
+    list_filter = ['object_type', 'deleted_at']
+    readonly_fields = ['object_type', 'object_id', 'user_id', 'deleted_at']
+
+
+
+@admin.register(ArchivedAdvertisement)
+class ArchivedAdvertisementAdmin(admin.ModelAdmin):
+    list_display = ['title', 'category', 'author', 'created_at', 'archived_at']
+    list_filter = ['category', 'archived_at']
+    search_fields = ['title', 'author__username']
+    readonly_fields = ['created_at', 'updated_at', 'archived_at']
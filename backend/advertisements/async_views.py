@@ -0,0 +1,75 @@
+"""
+Асинхронные (ASGI) представления чтения объявлений.
+
+Запросы к БД идут через асинхронный ORM (aiterator, aget), сериализация
+выполняется над уже загруженными объектами, поэтому ожидание медленного
+клиента или БД не занимает поток воркера. Под WSGI те же представления
+работают через async_to_sync. Формат ответа совпадает с синхронными
+public_advertisements и retrieve; кеш фрагментов и ETag остаются на
+синхронном пути.
+"""
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+from mmorpg_backend.async_auth import AsyncAuthenticationFailed, aget_user, authentication_error
+from .models import Advertisement
+from .pagination import AdvertisementCursorPagination, decode_keyset_cursor, encode_keyset_cursor, keyset_page_filter
+from .serializers import AdvertisementSerializer, FEED_FIELDS
+
+
+def get_page_size(request):
+    pagination = AdvertisementCursorPagination
+    try:
+        page_size = int(request.GET[pagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return pagination.page_size
+    return min(max(page_size, 1), pagination.max_page_size)
+
+
+@require_safe
+async def public_advertisements(request):
+    """Публичная лента объявлений с keyset-пагинацией (?cursor=, ?page_size=, ?category=)"""
+    try:
+        user = await aget_user(request)
+    except AsyncAuthenticationFailed as e:
+        return authentication_error(e)
+
+    advertisements = Advertisement.objects.select_related('author').order_by('-created_at', '-id')
+    if user.is_authenticated:
+        advertisements = advertisements.exclude(author=user)
+
+    category = request.GET.get('category')
+    if category:
+        advertisements = advertisements.filter(category=category)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_keyset_cursor(cursor)
+        if position is None:
+            return JsonResponse({'detail': 'Неверный курсор.'}, status=404)
+        advertisements = keyset_page_filter(advertisements, position)
+
+    page_size = get_page_size(request)
+    page = [advertisement async for advertisement in advertisements[:page_size + 1].aiterator()]
+
+    next_link = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        query = request.GET.copy()
+        query['cursor'] = encode_keyset_cursor(page[-1].created_at, page[-1].id)
+        next_link = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+    return JsonResponse({
+        'next': next_link,
+        'previous': None,
+        'results': AdvertisementSerializer(page, many=True, fields=FEED_FIELDS).data,
+    })
+
+
+@require_safe
+async def advertisement_detail(request, advertisement_id):
+    """Просмотр объявления вместе с откликами"""
+    try:
+        advertisement = await Advertisement.objects.with_related().aget(pk=advertisement_id)
+    except Advertisement.DoesNotExist:
+        raise Http404
+    return JsonResponse(AdvertisementSerializer(advertisement).data)
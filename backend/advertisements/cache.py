@@ -0,0 +1,142 @@
+"""
+Кеш сериализованных объявлений.
+
+Каждое объявление хранится отдельным фрагментом под ключом
+advertisement:<id>:<версия>:<вариант>, где вариант - набор полей
+(полный или для ленты). Версия лежит под собственным ключом и
+меняется при любом изменении объявления или его откликов, поэтому
+устаревшие фрагменты просто перестают читаться и вытесняются по TTL.
+
+Фрагменты сначала ищутся в локальной памяти процесса, затем в общем
+файловом кеше (если он настроен в CACHES под именем 'files').
+Версии хранятся в общем уровне, чтобы инвалидация была видна всем
+процессам на сервере.
+
+Если общего уровня нет (кеш только в памяти процесса), инвалидация
+видна лишь процессу, который изменил объявление. Тогда версии живут
+не дольше ADVERTISEMENT_CACHE_TIMEOUT: другие процессы отдают
+устаревшее объявление не дольше этого времени, после чего заводят
+новую версию и перечитывают данные.
+"""
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+PAYLOAD_KEY = 'advertisement:{id}:{version}:{variant}'
+VERSION_KEY = 'advertisement:{id}:version'
+
+
+def get_timeout():
+    return getattr(settings, 'ADVERTISEMENT_CACHE_TIMEOUT', 300)
+
+
+def get_tiers():
+    """Уровни кеша для фрагментов: локальная память, затем файловый кеш"""
+    if 'files' in settings.CACHES:
+        return [caches['default'], caches['files']]
+    return [caches['default']]
+
+
+def get_version_cache():
+    """Версии храним в самом общем из доступных уровней"""
+    return get_tiers()[-1]
+
+
+def is_shared():
+    """Видят ли версии все процессы сервера (кеш не только в памяти процесса)"""
+    return not isinstance(get_version_cache(), LocMemCache)
+
+
+def get_version_timeout():
+    """В общем кеше версии бессрочны, в памяти процесса - не дольше фрагментов"""
+    return None if is_shared() else get_timeout()
+
+
+def new_version():
+    # Метка времени монотонна даже после вытеснения ключа версии,
+    # поэтому старый фрагмент не может снова стать актуальным
+    return time.time_ns()
+
+
+def get_versions(ids):
+    """Возвращает текущие версии объявлений, заводя недостающие"""
+    version_cache = get_version_cache()
+    keys = {advertisement_id: VERSION_KEY.format(id=advertisement_id) for advertisement_id in ids}
+    found = version_cache.get_many(keys.values())
+
+    versions = {}
+    missing = {}
+    for advertisement_id, key in keys.items():
+        if key in found:
+            versions[advertisement_id] = found[key]
+        else:
+            missing[key] = versions[advertisement_id] = new_version()
+    if missing:
+        version_cache.set_many(missing, timeout=get_version_timeout())
+    return versions
+
+
+def invalidate(*ids):
+    """Делает устаревшими закешированные фрагменты объявлений"""
+    if not ids:
+        return
+    version = new_version()
+    get_version_cache().set_many(
+        {VERSION_KEY.format(id=advertisement_id): version for advertisement_id in ids},
+        timeout=get_version_timeout()
+    )
+
+
+def invalidate_on_commit(*ids):
+    """
+    Сбрасывает кеш сразу и повторно после фиксации транзакции,
+    чтобы параллельный запрос не закешировал еще не зафиксированные данные
+    """
+    invalidate(*ids)
+    transaction.on_commit(lambda: invalidate(*ids))
+
+
+def get_many(ids, load, versions=None, variant='full'):
+    """
+    Возвращает сериализованные объявления в порядке ids.
+
+    Фрагменты читаются из кеша multi-get запросами; отсутствующие
+    сериализуются функцией load(missing_ids) -> {id: data} и кешируются.
+    Объявления, которых нет ни в кеше, ни в load, пропускаются.
+    Уже прочитанные версии можно передать в versions; variant отделяет
+    фрагменты с разным набором полей одного объявления.
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+
+    if versions is None:
+        versions = get_versions(ids)
+    keys = {
+        advertisement_id: PAYLOAD_KEY.format(id=advertisement_id, version=versions[advertisement_id], variant=variant)
+        for advertisement_id in ids
+    }
+
+    payloads = {}
+    tiers = get_tiers()
+    for index, tier in enumerate(tiers):
+        missing_keys = [key for key in keys.values() if key not in payloads]
+        if not missing_keys:
+            break
+        found = tier.get_many(missing_keys)
+        if found and index:
+            # Поднимаем найденное на более быстрые уровни
+            for upper in tiers[:index]:
+                upper.set_many(found, timeout=get_timeout())
+        payloads.update(found)
+
+    missing_ids = [advertisement_id for advertisement_id, key in keys.items() if key not in payloads]
+    if missing_ids:
+        loaded = {keys[advertisement_id]: data for advertisement_id, data in load(missing_ids).items()}
+        for tier in tiers:
+            tier.set_many(loaded, timeout=get_timeout())
+        payloads.update(loaded)
+
+    return [payloads[keys[advertisement_id]] for advertisement_id in ids if keys[advertisement_id] in payloads]
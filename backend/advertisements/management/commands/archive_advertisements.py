@@ -0,0 +1,19 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from advertisements.services import ArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит объявления без изменений дольше ARCHIVE_AFTER_DAYS дней '
+        'вместе с откликами в архивные таблицы'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=None, help='Возраст объявления (по умолчанию ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Объявлений в одной транзакции')
+    
+    def handle(self, *args, **options):
+        max_age = timedelta(days=options['days']) if options['days'] is not None else None
+        archived = ArchiveService.archive(max_age=max_age, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Перенесено в архив объявлений: {archived}'))
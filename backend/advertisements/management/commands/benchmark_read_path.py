@@ -0,0 +1,105 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from advertisements.models import Advertisement
+from users.models import User
+
+# Конечная точка: (синхронный URL, асинхронный URL, нужен ли токен)
+ENDPOINTS = {
+    'feed': ('advertisement-public-advertisements', 'async-public-advertisements', False),
+    'detail': ('advertisement-detail', 'async-advertisement-detail', False),
+    'my_responses': ('response-my-responses', 'async-my-responses', True),
+    'advertisement_responses': ('response-advertisement-responses', 'async-advertisement-responses', True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронный (WSGI) и асинхронный (ASGI) пути чтения на текущих данных. '
+        'WSGI-путь обслуживается пулом из --threads потоков (как воркер gunicorn с потоками), '
+        'ASGI-путь - одним циклом событий с --concurrency одновременными запросами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='feed')
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на каждый путь')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=4, help='Потоков WSGI-воркера')
+        parser.add_argument('--user', help='Пользователь для эндпоинтов с авторизацией')
+
+    def handle(self, *args, **options):
+        sync_name, async_name, needs_token = ENDPOINTS[options['endpoint']]
+
+        url_args = []
+        if options['endpoint'] == 'detail':
+            advertisement = Advertisement.objects.order_by('-created_at').first()
+            if advertisement is None:
+                raise CommandError('Нет объявлений - сначала создайте данные (create_test_data.py)')
+            url_args = [advertisement.id]
+
+        headers = {}
+        if needs_token:
+            if not options['user']:
+                raise CommandError('Для этого эндпоинта укажите --user')
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {options['user']} не найден")
+            token, _ = Token.objects.get_or_create(user=user)
+            headers['Authorization'] = f'Token {token.key}'
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            cache.clear()
+            sync_timings, sync_elapsed = self.run_sync(reverse(sync_name, args=url_args), headers, options)
+            async_timings, async_elapsed = asyncio.run(
+                self.run_async(reverse(async_name, args=url_args), headers, options)
+            )
+
+        self.report('WSGI (DRF, кеш фрагментов)', sync_timings, sync_elapsed)
+        self.report('ASGI (async ORM)', async_timings, async_elapsed)
+
+    def run_sync(self, url, headers, options):
+        def request(_):
+            started = time.perf_counter()
+            response = Client(headers=headers).get(url)
+            self.check_status(response)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            timings = list(executor.map(request, range(options['requests'])))
+        return timings, time.perf_counter() - started
+
+    async def run_async(self, url, headers, options):
+        client = AsyncClient(headers=headers)
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                self.check_status(response)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return timings, time.perf_counter() - started
+
+    def check_status(self, response):
+        if response.status_code != 200:
+            raise CommandError(f'{response.request["PATH_INFO"]}: статус {response.status_code}')
+
+    def report(self, title, timings, elapsed):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{title}: {len(timings) / elapsed:.1f} запросов/с, '
+            f'медиана {statistics.median(timings) * 1000:.1f} мс, p95 {p95 * 1000:.1f} мс'
+        )
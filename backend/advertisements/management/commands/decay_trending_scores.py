@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from advertisements.services import TrendingService
+
+
+class Command(BaseCommand):
+    help = (
+        'Состаривает трендовые рейтинги объявлений одним UPDATE. '
+        'Запускается по cron раз в TRENDING_DECAY_INTERVAL_HOURS часов.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float, default=None,
+            help='Сколько часов прошло с прошлого запуска (по умолчанию TRENDING_DECAY_INTERVAL_HOURS)'
+        )
+    
+    def handle(self, *args, **options):
+        updated = TrendingService.decay(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f'Обновлено рейтингов: {updated}'))
@@ -0,0 +1,56 @@
+import os
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models
+from mmorpg_backend.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы хранилища по содержимому (blobs/), на которые не ссылается '
+        'ни одно файловое поле моделей'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help='Не трогать файлы моложе этого возраста: ссылка на них может быть еще не сохранена'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, что будет удалено')
+    
+    def get_storages_and_references(self):
+        """Хранилища по содержимому и имена файлов, на которые ссылаются поля моделей"""
+        storages = {}
+        referenced = set()
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if not isinstance(field, models.FileField) or not isinstance(field.storage, ContentAddressedStorage):
+                    continue
+                storages[field.storage.location] = field.storage
+                names = model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                referenced.update(names.values_list(field.name, flat=True).iterator())
+        return storages.values(), referenced
+    
+    def handle(self, *args, **options):
+        storages, referenced = self.get_storages_and_references()
+        cutoff = time.time() - options['min_age_hours'] * 3600
+        
+        removed = 0
+        freed = 0
+        for storage in storages:
+            for name, path in storage.iter_blobs():
+                if name in referenced:
+                    continue
+                stat = os.stat(path)
+                if stat.st_mtime > cutoff:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    os.remove(path)
+                removed += 1
+                freed += stat.st_size
+        
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{action} файлов: {removed}, освобождено байт: {freed}'))
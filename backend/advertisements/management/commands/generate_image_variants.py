@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from advertisements.models import Advertisement
+from advertisements.services import ImageVariantService
+
+
+class Command(BaseCommand):
+    help = 'Создает недостающие или устаревшие уменьшенные копии изображений объявлений'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Пересоздать копии для всех изображений')
+    
+    def handle(self, *args, **options):
+        generated = 0
+        failed = 0
+        advertisements = Advertisement.objects.exclude(image='').exclude(image__isnull=True)
+        
+        for advertisement in advertisements.iterator():
+            if not options['force'] and not ImageVariantService.is_stale(advertisement):
+                continue
+            try:
+                ImageVariantService.generate(advertisement)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'Объявление {advertisement.pk}: {e}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Обработано изображений: {generated}, ошибок: {failed}'))
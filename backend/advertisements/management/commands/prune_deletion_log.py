@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from advertisements.services import SyncService
+
+
+class Command(BaseCommand):
+    help = 'Удаляет записи журнала удалений старше SYNC_TOMBSTONE_RETENTION_DAYS'
+    
+    def handle(self, *args, **options):
+        deleted = SyncService.prune_deletion_log()
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей журнала: {deleted}'))
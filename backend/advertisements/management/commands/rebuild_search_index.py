@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+from advertisements import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс объявлений (SQLite FTS5)'
+    
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Полнотекстовый индекс поддерживается только на SQLite')
+        
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано объявлений: {count}'))
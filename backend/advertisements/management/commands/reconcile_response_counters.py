@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from advertisements.services import ResponseCounterService
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики откликов объявлений с таблицей откликов и исправляет расхождения'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Объявлений в одной транзакции')
+    
+    def handle(self, *args, **options):
+        fixed = ResponseCounterService.reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Исправлено счетчиков объявлений: {fixed}'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:47
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0003_advertisement_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdvertisementUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('video', 'Видео'), ('audio', 'Аудио')], max_length=10, verbose_name='Поле объявления')),
+                ('filename', models.CharField(max_length=255, verbose_name='Исходное имя файла')),
+                ('storage_name', models.CharField(max_length=255, verbose_name='Имя файла в хранилище')),
+                ('size', models.BigIntegerField(verbose_name='Размер файла')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Получено байт')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('status', models.CharField(choices=[('uploading', 'Загружается'), ('completed', 'Завершена')], default='uploading', max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('advertisement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='advertisements.advertisement', verbose_name='Объявление')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='advertisement_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Загрузка медиафайла',
+                'verbose_name_plural': 'Загрузки медиафайлов',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:59
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_response_counters(apps, schema_editor):
+    Advertisement = apps.get_model('advertisements', 'Advertisement')
+    Response = apps.get_model('responses', 'Response')
+
+    def count(condition=Q()):
+        counts = Response.objects.filter(condition, advertisement=OuterRef('pk')).order_by().values(
+            'advertisement'
+        ).annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Advertisement.objects.update(
+        response_count=count(),
+        new_response_count=count(Q(status='new')),
+        accepted_response_count=count(Q(status='accepted')),
+        rejected_response_count=count(Q(status='rejected')),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0006_advertisement_indexes'),
+        ('responses', '0003_response_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisement',
+            name='accepted_response_count',
+            field=models.IntegerField(default=0, verbose_name='Принятых откликов'),
+        ),
+        migrations.AddField(
+            model_name='advertisement',
+            name='new_response_count',
+            field=models.IntegerField(default=0, verbose_name='Новых откликов'),
+        ),
+        migrations.AddField(
+            model_name='advertisement',
+            name='rejected_response_count',
+            field=models.IntegerField(default=0, verbose_name='Отклоненных откликов'),
+        ),
+        migrations.AddField(
+            model_name='advertisement',
+            name='response_count',
+            field=models.IntegerField(default=0, verbose_name='Количество откликов'),
+        ),
+        migrations.RunPython(fill_response_counters, migrations.RunPython.noop),
+    ]
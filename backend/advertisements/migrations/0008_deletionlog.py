@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0007_advertisement_response_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('advertisement', 'Объявление'), ('response', 'Отклик')], max_length=20, verbose_name='Тип объекта')),
+                ('object_id', models.IntegerField(verbose_name='ID объекта')),
+                ('user_id', models.IntegerField(blank=True, null=True, verbose_name='Пользователь')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала удалений',
+                'verbose_name_plural': 'Журнал удалений',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['updated_at'], name='adv_updated_idx'),
+        ),
+    ]
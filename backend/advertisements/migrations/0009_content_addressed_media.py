@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+import mmorpg_backend.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0008_deletionlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='advertisement',
+            name='audio',
+            field=models.FileField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/audio/', verbose_name='Аудио'),
+        ),
+        migrations.AlterField(
+            model_name='advertisement',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='advertisement',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/videos/', verbose_name='Видео'),
+        ),
+    ]
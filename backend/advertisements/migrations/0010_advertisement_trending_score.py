@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Значения TRENDING_* на момент миграции: повторный прогон миграций
+# не должен зависеть от текущих настроек
+HALF_LIFE_HOURS = 24
+NEW_ADVERTISEMENT_SCORE = 1.0
+RESPONSE_SCORE = 1.0
+CATEGORY_WEIGHTS = {
+    'Танки': 1.5,
+    'Хилы': 1.5,
+}
+
+
+def fill_trending_scores(apps, schema_editor):
+    """Начальный рейтинг: вклад объявления и его откликов с затуханием по возрасту"""
+    Advertisement = apps.get_model('advertisements', 'Advertisement')
+    Response = apps.get_model('responses', 'Response')
+    half_life = HALF_LIFE_HOURS * 3600
+    now = timezone.now()
+
+    def decay(moment):
+        return 0.5 ** ((now - moment).total_seconds() / half_life)
+
+    scores = {}
+    for advertisement in Advertisement.objects.only('id', 'category', 'created_at').iterator():
+        scores[advertisement.id] = [CATEGORY_WEIGHTS.get(advertisement.category, 1.0), NEW_ADVERTISEMENT_SCORE * decay(advertisement.created_at)]
+    for advertisement_id, created_at in Response.objects.values_list('advertisement_id', 'created_at').iterator():
+        scores[advertisement_id][1] += RESPONSE_SCORE * decay(created_at)
+
+    Advertisement.objects.bulk_update(
+        [Advertisement(id=advertisement_id, trending_score=weight * score)
+         for advertisement_id, (weight, score) in scores.items()],
+        ['trending_score'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0009_content_addressed_media'),
+        ('responses', '0004_response_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisement',
+            name='trending_score',
+            field=models.FloatField(default=0, verbose_name='Трендовый рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['-trending_score', '-id'], name='adv_trending_idx'),
+        ),
+        migrations.RunPython(fill_trending_scores, migrations.RunPython.noop),
+    ]
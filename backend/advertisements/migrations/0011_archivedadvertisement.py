@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+import django.db.models.deletion
+import mmorpg_backend.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0010_advertisement_trending_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAdvertisement',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200, verbose_name='Заголовок')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('category', models.CharField(choices=[('Танки', 'Танки'), ('Хилы', 'Хилы'), ('ДД', 'ДД'), ('Торговцы', 'Торговцы'), ('Гилдмастеры', 'Гилдмастеры'), ('Квестгиверы', 'Квестгиверы'), ('Кузнецы', 'Кузнецы'), ('Кожевники', 'Кожевники'), ('Зельевары', 'Зельевары'), ('Мастера заклинаний', 'Мастера заклинаний')], max_length=50, verbose_name='Категория')),
+                ('image', models.ImageField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/', verbose_name='Изображение')),
+                ('video', models.FileField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/videos/', verbose_name='Видео')),
+                ('audio', models.FileField(blank=True, null=True, storage=mmorpg_backend.storage.get_media_storage, upload_to='advertisements/audio/', verbose_name='Аудио')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+                ('image_variants', models.JSONField(blank=True, default=dict, verbose_name='Варианты изображения')),
+                ('response_count', models.IntegerField(default=0, verbose_name='Количество откликов')),
+                ('new_response_count', models.IntegerField(default=0, verbose_name='Новых откликов')),
+                ('accepted_response_count', models.IntegerField(default=0, verbose_name='Принятых откликов')),
+                ('rejected_response_count', models.IntegerField(default=0, verbose_name='Отклоненных откликов')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_advertisements', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Архивное объявление',
+                'verbose_name_plural': 'Архивные объявления',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['author', '-created_at', '-id'], name='arch_adv_author_created_idx')],
+            },
+        ),
+    ]
@@ -1,8 +1,29 @@
+import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from mmorpg_backend.storage import get_media_storage
 
 User = get_user_model()
 
+
+class AdvertisementQuerySet(models.QuerySet):
+    """QuerySet объявлений с планом загрузки связанных данных"""
+    
+    def with_related(self):
+        """
+        Подгружает автора и отклики с их авторами фиксированным числом запросов,
+        чтобы сериализация списка не порождала запрос на каждое объявление и отклик
+        """
+        from responses.models import Response
+        
+        return self.select_related('author').prefetch_related(
+            models.Prefetch(
+                'responses',
+                queryset=Response.objects.select_related('author')
+            )
+        )
+
+
 class Advertisement(models.Model):
     CATEGORY_CHOICES = [
         ('Танки', 'Танки'),
@@ -21,16 +42,167 @@ class Advertisement(models.Model):
     description = models.TextField(verbose_name='Описание')
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, verbose_name='Категория')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='advertisements', verbose_name='Автор')
-    image = models.ImageField(upload_to='advertisements/', blank=True, null=True, verbose_name='Изображение')
-    video = models.FileField(upload_to='advertisements/videos/', blank=True, null=True, verbose_name='Видео')
-    audio = models.FileField(upload_to='advertisements/audio/', blank=True, null=True, verbose_name='Аудио')
+    # Медиафайлы хранятся по SHA-256 содержимого: одинаковые загрузки не дублируются
+    image = models.ImageField(
+        upload_to='advertisements/', storage=get_media_storage, blank=True, null=True, verbose_name='Изображение'
+    )
+    video = models.FileField(
+        upload_to='advertisements/videos/', storage=get_media_storage, blank=True, null=True, verbose_name='Видео'
+    )
+    audio = models.FileField(
+        upload_to='advertisements/audio/', storage=get_media_storage, blank=True, null=True, verbose_name='Аудио'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    # Уменьшенные копии изображения; заполняются в фоне после загрузки
+    image_variants = models.JSONField(default=dict, blank=True, verbose_name='Варианты изображения')
+    # Денормализованные счетчики откликов: меняются атомарно вместе с откликами,
+    # расхождения исправляет команда reconcile_response_counters
+    response_count = models.IntegerField(default=0, verbose_name='Количество откликов')
+    new_response_count = models.IntegerField(default=0, verbose_name='Новых откликов')
+    accepted_response_count = models.IntegerField(default=0, verbose_name='Принятых откликов')
+    rejected_response_count = models.IntegerField(default=0, verbose_name='Отклоненных откликов')
+    # Трендовый рейтинг: растет с каждым откликом, периодически затухает (TrendingService)
+    trending_score = models.FloatField(default=0, verbose_name='Трендовый рейтинг')
+    
+    objects = AdvertisementQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Объявление'
         verbose_name_plural = 'Объявления'
         ordering = ['-created_at']
+        indexes = [
+            # Лента и курсорная пагинация (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='adv_created_idx'),
+            # Мои объявления и фильтр по категории - поиск по индексу без сортировки
+            models.Index(fields=['author', '-created_at', '-id'], name='adv_author_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='adv_category_created_idx'),
+            # Выборка изменений для /api/sync/
+            models.Index(fields=['updated_at'], name='adv_updated_idx'),
+            # Трендовая лента - просмотр индекса в порядке рейтинга
+            models.Index(fields=['-trending_score', '-id'], name='adv_trending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.author.username}"
+
+
+class AdvertisementUpload(models.Model):
+    """Возобновляемая загрузка медиафайла объявления по частям"""
+    
+    FIELD_CHOICES = [
+        ('video', 'Видео'),
+        ('audio', 'Аудио'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('uploading', 'Загружается'),
+        ('completed', 'Завершена'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    advertisement = models.ForeignKey(
+        Advertisement,
+        on_delete=models.CASCADE,
+        related_name='uploads',
+        verbose_name='Объявление'
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='advertisement_uploads', verbose_name='Пользователь')
+    field = models.CharField(max_length=10, choices=FIELD_CHOICES, verbose_name='Поле объявления')
+    filename = models.CharField(max_length=255, verbose_name='Исходное имя файла')
+    storage_name = models.CharField(max_length=255, verbose_name='Имя файла в хранилище')
+    size = models.BigIntegerField(verbose_name='Размер файла')
+    offset = models.BigIntegerField(default=0, verbose_name='Получено байт')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='SHA-256')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading', verbose_name='Статус')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    
+    class Meta:
+        verbose_name = 'Загрузка медиафайла'
+        verbose_name_plural = 'Загрузки медиафайлов'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+    
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+
+class DeletionLog(models.Model):
+    """
+    Журнал удалений для дельта-синхронизации (/api/sync/).
+
+    Каждая запись - надгробие удаленного объявления или отклика.
+    user_id - пользователь, которому видно удаление (для откликов -
+    автор отклика и автор объявления); пусто - видно всем.
+    """
+    
+    OBJECT_TYPE_CHOICES = [
+        ('advertisement', 'Объявление'),
+        ('response', 'Отклик'),
+    ]
+    
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPE_CHOICES, verbose_name='Тип объекта')
+    object_id = models.IntegerField(verbose_name='ID объекта')
+    user_id = models.IntegerField(null=True, blank=True, verbose_name='Пользователь')
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата удаления')
+    
+    class Meta:
+        verbose_name = 'Запись журнала удалений'
+        verbose_name_plural = 'Журнал удалений'
+        ordering = ['deleted_at']
+    
+    def __str__(self):
+        return f"{self.get_object_type_display()} {self.object_id}"
+
+
+
+class ArchivedAdvertisement(models.Model):
+    """
+    Архивное объявление.
+
+    Объявления без изменений дольше ARCHIVE_AFTER_DAYS переносятся сюда
+    вместе с откликами (ArchiveService), чтобы горячая таблица и ее индексы
+    не росли со временем. id сохраняется, поэтому объявление можно
+    восстановить под прежним адресом.
+    """
+    
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=200, verbose_name='Заголовок')
+    description = models.TextField(verbose_name='Описание')
+    category = models.CharField(max_length=50, choices=Advertisement.CATEGORY_CHOICES, verbose_name='Категория')
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='archived_advertisements', verbose_name='Автор'
+    )
+    image = models.ImageField(
+        upload_to='advertisements/', storage=get_media_storage, blank=True, null=True, verbose_name='Изображение'
+    )
+    video = models.FileField(
+        upload_to='advertisements/videos/', storage=get_media_storage, blank=True, null=True, verbose_name='Видео'
+    )
+    audio = models.FileField(
+        upload_to='advertisements/audio/', storage=get_media_storage, blank=True, null=True, verbose_name='Аудио'
+    )
+    created_at = models.DateTimeField(verbose_name='Дата создания')
+    updated_at = models.DateTimeField(verbose_name='Дата обновления')
+    image_variants = models.JSONField(default=dict, blank=True, verbose_name='Варианты изображения')
+    response_count = models.IntegerField(default=0, verbose_name='Количество откликов')
+    new_response_count = models.IntegerField(default=0, verbose_name='Новых откликов')
+    accepted_response_count = models.IntegerField(default=0, verbose_name='Принятых откликов')
+    rejected_response_count = models.IntegerField(default=0, verbose_name='Отклоненных откликов')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')
+    
+    class Meta:
+        verbose_name = 'Архивное объявление'
+        verbose_name_plural = 'Архивные объявления'
+        ordering = ['-created_at']
+        indexes = [
+            # Мои объявления с ?include_archived=1
+            models.Index(fields=['author', '-created_at', '-id'], name='arch_adv_author_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} (архив)"
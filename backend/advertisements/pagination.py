@@ -0,0 +1,48 @@
+from datetime import datetime
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from rest_framework.pagination import CursorPagination
+
+
+class AdvertisementCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация ленты объявлений.
+
+    Страница выбирается условием по created_at из курсора, а не OFFSET
+    от начала таблицы, поэтому время выборки не зависит от глубины
+    прокрутки, а COUNT(*) не выполняется. Второй ключ (id) делает
+    порядок строк с одинаковой датой детерминированным.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TrendingCursorPagination(AdvertisementCursorPagination):
+    """
+    Курсорная пагинация популярных объявлений по индексу adv_trending_idx.
+    Рейтинг меняется между запросами, поэтому при листании объявление может
+    сдвинуться на соседнюю страницу - для витрины это допустимо.
+    """
+    ordering = ('-trending_score', '-id')
+
+
+def encode_keyset_cursor(created_at, pk):
+    """Курсор асинхронной ленты: позиция последнего объявления страницы"""
+    return urlsafe_base64_encode(f'{created_at.isoformat()}|{pk}'.encode())
+
+
+def decode_keyset_cursor(cursor):
+    """Разбирает курсор в (created_at, id); None, если курсор поврежден"""
+    try:
+        created_at, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page_filter(queryset, position):
+    """Строки после позиции в порядке (-created_at, -id) - условие по индексу adv_created_idx"""
+    created_at, pk = position
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
@@ -0,0 +1,132 @@
+"""
+Полнотекстовый поиск по объявлениям на основе SQLite FTS5.
+
+Индекс хранится в виртуальной таблице, rowid которой совпадает с id
+объявления. Таблица обновляется точечно сигналами модели, а целиком
+перестраивается командой rebuild_search_index.
+"""
+import re
+from django.db import connection
+from django.utils.html import escape
+
+FTS_TABLE = 'advertisements_advertisement_fts'
+
+# Вес заголовка в BM25 выше, чем у описания
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+# Служебные маркеры: текст экранируется до вставки тегов подсветки
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available():
+    """FTS5 доступен только на SQLite"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательскую строку в безопасное выражение MATCH:
+    каждое слово ищется как префикс, все слова должны встретиться
+    """
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def render_marks(text):
+    """Экранирует HTML и заменяет служебные маркеры тегами подсветки"""
+    return escape(text).replace(MARK_START, HIGHLIGHT_START).replace(MARK_END, HIGHLIGHT_END)
+
+
+def index_advertisement(advertisement):
+    """Добавляет или обновляет объявление в индексе"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [advertisement.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [advertisement.pk, advertisement.title, advertisement.description]
+        )
+
+
+def index_advertisements(advertisements):
+    """Добавляет или обновляет набор объявлений в индексе (для массовых операций)"""
+    if not advertisements or not is_available():
+        return
+    ids = [advertisement.pk for advertisement in advertisements]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(ids))})', ids
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [(advertisement.pk, advertisement.title, advertisement.description) for advertisement in advertisements]
+        )
+
+
+def remove_advertisement(advertisement_id):
+    """Удаляет объявление из индекса"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [advertisement_id])
+
+
+def rebuild_index():
+    """Полностью перестраивает индекс по таблице объявлений"""
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+            f'SELECT id, title, description FROM advertisements_advertisement'
+        )
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search(query, limit=20):
+    """
+    Ищет объявления по заголовку и описанию.
+
+    Возвращает список словарей с id объявления, рангом BM25 (меньше - лучше),
+    подсвеченным заголовком и фрагментом описания.
+    """
+    match_query = build_match_query(query)
+    if not match_query or not is_available():
+        return []
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, bm25({FTS_TABLE}, %s, %s) AS rank, '
+            f'highlight({FTS_TABLE}, 0, %s, %s), '
+            f'snippet({FTS_TABLE}, 1, %s, %s, %s, %s) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT %s',
+            [
+                TITLE_WEIGHT, DESCRIPTION_WEIGHT,
+                MARK_START, MARK_END,
+                MARK_START, MARK_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS,
+                match_query, limit,
+            ]
+        )
+        rows = cursor.fetchall()
+    
+    return [
+        {
+            'id': advertisement_id,
+            'rank': rank,
+            'title_highlight': render_marks(title_highlight),
+            'snippet': render_marks(snippet),
+        }
+        for advertisement_id, rank, title_highlight, snippet in rows
+    ]
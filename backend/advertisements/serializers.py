@@ -1,16 +1,60 @@
 from rest_framework import serializers
-from .models import Advertisement
+from django.core.files.storage import default_storage
+from .models import Advertisement, AdvertisementUpload, ArchivedAdvertisement
 from users.serializers import UserSerializer
-from responses.serializers import ResponseSerializer
+from responses.serializers import ArchivedResponseSerializer, ResponseSerializer
+from mmorpg_backend.sparse_fields import SparseFieldsSerializerMixin
 
-class AdvertisementSerializer(serializers.ModelSerializer):
+class AdvertisementSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     responses = ResponseSerializer(many=True, read_only=True)
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Advertisement
-        fields = ['id', 'title', 'description', 'category', 'author', 'image', 'video', 'audio', 'created_at', 'updated_at', 'responses']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'author', 'responses']
+        fields = [
+            'id', 'title', 'description', 'category', 'author', 'image', 'image_variants', 'video', 'audio',
+            'created_at', 'updated_at', 'response_count', 'new_response_count', 'accepted_response_count',
+            'rejected_response_count', 'responses',
+        ]
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'author', 'response_count', 'new_response_count',
+            'accepted_response_count', 'rejected_response_count', 'responses',
+        ]
+    
+    def get_image_variants(self, obj):
+        """
+        URL уменьшенных копий изображения в формате srcset по форматам
+        и размытая заглушка; None, пока копии не готовы
+        """
+        variants = obj.image_variants or {}
+        if not obj.image or variants.get('source') != obj.image.name:
+            return None
+        
+        srcset = {}
+        for width, formats in sorted(variants['sizes'].items(), key=lambda item: int(item[0])):
+            for extension, name in formats.items():
+                srcset.setdefault(extension, []).append(f'{default_storage.url(name)} {width}w')
+        
+        return {
+            'srcset': {extension: ', '.join(entries) for extension, entries in srcset.items()},
+            'placeholder': variants['placeholder'],
+        }
+
+# Поля ленты: счетчики откликов вместо их списка, таблица откликов не читается
+FEED_FIELDS = [name for name in AdvertisementSerializer.Meta.fields if name != 'responses']
+
+
+class ArchivedAdvertisementSerializer(AdvertisementSerializer):
+    """Архивное объявление (только чтение); формат совпадает с AdvertisementSerializer"""
+    responses = ArchivedResponseSerializer(many=True, read_only=True)
+    archived = serializers.BooleanField(default=True, read_only=True)
+    
+    class Meta:
+        model = ArchivedAdvertisement
+        fields = [*AdvertisementSerializer.Meta.fields, 'archived', 'archived_at']
+        read_only_fields = fields
+
 
 class AdvertisementCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,3 +65,28 @@ class AdvertisementCreateSerializer(serializers.ModelSerializer):
         # Устанавливаем автора из request.user
         validated_data['author'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class AdvertisementUploadSerializer(serializers.ModelSerializer):
+    """Состояние загрузки медиафайла по частям"""
+    
+    class Meta:
+        model = AdvertisementUpload
+        fields = ['id', 'advertisement', 'field', 'filename', 'size', 'offset', 'sha256', 'status', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class AdvertisementUploadCreateSerializer(serializers.Serializer):
+    """Начало загрузки медиафайла по частям"""
+    
+    advertisement_id = serializers.IntegerField()
+    field = serializers.ChoiceField(choices=AdvertisementUpload.FIELD_CHOICES)
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    
+    def validate_advertisement_id(self, value):
+        try:
+            self.advertisement = Advertisement.objects.get(id=value)
+        except Advertisement.DoesNotExist:
+            raise serializers.ValidationError("Объявление не найдено.")
+        return value
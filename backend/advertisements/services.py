@@ -0,0 +1,832 @@
+import base64
+import contextvars
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from PIL import Image, ImageFilter, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from mmorpg_backend import bulk
+from mmorpg_backend.storage import ContentAddressedStorage
+from responses.models import ArchivedResponse, Response
+from .models import Advertisement, AdvertisementUpload, ArchivedAdvertisement, DeletionLog
+from . import cache as advertisement_cache
+from . import search as search_index
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Ошибка загрузки по частям; status - HTTP-статус ответа"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ChunkedUploadService:
+    """
+    Сервис возобновляемой загрузки медиафайлов объявлений.
+
+    Части пишутся сразу в итоговый файл хранилища по своему смещению,
+    кусками по STREAM_BLOCK_SIZE байт, поэтому память на загрузку не
+    зависит от размера файла. К объявлению файл прикрепляется только
+    при финализации.
+    """
+
+    STREAM_BLOCK_SIZE = 64 * 1024
+
+    @staticmethod
+    def get_max_size():
+        return getattr(settings, 'UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+
+    @staticmethod
+    def get_chunk_size():
+        return getattr(settings, 'UPLOAD_CHUNK_SIZE', 8 * 1024 ** 2)
+
+    @staticmethod
+    def initiate(user, advertisement, field, filename, size):
+        """Создать загрузку и пустой файл под нее в хранилище"""
+        if advertisement.author_id != user.id:
+            raise UploadError("Вы можете загружать файлы только в свои объявления", status=403)
+        if size > ChunkedUploadService.get_max_size():
+            raise UploadError("Файл превышает максимально допустимый размер")
+
+        upload_to = Advertisement._meta.get_field(field).upload_to
+        name = os.path.join(upload_to, get_valid_filename(os.path.basename(filename)))
+        storage_name = default_storage.save(name, ContentFile(b''))
+
+        return AdvertisementUpload.objects.create(
+            advertisement=advertisement,
+            user=user,
+            field=field,
+            filename=filename,
+            storage_name=storage_name,
+            size=size,
+        )
+
+    @staticmethod
+    def write_chunk(upload, start, stream, length):
+        """
+        Записать часть файла начиная с байта start.
+
+        Часть может начинаться не дальше уже полученного смещения -
+        повторная отправка перекрывающихся данных допустима. Если поток
+        оборвался, смещение сдвигается на фактически записанные байты.
+        """
+        if upload.status != 'uploading':
+            raise UploadError("Загрузка уже завершена", status=409)
+        if start > upload.offset:
+            raise UploadError(f"Ожидалась часть со смещением {upload.offset}", status=409)
+        if start + length > upload.size:
+            raise UploadError("Часть выходит за объявленный размер файла")
+
+        written = 0
+        with open(default_storage.path(upload.storage_name), 'r+b') as destination:
+            destination.seek(start)
+            while written < length:
+                block = stream.read(min(ChunkedUploadService.STREAM_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                destination.write(block)
+                written += len(block)
+
+        # Смещение только растет: параллельный повтор части не сдвигает его назад
+        uploads = AdvertisementUpload.objects.filter(pk=upload.pk)
+        uploads.update(offset=Greatest(F('offset'), start + written))
+        upload.offset = uploads.values_list('offset', flat=True).get()
+
+        if written < length:
+            raise UploadError("Часть получена не полностью, продолжите с текущего смещения", status=409)
+        return upload
+
+    @staticmethod
+    def compute_sha256(storage_name):
+        """Потоковый SHA-256 файла блоками фиксированного размера"""
+        digest = hashlib.sha256()
+        with default_storage.open(storage_name, 'rb') as source:
+            for block in iter(lambda: source.read(ChunkedUploadService.STREAM_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def finalize(upload):
+        """
+        Проверить полноту файла и прикрепить его к объявлению.
+
+        SHA-256 считается повторным чтением всего файла в этом же запросе:
+        время завершения растет с размером файла (порядка секунды на
+        несколько сотен МБ). Части могут перезаписываться при повторах,
+        поэтому хеш нельзя накапливать по мере приема частей.
+        """
+        if upload.status != 'uploading':
+            raise UploadError("Загрузка уже завершена", status=409)
+        if not upload.is_complete:
+            raise UploadError(f"Получено {upload.offset} из {upload.size} байт", status=409)
+
+        upload.sha256 = ChunkedUploadService.compute_sha256(upload.storage_name)
+        upload.status = 'completed'
+
+        storage = Advertisement._meta.get_field(upload.field).storage
+        if isinstance(storage, ContentAddressedStorage):
+            # Файл собирался в обычном хранилище - переносим его под имя по SHA-256
+            upload.storage_name = storage.ingest(
+                default_storage.path(upload.storage_name), upload.sha256, os.path.splitext(upload.storage_name)[1]
+            )
+
+        with transaction.atomic():
+            upload.save(update_fields=['sha256', 'status', 'storage_name', 'updated_at'])
+            advertisement = upload.advertisement
+            setattr(advertisement, upload.field, upload.storage_name)
+            advertisement.save(update_fields=[upload.field, 'updated_at'])
+
+        return upload
+
+    @staticmethod
+    def abort(upload):
+        """Отменить незавершенную загрузку и удалить частичный файл"""
+        if upload.status != 'uploading':
+            raise UploadError("Загрузка уже завершена", status=409)
+        default_storage.delete(upload.storage_name)
+        upload.delete()
+
+
+class ImageVariantService:
+    """
+    Сервис уменьшенных копий изображения объявления.
+
+    Для каждой ширины из IMAGE_VARIANT_WIDTHS создаются WebP и JPEG без
+    EXIF, плюс крошечная размытая заглушка в виде data URI. Результат
+    сохраняется в Advertisement.image_variants вместе с именем исходного
+    файла, по которому видно, что варианты устарели.
+    """
+
+    PLACEHOLDER_WIDTH = 16
+    _executor = None
+
+    @staticmethod
+    def get_widths():
+        return getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1280])
+
+    @staticmethod
+    def get_quality():
+        return getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+    @staticmethod
+    def is_stale(advertisement):
+        """Варианты не соответствуют текущему изображению"""
+        source = advertisement.image.name if advertisement.image else None
+        return (advertisement.image_variants or {}).get('source') != source
+
+    @classmethod
+    def schedule(cls, advertisement_id):
+        """Сгенерировать варианты в фоновом потоке, вне обработки запроса"""
+        if not getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+            cls.generate_by_id(advertisement_id)
+            return
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+        cls._executor.submit(cls.generate_in_background, advertisement_id)
+
+    @classmethod
+    def generate_in_background(cls, advertisement_id):
+        try:
+            cls.generate_by_id(advertisement_id)
+        except Exception as e:
+            logger.error(f"Ошибка генерации вариантов изображения объявления {advertisement_id}: {e}")
+        finally:
+            # Поток живет дольше запроса - соединение с БД закрываем сами
+            connection.close()
+
+    @classmethod
+    def generate_by_id(cls, advertisement_id):
+        advertisement = Advertisement.objects.filter(pk=advertisement_id).first()
+        if advertisement is not None and cls.is_stale(advertisement):
+            cls.generate(advertisement)
+
+    @staticmethod
+    def encode(image, image_format, quality):
+        buffer = io.BytesIO()
+        # exif не передается - метаданные в копии не попадают
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    @classmethod
+    def generate(cls, advertisement):
+        """Пересоздать варианты изображения объявления"""
+        old_variants = advertisement.image_variants or {}
+        variants = {}
+
+        if advertisement.image:
+            with advertisement.image.open('rb') as source:
+                original = Image.open(source)
+                # Поворот по EXIF применяем до удаления метаданных
+                original = ImageOps.exif_transpose(original).convert('RGB')
+
+            stem = os.path.splitext(os.path.basename(advertisement.image.name))[0]
+            directory = f'advertisements/variants/{advertisement.pk}'
+            widths = [width for width in cls.get_widths() if width < original.width] or [original.width]
+
+            sizes = {}
+            for width in widths:
+                height = max(1, round(original.height * width / original.width))
+                resized = original.resize((width, height), Image.LANCZOS)
+                sizes[str(width)] = {
+                    extension: default_storage.save(
+                        f'{directory}/{stem}_{width}.{extension}',
+                        ContentFile(cls.encode(resized, image_format, cls.get_quality()))
+                    )
+                    for extension, image_format in (('webp', 'WEBP'), ('jpg', 'JPEG'))
+                }
+
+            placeholder_height = max(1, round(original.height * cls.PLACEHOLDER_WIDTH / original.width))
+            placeholder = original.resize((cls.PLACEHOLDER_WIDTH, placeholder_height)).filter(ImageFilter.GaussianBlur(1))
+            placeholder_data = base64.b64encode(cls.encode(placeholder, 'JPEG', 40)).decode()
+
+            variants = {
+                'source': advertisement.image.name,
+                'sizes': sizes,
+                'placeholder': f'data:image/jpeg;base64,{placeholder_data}',
+            }
+
+        # Обновляем только это поле, чтобы не затереть параллельные изменения объявления
+        advertisement.image_variants = variants
+        advertisement.save(update_fields=['image_variants'])
+
+        for formats in old_variants.get('sizes', {}).values():
+            for name in formats.values():
+                default_storage.delete(name)
+
+        return variants
+
+
+class BulkAdvertisementService:
+    """
+    Массовые операции с объявлениями пользователя.
+
+    Каждая операция - все или ничего: при ошибке хотя бы в одном элементе
+    ничего не записывается, а ошибки возвращаются списком по индексам
+    элементов (пустой словарь - элемент корректен). Права проверяются
+    одним запросом на весь набор.
+    """
+
+    @staticmethod
+    def get_max_items():
+        return getattr(settings, 'BULK_MAX_ITEMS', 100)
+
+    @staticmethod
+    def check_items(items):
+        return bulk.check_items(items, BulkAdvertisementService.get_max_items(), 'объявлений')
+
+    @staticmethod
+    def item_errors(serializer, count):
+        """Ошибки сериализатора many=True списком по индексам элементов"""
+        errors = serializer.errors
+        if isinstance(errors, dict):
+            # Новые версии DRF возвращают только элементы с ошибками
+            return [dict(errors.get(index, {})) for index in range(count)]
+        return [dict(item) for item in errors]
+
+    @staticmethod
+    def after_write(advertisements):
+        """bulk_create/bulk_update не отправляют сигналы - обновляем индекс и кеш сами"""
+        search_index.index_advertisements(advertisements)
+        advertisement_cache.invalidate_on_commit(*[advertisement.pk for advertisement in advertisements])
+
+    @staticmethod
+    def create(user, serializer):
+        """Создать объявления из провалидированного сериализатора (many=True)"""
+        advertisements = [
+            Advertisement(author=user, trending_score=TrendingService.initial_score(data.get('category')), **data)
+            for data in serializer.validated_data
+        ]
+        with transaction.atomic():
+            Advertisement.objects.bulk_create(advertisements)
+            BulkAdvertisementService.after_write(advertisements)
+        return advertisements
+
+    @staticmethod
+    def get_owned(user, ids):
+        """Объявления пользователя из набора ids одним запросом"""
+        return Advertisement.objects.filter(id__in=ids, author=user).in_bulk()
+
+    @staticmethod
+    def check_ids(ids, owned):
+        """Ошибки по элементам: нет id, повтор, чужое или несуществующее объявление"""
+        return bulk.check_ids(
+            ids, owned,
+            invalid="Укажите числовой id объявления.",
+            duplicate="Объявление указано несколько раз.",
+            missing="Объявление не найдено среди ваших объявлений.",
+        )
+
+    @staticmethod
+    def update(owned, ids, validated_data):
+        """Применить изменения к объявлениям одним bulk_update"""
+        now = timezone.now()
+        fields = {'updated_at'}
+        advertisements = []
+        for advertisement_id, data in zip(ids, validated_data):
+            advertisement = owned[advertisement_id]
+            for field, value in data.items():
+                setattr(advertisement, field, value)
+            # auto_now не срабатывает в bulk_update
+            advertisement.updated_at = now
+            fields.update(data)
+            advertisements.append(advertisement)
+
+        with transaction.atomic():
+            Advertisement.objects.bulk_update(advertisements, sorted(fields))
+            BulkAdvertisementService.after_write(advertisements)
+        return advertisements
+
+    @staticmethod
+    def delete(user, ids):
+        """Удалить объявления одним отфильтрованным delete(); надгробия - одним INSERT"""
+        _, deleted = SyncService.delete_advertisements(Advertisement.objects.filter(id__in=ids, author=user))
+        # delete() считает и каскадно удаленные отклики
+        return deleted.get(Advertisement._meta.label, 0)
+
+
+class ResponseCounterService:
+    """
+    Денормализованные счетчики откликов объявления.
+
+    Счетчики меняются атомарным UPDATE с F()-выражениями в той же
+    транзакции, что и сам отклик, поэтому параллельные отклики не теряют
+    инкременты. Изменения в обход API (админка, каскадное удаление
+    пользователя) исправляет reconcile.
+    """
+
+    STATUS_FIELDS = {
+        'new': 'new_response_count',
+        'accepted': 'accepted_response_count',
+        'rejected': 'rejected_response_count',
+    }
+    FIELDS = ['response_count', *STATUS_FIELDS.values()]
+
+    @staticmethod
+    def adjust(advertisement_id, **deltas):
+        """
+        Прибавить к счетчикам объявления deltas одним UPDATE.
+        updated_at сдвигается, чтобы новые счетчики попали в /api/sync/
+        """
+        Advertisement.objects.filter(pk=advertisement_id).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+    @staticmethod
+    def response_created(response):
+        # Рейтинг растет в том же UPDATE, что и счетчики
+        ResponseCounterService.adjust(
+            response.advertisement_id,
+            response_count=1,
+            trending_score=TrendingService.response_score(),
+            **{ResponseCounterService.STATUS_FIELDS[response.status]: 1}
+        )
+
+    @staticmethod
+    def response_deleted(response):
+        ResponseCounterService.adjust(
+            response.advertisement_id,
+            response_count=-1,
+            **{ResponseCounterService.STATUS_FIELDS[response.status]: -1}
+        )
+
+    @staticmethod
+    def status_changed(response, old_status):
+        if old_status == response.status:
+            return
+        ResponseCounterService.adjust(
+            response.advertisement_id,
+            **{
+                ResponseCounterService.STATUS_FIELDS[old_status]: -1,
+                ResponseCounterService.STATUS_FIELDS[response.status]: 1,
+            }
+        )
+
+    @staticmethod
+    def statuses_changed(changes):
+        """
+        Счетчики после массовой смены статусов: changes - пары (отклик, старый статус).
+        Один UPDATE на каждое затронутое объявление
+        """
+        deltas = {}
+        for response, old_status in changes:
+            if old_status == response.status:
+                continue
+            advertisement_deltas = deltas.setdefault(response.advertisement_id, {})
+            for status, delta in ((old_status, -1), (response.status, 1)):
+                field = ResponseCounterService.STATUS_FIELDS[status]
+                advertisement_deltas[field] = advertisement_deltas.get(field, 0) + delta
+        for advertisement_id, advertisement_deltas in deltas.items():
+            ResponseCounterService.adjust(advertisement_id, **advertisement_deltas)
+
+    @staticmethod
+    def count_responses(advertisement_ids):
+        """Фактические значения счетчиков по таблице откликов одним GROUP BY"""
+        annotations = {'response_count': Count('id')}
+        annotations.update({
+            field: Count('id', filter=Q(status=status))
+            for status, field in ResponseCounterService.STATUS_FIELDS.items()
+        })
+        rows = Response.objects.filter(advertisement_id__in=advertisement_ids).order_by().values(
+            'advertisement_id'
+        ).annotate(**annotations)
+        return {row.pop('advertisement_id'): row for row in rows}
+
+    @staticmethod
+    def reconcile(batch_size=500):
+        """
+        Сверить счетчики с таблицей откликов пачками по batch_size объявлений.
+        Каждая пачка - отдельная транзакция с блокировкой строк объявлений,
+        чтобы инкременты не терялись. Возвращает число исправленных объявлений.
+        """
+        fixed = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Advertisement.objects.select_for_update()
+                    .filter(id__gt=last_id)
+                    .order_by('id')
+                    .only('id', 'updated_at', *ResponseCounterService.FIELDS)[:batch_size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                actual = ResponseCounterService.count_responses([advertisement.id for advertisement in batch])
+                drifted = []
+                now = timezone.now()
+                for advertisement in batch:
+                    counts = actual.get(advertisement.id, {})
+                    values = {field: counts.get(field, 0) for field in ResponseCounterService.FIELDS}
+                    if any(getattr(advertisement, field) != value for field, value in values.items()):
+                        for field, value in values.items():
+                            setattr(advertisement, field, value)
+                        advertisement.updated_at = now
+                        drifted.append(advertisement)
+
+                if drifted:
+                    Advertisement.objects.bulk_update(drifted, [*ResponseCounterService.FIELDS, 'updated_at'])
+                    advertisement_cache.invalidate_on_commit(*[advertisement.id for advertisement in drifted])
+                fixed += len(drifted)
+        return fixed
+
+
+class TrendingService:
+    """
+    Трендовый рейтинг объявлений.
+
+    Рейтинг хранится в индексированном столбце trending_score: создание
+    объявления и каждый отклик прибавляют очки с весом категории, а
+    затухание по времени выполняет decay - один UPDATE, умножающий все
+    рейтинги на 0.5 ** (прошедшие часы / период полураспада). Умножение
+    сохраняет порядок объявлений, поэтому между запусками decay свежие
+    отклики просто весят больше старых, как и должно быть. Лента популярного
+    читается обходом индекса (-trending_score, -id) без сортировки.
+    """
+
+    # Рейтинги меньше порога обнуляются, чтобы не хранить исчезающе малые числа
+    MIN_SCORE = 1e-6
+
+    @staticmethod
+    def get_half_life_hours():
+        return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24)
+
+    @staticmethod
+    def get_decay_interval_hours():
+        return getattr(settings, 'TRENDING_DECAY_INTERVAL_HOURS', 1)
+
+    @staticmethod
+    def get_category_weight(category):
+        return getattr(settings, 'TRENDING_CATEGORY_WEIGHTS', {}).get(category, 1.0)
+
+    @staticmethod
+    def category_weight():
+        """Вес категории строки как SQL-выражение - для UPDATE без чтения объявления"""
+        weights = getattr(settings, 'TRENDING_CATEGORY_WEIGHTS', {})
+        if not weights:
+            return Value(1.0)
+        return Case(
+            *[When(category=category, then=Value(float(weight))) for category, weight in weights.items()],
+            default=Value(1.0),
+        )
+
+    @staticmethod
+    def initial_score(category):
+        """Рейтинг нового объявления"""
+        return getattr(settings, 'TRENDING_NEW_ADVERTISEMENT_SCORE', 1.0) * TrendingService.get_category_weight(category)
+
+    @staticmethod
+    def response_score():
+        """Прирост рейтинга за отклик (выражение для F('trending_score') + ...)"""
+        return getattr(settings, 'TRENDING_RESPONSE_SCORE', 1.0) * TrendingService.category_weight()
+
+    @staticmethod
+    def decay(hours=None):
+        """
+        Состарить все рейтинги на hours часов одним UPDATE.
+        Возвращает число обновленных объявлений.
+        """
+        if hours is None:
+            hours = TrendingService.get_decay_interval_hours()
+        factor = 0.5 ** (hours / TrendingService.get_half_life_hours())
+        # updated_at не меняется: рейтинг не входит в данные объявления и /api/sync/
+        return Advertisement.objects.filter(trending_score__gt=0).update(
+            trending_score=Case(
+                When(trending_score__lt=TrendingService.MIN_SCORE / factor, then=Value(0.0)),
+                default=F('trending_score') * factor,
+            )
+        )
+
+
+class ArchiveService:
+    """
+    Архив старых объявлений.
+
+    Объявления без изменений дольше ARCHIVE_AFTER_DAYS вместе с откликами
+    переносятся в таблицы ArchivedAdvertisement/ArchivedResponse пачками,
+    каждая пачка - отдельная транзакция: строки копируются одним INSERT на
+    таблицу и удаляются из горячих таблиц. Надгробия для /api/sync/
+    пачка пишет одним INSERT, сигналы удаления только убирают объявления
+    из поиска и кеша. Незавершенные загрузки удаляются вместе с частичными
+    файлами; файлы завершенных остаются за архивными объявлениями.
+    Архив читается через ?include_archived=1 и восстанавливается restore.
+    """
+
+    ADVERTISEMENT_FIELDS = [
+        'id', 'title', 'description', 'category', 'author_id', 'image', 'video', 'audio',
+        'created_at', 'updated_at', 'image_variants', *ResponseCounterService.FIELDS,
+    ]
+    RESPONSE_FIELDS = ['id', 'advertisement_id', 'author_id', 'text', 'status', 'created_at', 'updated_at']
+
+    @staticmethod
+    def get_max_age():
+        return timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+    @staticmethod
+    def is_requested(request):
+        """Запрошено ли чтение вместе с архивом (?include_archived=1)"""
+        return request.query_params.get('include_archived') in ('1', 'true')
+
+    @staticmethod
+    def copy(source, model, field_names):
+        values = {}
+        for name in field_names:
+            value = getattr(source, name)
+            # Файлы переносятся ссылкой на тот же blob в хранилище
+            values[name] = value.name if isinstance(value, FieldFile) else value
+        return model(**values)
+
+    @staticmethod
+    def archive(max_age=None, batch_size=500):
+        """
+        Перенести в архив объявления, не менявшиеся дольше max_age
+        (по умолчанию ARCHIVE_AFTER_DAYS). Возвращает число объявлений.
+        """
+        cutoff = timezone.now() - (max_age if max_age is not None else ArchiveService.get_max_age())
+        archived = 0
+        while True:
+            with transaction.atomic():
+                # Отбор по индексу adv_updated_idx
+                batch = list(
+                    Advertisement.objects.select_for_update()
+                    .filter(updated_at__lt=cutoff)
+                    .order_by('updated_at', 'id')[:batch_size]
+                )
+                if not batch:
+                    break
+                ids = [advertisement.id for advertisement in batch]
+                authors = {advertisement.id: advertisement.author_id for advertisement in batch}
+                responses = list(Response.objects.filter(advertisement_id__in=ids))
+
+                ArchivedAdvertisement.objects.bulk_create([
+                    ArchiveService.copy(advertisement, ArchivedAdvertisement, ArchiveService.ADVERTISEMENT_FIELDS)
+                    for advertisement in batch
+                ])
+                ArchivedResponse.objects.bulk_create([
+                    ArchiveService.copy(response, ArchivedResponse, ArchiveService.RESPONSE_FIELDS)
+                    for response in responses
+                ])
+
+                DeletionLog.objects.bulk_create(SyncService.cascade_tombstones(authors, [
+                    (response.id, response.author_id, response.advertisement_id) for response in responses
+                ]))
+
+                # Частичные файлы незавершенных загрузок сборщик мусора не найдет
+                uploads = AdvertisementUpload.objects.filter(advertisement_id__in=ids, status='uploading')
+                partial_files = list(uploads.values_list('storage_name', flat=True))
+                uploads.delete()
+                transaction.on_commit(lambda names=partial_files: ArchiveService.delete_files(names))
+
+                # Отклики и завершенные загрузки удаляются каскадно
+                with SyncService.logged_in_bulk():
+                    Advertisement.objects.filter(id__in=ids).delete()
+            archived += len(batch)
+        return archived
+
+    @staticmethod
+    def delete_files(names):
+        for name in names:
+            default_storage.delete(name)
+
+    @staticmethod
+    def restore(archived_advertisement):
+        """Вернуть объявление с откликами из архива под прежним id"""
+        with transaction.atomic():
+            advertisement = ArchiveService.copy(
+                archived_advertisement, Advertisement, ArchiveService.ADVERTISEMENT_FIELDS
+            )
+            advertisement.trending_score = TrendingService.initial_score(advertisement.category)
+            responses = [
+                ArchiveService.copy(response, Response, ArchiveService.RESPONSE_FIELDS)
+                for response in archived_advertisement.responses.all()
+            ]
+            created_at = {response.id: response.created_at for response in responses}
+
+            Advertisement.objects.bulk_create([advertisement])
+            Response.objects.bulk_create(responses)
+            # INSERT проставляет created_at и updated_at текущим временем: дату создания
+            # возвращаем, а новый updated_at оставляем, чтобы /api/sync/ увидел объявление
+            Advertisement.objects.filter(pk=advertisement.pk).update(created_at=archived_advertisement.created_at)
+            advertisement.created_at = archived_advertisement.created_at
+            for response in responses:
+                response.created_at = created_at[response.id]
+            Response.objects.bulk_update(responses, ['created_at'])
+
+            # Надгробия архивации больше не нужны
+            DeletionLog.objects.filter(
+                Q(object_type='advertisement', object_id=advertisement.pk)
+                | Q(object_type='response', object_id__in=created_at)
+            ).delete()
+            archived_advertisement.delete()
+            BulkAdvertisementService.after_write([advertisement])
+        return advertisement
+
+
+class SyncService:
+    """
+    Дельта-синхронизация объявлений и откликов (/api/sync/).
+
+    Токен - момент начала предыдущей выборки. Изменения ищутся по
+    индексированным updated_at, удаления - по журналу DeletionLog.
+    Окно перекрытия SYNC_OVERLAP_SECONDS подбирает строки транзакций,
+    зафиксированных позже своего updated_at, поэтому элемент может прийти
+    повторно - клиент применяет изменения по id. Если токен старше срока
+    хранения журнала или изменений больше SYNC_MAX_ITEMS, возвращается
+    reset: клиент перезагружает списки целиком.
+    """
+
+    @staticmethod
+    def get_overlap():
+        return timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5))
+
+    @staticmethod
+    def get_max_items():
+        return getattr(settings, 'SYNC_MAX_ITEMS', 500)
+
+    @staticmethod
+    def get_retention():
+        return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+    @staticmethod
+    def encode_token(moment):
+        return str(int(moment.timestamp() * 1_000_000))
+
+    @staticmethod
+    def decode_token(token):
+        """Момент из токена; None, если токен поврежден"""
+        try:
+            return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            return None
+
+    # Установлен, пока надгробия пишет вызывающий код пачкой (см. ArchiveService.archive)
+    bulk_logging = contextvars.ContextVar('sync_bulk_logging', default=False)
+
+    @staticmethod
+    @contextmanager
+    def logged_in_bulk():
+        """Внутри блока сигналы удаления не пишут надгробия"""
+        token = SyncService.bulk_logging.set(True)
+        try:
+            yield
+        finally:
+            SyncService.bulk_logging.reset(token)
+
+    @staticmethod
+    def is_logged_in_bulk():
+        return SyncService.bulk_logging.get()
+
+    @staticmethod
+    def make_tombstones(object_type, object_id, user_ids=(None,)):
+        return [DeletionLog(object_type=object_type, object_id=object_id, user_id=user_id) for user_id in user_ids]
+
+    @staticmethod
+    def log_deletion(object_type, object_id, user_ids=(None,)):
+        DeletionLog.objects.bulk_create(SyncService.make_tombstones(object_type, object_id, user_ids))
+
+    @staticmethod
+    def cascade_tombstones(authors, responses):
+        """
+        Надгробия объявлений authors {id: автор} и их откликов
+        responses [(id, автор, id объявления)]
+        """
+        tombstones = []
+        for advertisement_id in authors:
+            tombstones += SyncService.make_tombstones('advertisement', advertisement_id)
+        for response_id, author_id, advertisement_id in responses:
+            user_ids = {author_id, authors[advertisement_id]}
+            tombstones += SyncService.make_tombstones('response', response_id, user_ids)
+        return tombstones
+
+    @staticmethod
+    def delete_advertisements(advertisements):
+        """
+        Удалить объявления queryset вместе с откликами. Надгробия пишутся
+        одним INSERT вместо запроса автора и INSERT на каждый отклик.
+        Возвращает результат delete()
+        """
+        with transaction.atomic():
+            authors = dict(advertisements.values_list('id', 'author_id'))
+            responses = Response.objects.filter(advertisement_id__in=authors).values_list(
+                'id', 'author_id', 'advertisement_id'
+            )
+            DeletionLog.objects.bulk_create(SyncService.cascade_tombstones(authors, responses))
+            with SyncService.logged_in_bulk():
+                return Advertisement.objects.filter(id__in=authors).delete()
+
+    @staticmethod
+    def get_changes(user, since):
+        """Изменения, видимые пользователю, после токена since"""
+        now = timezone.now()
+        changes = {
+            'token': SyncService.encode_token(now),
+            'reset': True,
+            'advertisements': [],
+            'responses': [],
+            'deleted': {'advertisements': [], 'responses': []},
+        }
+
+        moment = SyncService.decode_token(since) if since else None
+        if moment is None or moment < now - SyncService.get_retention():
+            return changes
+
+        start = moment - SyncService.get_overlap()
+        limit = SyncService.get_max_items() + 1
+
+        advertisements = list(
+            Advertisement.objects.select_related('author').filter(updated_at__gt=start).order_by('updated_at')[:limit]
+        )
+        tombstones = DeletionLog.objects.filter(deleted_at__gt=start, user_id__isnull=True)
+        responses = []
+        if user.is_authenticated:
+            tombstones = DeletionLog.objects.filter(
+                Q(user_id__isnull=True) | Q(user_id=user.id), deleted_at__gt=start
+            )
+            responses = list(
+                Response.objects.select_related('author', 'advertisement')
+                .filter(updated_at__gt=start)
+                .filter(Q(author=user) | Q(advertisement__author=user))
+                .order_by('updated_at')[:limit]
+            )
+        tombstones = list(tombstones.values_list('object_type', 'object_id')[:limit])
+
+        if max(len(advertisements), len(responses), len(tombstones)) >= limit:
+            return changes
+
+        deleted = {'advertisement': set(), 'response': set()}
+        for object_type, object_id in tombstones:
+            deleted[object_type].add(object_id)
+
+        changes.update({
+            'reset': False,
+            'advertisements': advertisements,
+            'responses': responses,
+            'deleted': {
+                'advertisements': sorted(deleted['advertisement']),
+                'responses': sorted(deleted['response']),
+            },
+        })
+        return changes
+
+    @staticmethod
+    def prune_deletion_log():
+        """Удалить записи журнала старше срока хранения; возвращает их число"""
+        deleted, _ = DeletionLog.objects.filter(deleted_at__lt=timezone.now() - SyncService.get_retention()).delete()
+        return deleted
+
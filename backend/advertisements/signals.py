@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from responses.models import Response
+from .models import Advertisement
+from . import search
+from . import cache
+from .services import ImageVariantService, SyncService, TrendingService
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Advertisement)
+def set_initial_trending_score(sender, instance, raw=False, **kwargs):
+    """Новое объявление попадает в популярное с рейтингом своей категории"""
+    if instance._state.adding and not raw and not instance.trending_score:
+        instance.trending_score = TrendingService.initial_score(instance.category)
+
+
+@receiver(post_save, sender=Advertisement)
+def index_advertisement(sender, instance, **kwargs):
+    """Обновляет поисковый индекс после сохранения объявления"""
+    search.index_advertisement(instance)
+
+
+@receiver(post_delete, sender=Advertisement)
+def remove_advertisement_from_index(sender, instance, **kwargs):
+    """Удаляет объявление из поискового индекса"""
+    search.remove_advertisement(instance.pk)
+
+
+@receiver(post_save, sender=Advertisement)
+def schedule_image_variants(sender, instance, **kwargs):
+    """После смены изображения пересоздаем его уменьшенные копии в фоне"""
+    if ImageVariantService.is_stale(instance):
+        advertisement_id = instance.pk
+        transaction.on_commit(lambda: ImageVariantService.schedule(advertisement_id))
+
+
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+def invalidate_advertisement_cache(sender, instance, **kwargs):
+    """Сбрасывает кеш объявления при его изменении или удалении"""
+    cache.invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Response)
+@receiver(post_delete, sender=Response)
+def invalidate_response_advertisement_cache(sender, instance, **kwargs):
+    """Отклики сериализуются внутри объявления - сбрасываем его кеш"""
+    cache.invalidate_on_commit(instance.advertisement_id)
+
+
+@receiver(post_delete, sender=Advertisement)
+def log_advertisement_deletion(sender, instance, **kwargs):
+    """Надгробие для /api/sync/: удаление объявления видно всем"""
+    if SyncService.is_logged_in_bulk():
+        return
+    SyncService.log_deletion('advertisement', instance.pk)
+
+
+@receiver(post_delete, sender=Response)
+def log_response_deletion(sender, instance, **kwargs):
+    """Надгробие для /api/sync/: удаление отклика видно его автору и автору объявления"""
+    if SyncService.is_logged_in_bulk():
+        return
+    user_ids = {instance.author_id}
+    # При каскадном удалении объявления отклики удаляются раньше него
+    user_ids.update(Advertisement.objects.filter(pk=instance.advertisement_id).values_list('author_id', flat=True))
+    SyncService.log_deletion('response', instance.pk, user_ids)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_advertisements_cache(sender, instance, created=False, update_fields=None, **kwargs):
+    """Данные пользователя входят в объявления, которые он создал или на которые откликнулся"""
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login', 'response_notification_mode'}:
+        # Дата входа и настройки уведомлений не входят в сериализованные данные
+        return
+    advertisement_ids = Advertisement.objects.filter(
+        Q(author=instance) | Q(responses__author=instance)
+    ).values_list('id', flat=True).distinct()
+    cache.invalidate_on_commit(*advertisement_ids)
@@ -1,3 +1,1028 @@
-from django.test import TestCase
+import hashlib
+import io
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+from PIL import Image
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from mmorpg_backend.query_plans import QueryPlanAssertionsMixin
+from users.models import User
+from responses.models import ArchivedResponse, Response
+from .models import Advertisement, AdvertisementUpload, ArchivedAdvertisement, DeletionLog
+from .services import ChunkedUploadService
+from . import cache as advertisement_cache
+
+
+class AdvertisementQueryBudgetTests(APITestCase):
+    """Число SQL-запросов на чтение объявлений не зависит от размера страницы"""
+    
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', email='reader@example.com', password='pass12345')
+        self.respondents = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+    
+    def create_advertisements(self, count):
+        for i in range(count):
+            advertisement = Advertisement.objects.create(
+                title=f'Объявление {i}', description='Описание', category='Танки', author=self.owner
+            )
+            for respondent in self.respondents:
+                Response.objects.create(advertisement=advertisement, author=respondent, text='Отклик')
+    
+    def assert_constant_queries(self, url, num_queries):
+        for count in (1, 5):
+            self.create_advertisements(count)
+            with self.assertNumQueries(num_queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        # Повторный запрос собирается из кеша: остается только выборка id
+        with self.assertNumQueries(1):
+            self.client.get(url)
+    
+    def test_public_advertisements(self):
+        # страница id + объявления с авторами; отклики лента берет из счетчиков
+        self.assert_constant_queries(reverse('advertisement-public-advertisements'), 2)
+    
+    def test_list(self):
+        self.client.force_authenticate(self.owner)
+        self.assert_constant_queries(reverse('advertisement-list'), 3)
+    
+    def test_my_advertisements(self):
+        self.client.force_authenticate(self.owner)
+        self.assert_constant_queries(reverse('advertisement-my-advertisements'), 3)
+    
+    def test_retrieve(self):
+        self.create_advertisements(1)
+        advertisement = Advertisement.objects.get()
+        url = reverse('advertisement-detail', args=[advertisement.id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['responses']), len(self.respondents))
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+
+class AdvertisementPaginationTests(APITestCase):
+    """Курсорная пагинация ленты в порядке (-created_at, -id)"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        for i in range(5):
+            Advertisement.objects.create(title=f'Рейд {i}', description='Описание', category='ДД', author=self.author)
+        # Одинаковая дата у нескольких объявлений - порядок задает id
+        created_at = timezone.now() - timedelta(days=1)
+        Advertisement.objects.filter(title__in=['Рейд 1', 'Рейд 2', 'Рейд 3']).update(created_at=created_at)
+        self.expected = list(Advertisement.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    def walk(self, url):
+        ids = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url, {'page_size': 2} if not ids else None)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('count', response.data)
+                ids += [item['id'] for item in response.data['results']]
+                url = response.data['next']
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+        return ids
+    
+    def test_public_advertisements(self):
+        self.assertEqual(self.walk(reverse('advertisement-public-advertisements')), self.expected)
+    
+    def test_list(self):
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.walk(reverse('advertisement-list')), self.expected)
+
+
+class AdvertisementCacheTests(APITestCase):
+    """Инвалидация кеша сериализованных объявлений"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.player = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.author
+        )
+        self.url = reverse('advertisement-detail', args=[self.advertisement.id])
+        self.client.get(self.url)
+    
+    def test_advertisement_change(self):
+        self.advertisement.title = 'Новый рейд'
+        self.advertisement.save()
+        self.assertEqual(self.client.get(self.url).data['title'], 'Новый рейд')
+        
+        self.advertisement.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+    
+    def test_response_change(self):
+        response = Response.objects.create(advertisement=self.advertisement, author=self.player, text='Отклик')
+        self.assertEqual(len(self.client.get(self.url).data['responses']), 1)
+        
+        response.delete()
+        self.assertEqual(self.client.get(self.url).data['responses'], [])
+    
+    def test_author_change(self):
+        self.author.username = 'guildmaster'
+        self.author.save()
+        self.assertEqual(self.client.get(self.url).data['author']['username'], 'guildmaster')
+    
+    @override_settings(ADVERTISEMENT_CACHE_TIMEOUT=60)
+    def test_version_expires_without_shared_cache(self):
+        # Инвалидацию в памяти другого процесса не видно - версия живет не дольше фрагмента
+        key = advertisement_cache.VERSION_KEY.format(id=self.advertisement.id)
+        advertisement_cache.invalidate(self.advertisement.id)
+        self.assertIsNotNone(cache.get(key))
+        
+        expired = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            self.assertIsNone(cache.get(key))
+    
+    def test_version_kept_in_shared_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        }
+        with override_settings(CACHES=caches):
+            self.assertTrue(advertisement_cache.is_shared())
+            self.assertIsNone(advertisement_cache.get_version_timeout())
+        self.assertFalse(advertisement_cache.is_shared())
+        self.assertEqual(advertisement_cache.get_version_timeout(), advertisement_cache.get_timeout())
+
+
+class AdvertisementSearchTests(APITestCase):
+    """Полнотекстовый поиск и синхронизация индекса FTS5"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.tank = Advertisement.objects.create(
+            title='Ищу танка в рейд', description='Нужен опытный танк на ночной рейд', category='Танки', author=self.author
+        )
+        self.smith = Advertisement.objects.create(
+            title='Кузнец <br> куёт мечи', description='Скую меч для танка', category='Кузнецы', author=self.author
+        )
+    
+    def search(self, query):
+        response = self.client.get(reverse('advertisement-search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+    
+    def test_ranks_title_matches_first(self):
+        results = self.search('танк')
+        self.assertEqual([r['id'] for r in results], [self.tank.id, self.smith.id])
+        self.assertIn('<mark>', results[0]['search']['title_highlight'])
+    
+    def test_highlight_escapes_html(self):
+        results = self.search('кузнец')
+        self.assertEqual(results[0]['search']['title_highlight'], '<mark>Кузнец</mark> &lt;br&gt; куёт мечи')
+    
+    def test_index_follows_save_and_delete(self):
+        self.tank.title = 'Ищу лекаря'
+        self.tank.save()
+        self.assertEqual([r['id'] for r in self.search('лекар')], [self.tank.id])
+        
+        self.tank.delete()
+        self.assertEqual(self.search('лекар'), [])
+    
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"NEAR( OR *'), [])
+        self.assertEqual(self.search(''), [])
+    
+    def test_limit_is_clamped(self):
+        url = reverse('advertisement-search')
+        # В SQLite LIMIT -1 означает «без ограничения»
+        for limit in (-1, 0, 1):
+            response = self.client.get(url, {'q': 'танк', 'limit': limit})
+            self.assertEqual(response.data['count'], 1)
+        self.assertEqual(self.client.get(url, {'q': 'танк', 'limit': 'все'}).status_code, 400)
+
+
+class AdvertisementConditionalGetTests(APITestCase):
+    """Условный GET: 304 без лишних запросов к БД"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.author
+        )
+    
+    def assert_not_modified_until_change(self, url):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1 if url != self.detail_url else 0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.advertisement.title = 'Новый рейд'
+        self.advertisement.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    @property
+    def detail_url(self):
+        return reverse('advertisement-detail', args=[self.advertisement.id])
+    
+    def test_public_advertisements(self):
+        self.assert_not_modified_until_change(reverse('advertisement-public-advertisements'))
+    
+    def test_list(self):
+        self.client.force_authenticate(self.author)
+        self.assert_not_modified_until_change(reverse('advertisement-list'))
+    
+    def test_retrieve(self):
+        self.assert_not_modified_until_change(self.detail_url)
+    
+    def test_etag_does_not_depend_on_process_versions(self):
+        # Без общего кеша у каждого процесса свои версии - ETag считается по содержимому
+        etag = self.client.get(self.detail_url)['ETag']
+        cache.clear()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        # Процесс, не видевший инвалидации, после истечения кеша отдает новые данные
+        Advertisement.objects.filter(id=self.advertisement.id).update(title='Новый рейд')
+        cache.clear()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Новый рейд')
+    
+    def test_shared_versions_skip_body(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        }
+        with override_settings(CACHES=caches):
+            etag = self.client.get(self.detail_url)['ETag']
+            with mock.patch.object(advertisement_cache, 'get_many') as get_many:
+                response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            get_many.assert_not_called()
+
+
+class ChunkedUploadTests(APITestCase):
+    """Возобновляемая загрузка медиафайлов по частям"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.author
+        )
+        self.content = bytes(range(256)) * 40
+        self.client.force_authenticate(self.author)
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def initiate(self):
+        response = self.client.post(reverse('upload-list'), {
+            'advertisement_id': self.advertisement.id,
+            'field': 'video',
+            'filename': 'raid.mp4',
+            'size': len(self.content),
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+    
+    def put_chunk(self, upload_id, start, end):
+        return self.client.put(
+            reverse('upload-detail', args=[upload_id]),
+            data=self.content[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.content)}',
+        )
+    
+    def test_chunks_resume_and_finalize(self):
+        upload_id = self.initiate()
+        self.assertEqual(self.put_chunk(upload_id, 0, 4095).data['offset'], 4096)
+        
+        # Часть с разрывом отклоняется, клиент продолжает с текущего смещения
+        response = self.put_chunk(upload_id, 8192, 10239)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 4096)
+        
+        self.assertEqual(self.put_chunk(upload_id, 4096, len(self.content) - 1).status_code, 200)
+        
+        response = self.client.post(reverse('upload-finalize', args=[upload_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.content).hexdigest())
+        
+        self.advertisement.refresh_from_db()
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(self.advertisement.video.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.mp4')
+        with self.advertisement.video.open('rb') as video:
+            self.assertEqual(video.read(), self.content)
+    
+    def test_overlapping_chunk_keeps_offset(self):
+        upload_id = self.initiate()
+        # Повтор первой части, прочитавший загрузку до прихода второй
+        stale = AdvertisementUpload.objects.get(pk=upload_id)
+        self.put_chunk(upload_id, 0, 4095)
+        self.put_chunk(upload_id, 4096, 8191)
+        
+        ChunkedUploadService.write_chunk(stale, 0, io.BytesIO(self.content[:4096]), 4096)
+        self.assertEqual(stale.offset, 8192)
+        self.assertEqual(AdvertisementUpload.objects.get(pk=upload_id).offset, 8192)
+    
+    def test_finalize_requires_all_bytes(self):
+        upload_id = self.initiate()
+        self.put_chunk(upload_id, 0, 99)
+        response = self.client.post(reverse('upload-finalize', args=[upload_id]))
+        self.assertEqual(response.status_code, 409)
+        self.advertisement.refresh_from_db()
+        self.assertFalse(self.advertisement.video)
+    
+    def test_only_author_can_upload(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client.force_authenticate(other)
+        response = self.client.post(reverse('upload-list'), {
+            'advertisement_id': self.advertisement.id, 'field': 'audio', 'filename': 'a.mp3', 'size': 10,
+        })
+        self.assertEqual(response.status_code, 403)
+
+
+class ImageVariantTests(APITestCase):
+    """Уменьшенные копии изображения объявления"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ASYNC=False, IMAGE_VARIANT_WIDTHS=[320, 640, 1280]
+        )
+        self.settings_override.enable()
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def make_image(self, width, height):
+        image = Image.new('RGB', (width, height), 'red')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', exif=exif)
+        return SimpleUploadedFile('banner.jpg', buffer.getvalue(), content_type='image/jpeg')
+    
+    def test_variants_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            advertisement = Advertisement.objects.create(
+                title='Гильдия', description='Набор', category='Гилдмастеры', author=self.author,
+                image=self.make_image(800, 400)
+            )
+        advertisement.refresh_from_db()
+        sizes = advertisement.image_variants['sizes']
+        self.assertEqual(sorted(sizes, key=int), ['320', '640'])
+        
+        with default_storage.open(sizes['320']['jpg']) as variant:
+            image = Image.open(variant)
+            self.assertEqual(image.size, (320, 160))
+            self.assertEqual(len(image.getexif()), 0)
+        
+        data = self.client.get(reverse('advertisement-detail', args=[advertisement.id])).data
+        self.assertIn('320w', data['image_variants']['srcset']['webp'])
+        self.assertTrue(data['image_variants']['placeholder'].startswith('data:image/jpeg;base64,'))
+    
+    def test_variants_hidden_until_ready(self):
+        advertisement = Advertisement.objects.create(
+            title='Гильдия', description='Набор', category='Гилдмастеры', author=self.author,
+            image=self.make_image(100, 100)
+        )
+        data = self.client.get(reverse('advertisement-detail', args=[advertisement.id])).data
+        self.assertIsNone(data['image_variants'])
+
+
+class SparseFieldsTests(APITestCase):
+    """Выборочные поля: ?fields= и ?expand=responses"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        player = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Очень длинное описание', category='ДД', author=self.author
+        )
+        Response.objects.create(advertisement=self.advertisement, author=player, text='Отклик')
+        self.url = reverse('advertisement-public-advertisements')
+    
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, ' '.join(query['sql'] for query in queries.captured_queries)
+    
+    def test_projection_limits_output_and_columns(self):
+        response, sql = self.get(self.url, {'fields': 'id,title,category,author'})
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {'id', 'title', 'category', 'author'})
+        self.assertEqual(item['author']['username'], 'author')
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('responses_response', sql)
+    
+    def test_expand_responses(self):
+        response, sql = self.get(self.url, {'fields': 'id,title', 'expand': 'responses'})
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {'id', 'title', 'responses'})
+        self.assertEqual(item['responses'][0]['advertisement']['title'], 'Рейд')
+        self.assertNotIn('"description"', sql)
+    
+    def test_retrieve(self):
+        url = reverse('advertisement-detail', args=[self.advertisement.id])
+        response, _ = self.get(url, {'fields': 'title'})
+        self.assertEqual(response.data, {'title': 'Рейд'})
+        # Полный ответ по тому же адресу не смешивается с выборочным
+        self.assertIn('description', self.client.get(url).data)
+    
+    def test_unknown_field(self):
+        response = self.client.get(self.url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkAdvertisementTests(APITestCase):
+    """Массовое создание, изменение и удаление объявлений"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client.force_authenticate(self.author)
+    
+    def item(self, title):
+        return {'title': title, 'description': 'Описание', 'category': 'Торговцы'}
+    
+    def create(self, author, title):
+        return Advertisement.objects.create(author=author, **self.item(title))
+    
+    def test_bulk_create(self):
+        items = [self.item(f'Продам зелье {i}') for i in range(10)]
+        response = self.client.post(reverse('advertisement-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Advertisement.objects.filter(author=self.author).count(), 10)
+        
+        # Поисковый индекс обновлен без сигналов сохранения
+        results = self.client.get(reverse('advertisement-search'), {'q': 'зелье'}).data['results']
+        self.assertEqual(len(results), 10)
+    
+    def test_bulk_create_reports_item_errors(self):
+        items = [self.item('Первое'), {'title': 'Без категории', 'description': 'Описание'}]
+        response = self.client.post(reverse('advertisement-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('category', response.data['errors'][1])
+        self.assertFalse(Advertisement.objects.exists())
+    
+    def test_bulk_update(self):
+        first, second = self.create(self.author, 'Первое'), self.create(self.author, 'Второе')
+        detail = reverse('advertisement-detail', args=[first.id])
+        self.client.get(detail)
+        
+        response = self.client.patch(reverse('advertisement-bulk-update'), [
+            {'id': first.id, 'title': 'Обновлено'},
+            {'id': second.id, 'category': 'Кузнецы'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        second.refresh_from_db()
+        self.assertEqual(second.category, 'Кузнецы')
+        # Кеш сброшен без сигналов сохранения
+        self.assertEqual(self.client.get(detail).data['title'], 'Обновлено')
+    
+    def test_bulk_update_checks_ownership(self):
+        own, foreign = self.create(self.author, 'Свое'), self.create(self.other, 'Чужое')
+        response = self.client.patch(reverse('advertisement-bulk-update'), [
+            {'id': own.id, 'title': 'Изменено'},
+            {'id': foreign.id, 'title': 'Изменено'},
+            {'title': 'Без id'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('id', errors[1])
+        self.assertIn('id', errors[2])
+        own.refresh_from_db()
+        self.assertEqual(own.title, 'Свое')
+    
+    def test_bulk_delete(self):
+        ads = [self.create(self.author, f'Объявление {i}') for i in range(3)]
+        foreign = self.create(self.other, 'Чужое')
+        
+        response = self.client.post(reverse('advertisement-bulk-delete'), {'ids': [ads[0].id, foreign.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Advertisement.objects.count(), 4)
+        
+        response = self.client.post(reverse('advertisement-bulk-delete'), {'ids': [ad.id for ad in ads]}, format='json')
+        self.assertEqual(response.data, {'deleted': 3})
+        self.assertEqual(list(Advertisement.objects.all()), [foreign])
+    
+    def test_nested_list_id(self):
+        own = self.create(self.author, 'Свое')
+        response = self.client.post(reverse('advertisement-bulk-delete'), {'ids': [[own.id], own.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['errors'][0])
+        self.assertEqual(response.data['errors'][1], {})
+        
+        response = self.client.patch(
+            reverse('advertisement-bulk-update'), [{'id': [own.id], 'title': 'Изменено'}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['errors'][0])
+        self.assertTrue(Advertisement.objects.filter(title='Свое').exists())
+
+
+class AdvertisementQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    """Горячие выборки объявлений идут по индексам, без полного просмотра таблицы"""
+    
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', email='reader@example.com', password='pass12345')
+        for i, category in enumerate(['Танки', 'Хилы', 'ДД'] * 3):
+            advertisement = Advertisement.objects.create(
+                title=f'Объявление {i}', description='Описание', category=category, author=self.owner
+            )
+            Response.objects.create(advertisement=advertisement, author=self.reader, text='Отклик')
+    
+    def get(self, url, params=None):
+        response = self.assertNoFullScans(self.client.get, url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+    
+    def test_public_feed(self):
+        self.get(reverse('advertisement-public-advertisements'))
+        self.client.force_authenticate(self.reader)
+        self.get(reverse('advertisement-public-advertisements'))
+    
+    def test_public_feed_by_category(self):
+        response = self.get(reverse('advertisement-public-advertisements'), {'category': 'Хилы'})
+        self.assertEqual({item['category'] for item in response.data['results']}, {'Хилы'})
+    
+    def test_next_page(self):
+        response = self.get(reverse('advertisement-public-advertisements'), {'page_size': 2, 'fields': 'id'})
+        self.get(response.data['next'])
+    
+    def test_my_advertisements(self):
+        self.client.force_authenticate(self.owner)
+        self.get(reverse('advertisement-my-advertisements'))
+        self.get(reverse('advertisement-list'))
+    
+    def test_retrieve(self):
+        advertisement = Advertisement.objects.first()
+        self.get(reverse('advertisement-detail', args=[advertisement.id]))
+    
+    def test_sync(self):
+        token = self.client.get(reverse('sync')).data['token']
+        self.client.force_authenticate(self.reader)
+        self.get(reverse('sync'), {'since': token})
+    
+    def test_trending(self):
+        response = self.get(reverse('advertisement-trending'), {'page_size': 2})
+        self.get(response.data['next'])
+
+
+class ResponseCounterTests(APITestCase):
+    """Счетчики откликов в ленте и их сверка с таблицей откликов"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.author
+        )
+    
+    def test_feed_uses_counters(self):
+        Advertisement.objects.filter(pk=self.advertisement.pk).update(response_count=2, new_response_count=2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('advertisement-public-advertisements'))
+        item = response.data['results'][0]
+        self.assertEqual(item['response_count'], 2)
+        self.assertNotIn('responses', item)
+        self.assertFalse(any('responses_response' in query['sql'] for query in queries.captured_queries))
+        
+        response = self.client.get(reverse('advertisement-public-advertisements'), {'expand': 'responses'})
+        self.assertEqual(response.data['results'][0]['responses'], [])
+    
+    def test_reconcile_repairs_drift(self):
+        # Отклики, созданные в обход API, счетчики не меняют
+        for player, status in zip(self.players, ['new', 'accepted', 'accepted']):
+            Response.objects.create(advertisement=self.advertisement, author=player, text='Отклик', status=status)
+        other = Advertisement.objects.create(title='Торговля', description='Описание', category='Торговцы', author=self.author)
+        Advertisement.objects.filter(pk=other.pk).update(response_count=5, rejected_response_count=5)
+        
+        call_command('reconcile_response_counters', batch_size=1, stdout=io.StringIO())
+        
+        self.advertisement.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(
+            (self.advertisement.response_count, self.advertisement.new_response_count,
+             self.advertisement.accepted_response_count, self.advertisement.rejected_response_count),
+            (3, 1, 2, 0)
+        )
+        self.assertEqual((other.response_count, other.rejected_response_count), (0, 0))
+        self.assertEqual(self.client.get(reverse('advertisement-detail', args=[other.id])).data['response_count'], 0)
+
+
+@override_settings(
+    TRENDING_HALF_LIFE_HOURS=24,
+    TRENDING_NEW_ADVERTISEMENT_SCORE=1.0,
+    TRENDING_RESPONSE_SCORE=1.0,
+    TRENDING_CATEGORY_WEIGHTS={'Танки': 2.0},
+)
+class TrendingTests(APITestCase):
+    """Трендовый рейтинг: прирост за отклик, вес категории, затухание и лента популярного"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(2)
+        ]
+        self.tank = Advertisement.objects.create(title='Танк', description='Описание', category='Танки', author=self.author)
+        self.trader = Advertisement.objects.create(title='Торговец', description='Описание', category='Торговцы', author=self.author)
+    
+    def respond(self, advertisement, player):
+        self.client.force_authenticate(player)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': advertisement.id, 'text': 'Отклик'})
+        self.assertEqual(response.status_code, 201)
+    
+    def score(self, advertisement):
+        advertisement.refresh_from_db()
+        return advertisement.trending_score
+    
+    def test_initial_score_uses_category_weight(self):
+        self.assertEqual(self.score(self.tank), 2.0)
+        self.assertEqual(self.score(self.trader), 1.0)
+    
+    def test_response_increments_score(self):
+        self.respond(self.tank, self.players[0])
+        self.respond(self.trader, self.players[0])
+        self.assertEqual(self.score(self.tank), 4.0)
+        self.assertEqual(self.score(self.trader), 2.0)
+    
+    def test_decay(self):
+        call_command('decay_trending_scores', hours=24, stdout=io.StringIO())
+        self.assertAlmostEqual(self.score(self.tank), 1.0)
+        self.assertAlmostEqual(self.score(self.trader), 0.5)
+        
+        # Исчезающе малые рейтинги обнуляются
+        call_command('decay_trending_scores', hours=24 * 30, stdout=io.StringIO())
+        self.assertEqual(self.score(self.tank), 0)
+    
+    def test_trending_order(self):
+        for player in self.players:
+            self.respond(self.trader, player)
+        self.client.force_authenticate(None)
+        
+        response = self.client.get(reverse('advertisement-trending'))
+        self.assertEqual([item['id'] for item in response.data['results']], [self.trader.id, self.tank.id])
+        
+        response = self.client.get(reverse('advertisement-trending'), {'category': 'Танки'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.tank.id])
+        
+        # Свои объявления в популярном не показываются
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get(reverse('advertisement-trending')).data['results'], [])
+
+
+@override_settings(ARCHIVE_AFTER_DAYS=365)
+class ArchiveTests(APITestCase):
+    """Перенос старых объявлений в архив, чтение с ?include_archived=1 и восстановление"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(2)
+        ]
+        self.old = Advertisement.objects.create(title='Старый рейд', description='Описание', category='ДД', author=self.author)
+        for player in self.players:
+            Response.objects.create(advertisement=self.old, author=player, text='Отклик')
+        self.fresh = Advertisement.objects.create(title='Новый рейд', description='Описание', category='ДД', author=self.author)
+        self.created_at = timezone.now() - timedelta(days=500)
+        Advertisement.objects.filter(pk=self.old.pk).update(
+            created_at=self.created_at, updated_at=timezone.now() - timedelta(days=400), response_count=2
+        )
+    
+    def archive(self):
+        call_command('archive_advertisements', batch_size=1, stdout=io.StringIO())
+    
+    def test_archive_moves_old_advertisements_with_responses(self):
+        self.archive()
+        
+        self.assertEqual(list(Advertisement.objects.values_list('id', flat=True)), [self.fresh.id])
+        self.assertFalse(Response.objects.exists())
+        archived = ArchivedAdvertisement.objects.get()
+        self.assertEqual((archived.id, archived.created_at, archived.response_count), (self.old.id, self.created_at, 2))
+        self.assertEqual(ArchivedResponse.objects.filter(advertisement=archived).count(), 2)
+        self.assertTrue(DeletionLog.objects.filter(object_type='advertisement', object_id=self.old.id).exists())
+        
+        feed = self.client.get(reverse('advertisement-public-advertisements'))
+        self.assertEqual([item['id'] for item in feed.data['results']], [self.fresh.id])
+    
+    def test_include_archived(self):
+        self.client.get(reverse('advertisement-detail', args=[self.old.id]))
+        self.archive()
+        
+        url = reverse('advertisement-detail', args=[self.old.id])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, {'include_archived': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['archived'])
+        self.assertEqual(len(response.data['responses']), 2)
+        
+        self.client.force_authenticate(self.author)
+        response = self.client.get(reverse('advertisement-my-advertisements'), {'include_archived': 1})
+        self.assertEqual([item['id'] for item in response.data], [self.fresh.id, self.old.id])
+        self.assertEqual(len(self.client.get(reverse('advertisement-my-advertisements')).data), 1)
+        
+        response = self.client.get(reverse('response-advertisement-responses'), {'include_archived': 1})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['facets']['advertisements'], [{'id': self.old.id, 'title': 'Старый рейд', 'count': 2}])
+        
+        self.client.force_authenticate(self.players[0])
+        response = self.client.get(reverse('response-my-responses'), {'include_archived': 1, 'fields': 'id,advertisement'})
+        self.assertEqual(response.data['results'], [{'id': response.data['results'][0]['id'], 'advertisement': {
+            'id': self.old.id, 'title': 'Старый рейд', 'category': 'ДД'
+        }}])
+    
+    def test_restore(self):
+        response_ids = set(Response.objects.values_list('id', flat=True))
+        self.archive()
+        
+        url = reverse('advertisement-restore', args=[self.old.id])
+        self.client.force_authenticate(self.players[0])
+        self.assertEqual(self.client.post(url).status_code, 404)
+        
+        self.client.force_authenticate(self.author)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['responses']), 2)
+        
+        restored = Advertisement.objects.get(pk=self.old.pk)
+        self.assertEqual((restored.created_at, restored.response_count), (self.created_at, 2))
+        self.assertEqual(set(restored.responses.values_list('id', flat=True)), response_ids)
+        self.assertFalse(ArchivedAdvertisement.objects.exists())
+        self.assertFalse(ArchivedResponse.objects.exists())
+        self.assertFalse(DeletionLog.objects.exists())
+    
+    def test_tombstones_written_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.archive()
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "advertisements_deletionlog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(DeletionLog.objects.values_list('object_type', 'user_id')),
+            {('advertisement', None)} | {('response', user.id) for user in [self.author, *self.players]}
+        )
+        self.assertEqual(DeletionLog.objects.filter(object_type='response').count(), 4)
+    
+    def test_incomplete_upload_files_removed(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            upload = ChunkedUploadService.initiate(self.author, self.old, 'video', 'raid.mp4', 1024)
+            self.assertTrue(default_storage.exists(upload.storage_name))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.archive()
+            self.assertFalse(default_storage.exists(upload.storage_name))
+        self.assertFalse(AdvertisementUpload.objects.exists())
+
+
+class AsyncReadPathTests(APITestCase):
+    """Асинхронные представления отдают то же, что и синхронные"""
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', email='reader@example.com', password='pass12345')
+        self.token = Token.objects.create(user=self.reader)
+        for i in range(5):
+            advertisement = Advertisement.objects.create(
+                title=f'Рейд {i}', description='Описание', category='ДД' if i % 2 else 'Хилы', author=self.author
+            )
+            Response.objects.create(advertisement=advertisement, author=self.reader, text='Отклик')
+        self.own = Advertisement.objects.create(title='Свое', description='Описание', category='ДД', author=self.reader)
+    
+    async def test_feed_matches_sync_path(self):
+        url = reverse('async-public-advertisements')
+        response = await self.async_client.get(url, {'page_size': 2}, headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 200)
+        
+        titles = []
+        page = response.json()
+        while True:
+            titles += [item['title'] for item in page['results']]
+            if not page['next']:
+                break
+            page = (await self.async_client.get(page['next'], headers={'Authorization': f'Token {self.token.key}'})).json()
+        self.assertEqual(titles, [f'Рейд {i}' for i in reversed(range(5))])
+        
+        sync = await self.async_client.get(reverse('advertisement-public-advertisements'), {'page_size': 2})
+        guest = await self.async_client.get(url, {'page_size': 2})
+        self.assertEqual(guest.json()['results'], sync.json()['results'])
+    
+    async def test_feed_by_category(self):
+        response = await self.async_client.get(reverse('async-public-advertisements'), {'category': 'Хилы'})
+        self.assertEqual({item['category'] for item in response.json()['results']}, {'Хилы'})
+    
+    async def test_bad_token_and_cursor(self):
+        url = reverse('async-public-advertisements')
+        self.assertEqual((await self.async_client.get(url, headers={'Authorization': 'Token wrong'})).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, {'cursor': 'broken'})).status_code, 404)
+    
+    async def test_detail(self):
+        advertisement = await Advertisement.objects.order_by('id').afirst()
+        response = await self.async_client.get(reverse('async-advertisement-detail', args=[advertisement.id]))
+        sync = await self.async_client.get(reverse('advertisement-detail', args=[advertisement.id]))
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(len(response.json()['responses']), 1)
+        
+        missing = await self.async_client.get(reverse('async-advertisement-detail', args=[0]))
+        self.assertEqual(missing.status_code, 404)
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(APITestCase):
+    """Дельта-синхронизация /api/sync/"""
+    
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+        self.player = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password='pass12345')
+        self.old = Advertisement.objects.create(title='Старое', description='Описание', category='ДД', author=self.author)
+        self.url = reverse('sync')
+    
+    def sync(self, since=None, user=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_without_token_requests_reset(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertTrue(data['token'])
+        self.assertTrue(self.sync('garbage')['reset'])
+    
+    def test_returns_only_changes_after_token(self):
+        token = self.sync()['token']
+        new = Advertisement.objects.create(title='Новое', description='Описание', category='ДД', author=self.author)
+        Response.objects.create(advertisement=new, author=self.player, text='Беру')
+        
+        data = self.sync(token, self.player)
+        self.assertFalse(data['reset'])
+        self.assertEqual([item['title'] for item in data['advertisements']], ['Новое'])
+        self.assertNotIn('responses', data['advertisements'][0])
+        self.assertEqual([item['text'] for item in data['responses']], ['Беру'])
+        
+        # Чужие отклики и гостю не видны
+        self.assertEqual(self.sync(token, self.stranger)['responses'], [])
+        self.assertEqual(self.sync(token)['responses'], [])
+        
+        # С новым токеном изменений нет
+        data = self.sync(data['token'], self.player)
+        self.assertEqual((data['advertisements'], data['responses']), ([], []))
+    
+    def test_counter_change_reaches_feed(self):
+        response = Response.objects.create(advertisement=self.old, author=self.player, text='Беру')
+        token = self.sync()['token']
+        self.client.force_authenticate(self.author)
+        self.client.patch(reverse('response-change-status', args=[response.id]), {'status': 'accepted'})
+        data = self.sync(token)
+        self.assertEqual([item['accepted_response_count'] for item in data['advertisements']], [1])
+    
+    def test_tombstones(self):
+        response = Response.objects.create(advertisement=self.old, author=self.player, text='Беру')
+        token = self.sync()['token']
+        response_id = response.id
+        response.delete()
+        
+        self.assertEqual(self.sync(token, self.player)['deleted']['responses'], [response_id])
+        self.assertEqual(self.sync(token, self.author)['deleted']['responses'], [response_id])
+        self.assertEqual(self.sync(token, self.stranger)['deleted']['responses'], [])
+        
+        advertisement_id = self.old.id
+        self.old.delete()
+        self.assertEqual(self.sync(token)['deleted']['advertisements'], [advertisement_id])
+    
+    def test_cascade_tombstones_in_one_insert(self):
+        own = Response.objects.create(advertisement=self.old, author=self.player, text='Беру')
+        Response.objects.create(advertisement=self.old, author=self.stranger, text='Тоже беру')
+        token = self.sync()['token']
+        response_ids = list(Response.objects.values_list('id', flat=True))
+        
+        self.client.force_authenticate(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(reverse('advertisement-detail', args=[self.old.id]))
+        self.assertEqual(response.status_code, 204)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "advertisements_deletionlog"')]
+        self.assertEqual(len(inserts), 1)
+        
+        data = self.sync(token, self.player)
+        self.assertEqual(data['deleted']['advertisements'], [self.old.id])
+        self.assertEqual(data['deleted']['responses'], [own.id])
+        self.assertEqual(sorted(self.sync(token, self.author)['deleted']['responses']), sorted(response_ids))
+    
+    def test_stale_token_and_too_many_changes_reset(self):
+        token = self.sync()['token']
+        DeletionLog.objects.create(object_type='advertisement', object_id=0)
+        with override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=0):
+            self.assertTrue(self.sync(token)['reset'])
+        
+        for i in range(2):
+            Advertisement.objects.create(title=f'Новое {i}', description='Описание', category='ДД', author=self.author)
+        with override_settings(SYNC_MAX_ITEMS=1):
+            data = self.sync(token)
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['advertisements'], [])
+
+
+class ContentAddressedStorageTests(APITestCase):
+    """Хранилище медиафайлов по SHA-256 и сборка мусора"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ASYNC=False,
+            MEDIA_X_ACCEL_REDIRECT_PREFIX=None, MEDIA_X_SENDFILE=False
+        )
+        self.settings_override.enable()
+        self.author = User.objects.create_user(username='author', email='author@example.com', password='pass12345')
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def create(self, filename, content):
+        return Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.author,
+            audio=SimpleUploadedFile(filename, content)
+        )
+    
+    def blob_files(self):
+        return [name for name, _ in Advertisement._meta.get_field('audio').storage.iter_blobs()]
+    
+    def test_identical_uploads_share_one_blob(self):
+        first = self.create('horn.mp3', b'war horn')
+        second = self.create('other_name.MP3', b'war horn')
+        self.assertEqual(first.audio.name, second.audio.name)
+        self.assertEqual(self.blob_files(), [first.audio.name])
+        
+        # Удаление файла одного объявления не ломает другое
+        first.audio.delete()
+        with second.audio.open('rb') as audio:
+            self.assertEqual(audio.read(), b'war horn')
+    
+    def test_gc_removes_only_unreferenced_blobs(self):
+        kept = self.create('kept.mp3', b'kept')
+        dropped = self.create('dropped.mp3', b'dropped')
+        dropped_name = dropped.audio.name
+        dropped.delete()
+        
+        call_command('gc_media_blobs', min_age_hours=1, stdout=io.StringIO())
+        self.assertEqual(len(self.blob_files()), 2)
+        
+        call_command('gc_media_blobs', min_age_hours=0, stdout=io.StringIO())
+        self.assertEqual(self.blob_files(), [kept.audio.name])
+        self.assertNotIn(dropped_name, self.blob_files())
+    
+    def test_blobs_served_immutable(self):
+        advertisement = self.create('horn.mp3', b'war horn')
+        response = self.client.get(reverse('media', args=[advertisement.audio.name]))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        response = self.client.get(reverse('media', args=[advertisement.audio.name]), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('immutable', response['Cache-Control'])
 
-# Create your tests here.
@@ -1,10 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AdvertisementViewSet
+from .views import AdvertisementViewSet, AdvertisementUploadViewSet, sync_changes
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'advertisements', AdvertisementViewSet, basename='advertisement')
+router.register(r'uploads', AdvertisementUploadViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('sync/', sync_changes, name='sync'),
+    # Асинхронный путь чтения для ASGI-сервера
+    path('async/advertisements/public/', async_views.public_advertisements, name='async-public-advertisements'),
+    path('async/advertisements/<int:advertisement_id>/', async_views.advertisement_detail,
+         name='async-advertisement-detail'),
 ]
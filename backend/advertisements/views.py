@@ -1,30 +1,73 @@
-from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action
+from rest_framework import viewsets, permissions, status, mixins
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+import hashlib
+import json
+import re
 from django.shortcuts import get_object_or_404
-from .models import Advertisement
-from .serializers import AdvertisementSerializer, AdvertisementCreateSerializer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.db.models import Prefetch
+from django.utils.http import quote_etag
+from mmorpg_backend import bulk
+from mmorpg_backend.sparse_fields import SparseFieldsViewMixin, related_columns
+from responses.models import ArchivedResponse, Response as AdvertisementResponse
+from responses.serializers import ResponseSerializer
+from users.serializers import UserSerializer
+from .models import Advertisement, AdvertisementUpload, ArchivedAdvertisement
+from .serializers import (
+    AdvertisementSerializer,
+    AdvertisementCreateSerializer,
+    AdvertisementUploadSerializer,
+    AdvertisementUploadCreateSerializer,
+    ArchivedAdvertisementSerializer,
+    FEED_FIELDS,
+)
+from .services import ArchiveService, ChunkedUploadService, UploadError, BulkAdvertisementService, SyncService
+from .pagination import AdvertisementCursorPagination, TrendingCursorPagination
+from . import search as search_index
+from . import cache as advertisement_cache
 
-class AdvertisementViewSet(viewsets.ModelViewSet):
-    queryset = Advertisement.objects.all()
+class AdvertisementViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Advertisement.objects.with_related()
     serializer_class = AdvertisementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AdvertisementCursorPagination
+    
+    # Выборочные поля (?fields=, ?expand=responses)
+    expandable_fields = ('responses',)
+    sparse_required_columns = ['id', 'created_at']
+    sparse_field_columns = {
+        'author': related_columns('author', UserSerializer),
+        'image_variants': ['image', 'image_variants'],
+        # Вложенные отклики выводят заголовок и категорию объявления
+        'responses': ['title', 'category'],
+    }
+    sparse_select_related = {
+        'author': 'author',
+    }
+    sparse_prefetch_related = {
+        'responses': lambda: Prefetch(
+            'responses', queryset=AdvertisementResponse.objects.select_related('author')
+        ),
+    }
     
     def get_queryset(self):
         """Возвращает объявления в зависимости от действия"""
         if self.action == 'retrieve':
             # Для просмотра конкретного объявления разрешаем всем
-            return Advertisement.objects.all()
+            return Advertisement.objects.with_related()
         elif self.action == 'my_advertisements':
             # Только объявления текущего пользователя
-            return Advertisement.objects.filter(author=self.request.user)
+            return Advertisement.objects.filter(author=self.request.user).with_related()
         else:
             # По умолчанию только объявления текущего пользователя
-            return Advertisement.objects.filter(author=self.request.user)
+            return Advertisement.objects.filter(author=self.request.user).with_related()
     
     def get_permissions(self):
         """Разрешаем просмотр объявлений всем пользователям"""
-        if self.action in ['retrieve', 'public_advertisements']:
+        if self.action in ['retrieve', 'public_advertisements', 'trending', 'search']:
             return [permissions.AllowAny()]
         return super().get_permissions()
     
@@ -34,6 +77,128 @@ class AdvertisementViewSet(viewsets.ModelViewSet):
             return AdvertisementCreateSerializer
         return AdvertisementSerializer
     
+    def get_cached_advertisements(self, ids, versions=None, variant='full'):
+        """Сериализованные объявления в порядке ids: из кеша, недостающие - из БД"""
+        def load(missing_ids):
+            if variant == 'feed':
+                advertisements = Advertisement.objects.select_related('author').filter(id__in=missing_ids)
+                fields = FEED_FIELDS
+            else:
+                advertisements = Advertisement.objects.with_related().filter(id__in=missing_ids)
+                fields = None
+            return {advertisement.id: dict(AdvertisementSerializer(advertisement, fields=fields).data)
+                    for advertisement in advertisements}
+        
+        return advertisement_cache.get_many(ids, load, versions=versions, variant=variant)
+    
+    def get_etag(self, ids, versions, *extra):
+        """
+        ETag набора объявлений: версии кеша меняются при любом изменении
+        объявления, его откликов или участвующих пользователей
+        """
+        source = repr([(advertisement_id, versions[advertisement_id]) for advertisement_id in ids] + list(extra))
+        return quote_etag(hashlib.md5(source.encode()).hexdigest())
+    
+    def get_content_etag(self, data, *extra):
+        """ETag по содержимому ответа - одинаков во всех процессах"""
+        source = json.dumps([data, *extra], cls=DjangoJSONEncoder, sort_keys=True)
+        return quote_etag(hashlib.md5(source.encode()).hexdigest())
+    
+    def cached_response(self, ids, get_response, *extra, load=None, variant='full'):
+        """
+        Ответ из закешированных фрагментов с условным GET.
+        
+        Если версии кеша общие для всех процессов, при совпадении
+        If-None-Match отдается 304 до сборки тела. Иначе версии видны
+        только своему процессу, и ETag считается по собранному телу.
+        load() вместо кеша строит тело для выборочных полей.
+        """
+        path = self.request.get_full_path()
+        versions = etag = None
+        if advertisement_cache.is_shared():
+            versions = advertisement_cache.get_versions(ids)
+            etag = self.get_etag(ids, versions, path, *extra)
+            not_modified = get_conditional_response(self.request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+        
+        data = load() if load else self.get_cached_advertisements(ids, versions=versions, variant=variant)
+        response = get_response(data)
+        if etag is None:
+            etag = self.get_content_etag(response.data, path, *extra)
+            not_modified = get_conditional_response(self.request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+        response['ETag'] = etag
+        return response
+    
+    def serialize_sparse(self, advertisements, fields):
+        return AdvertisementSerializer(advertisements, many=True, fields=fields).data
+    
+    def get_archived_advertisements(self, **filters):
+        """Архивные объявления с автором и откликами - фиксированное число запросов"""
+        return list(
+            ArchivedAdvertisement.objects.filter(**filters).select_related('author').prefetch_related(
+                Prefetch('responses', queryset=ArchivedResponse.objects.select_related('author'))
+            )
+        )
+    
+    def serialize_archived(self, advertisements, fields=None):
+        return ArchivedAdvertisementSerializer(advertisements, many=True, fields=fields).data
+    
+    def paginate_cached(self, queryset, variant='full'):
+        """Страница курсорной пагинации, собранная из закешированных фрагментов"""
+        fields = self.get_sparse_fields()
+        # Столбцы порядка нужны пагинатору для позиции курсора
+        ordering_columns = [field.lstrip('-') for field in self.paginator.ordering]
+        if fields is not None:
+            # Выборочные поля читаются одним запросом только нужных столбцов
+            page = self.paginate_queryset(self.apply_sparse_fields(queryset, fields, ordering_columns))
+            load = lambda: self.serialize_sparse(page, fields)
+        else:
+            # Для выборки страницы достаточно ключа и полей курсора
+            queryset = queryset.select_related(None).prefetch_related(None).only('id', *ordering_columns)
+            page = self.paginate_queryset(queryset)
+            load = None
+        
+        return self.cached_response(
+            [advertisement.id for advertisement in page],
+            self.get_paginated_response,
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+            load=load,
+            variant=variant,
+        )
+    
+    def list(self, request, *args, **kwargs):
+        """Объявления текущего пользователя постранично"""
+        return self.paginate_cached(self.filter_queryset(self.get_queryset()))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Просмотр объявления из кеша"""
+        try:
+            advertisement_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        
+        load = None
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            queryset = self.apply_sparse_fields(Advertisement.objects.filter(id=advertisement_id), fields)
+            load = lambda: self.serialize_sparse(queryset, fields)
+        
+        def get_response(data):
+            if data:
+                return Response(data[0])
+            if ArchiveService.is_requested(request):
+                # ?include_archived=1 - ищем объявление в архиве
+                archived = self.get_archived_advertisements(id=advertisement_id)
+                if archived:
+                    return Response(self.serialize_archived(archived, fields)[0])
+            raise Http404
+        
+        return self.cached_response([advertisement_id], get_response, load=load)
+    
     def perform_create(self, serializer):
         """Автоматически устанавливает автора при создании"""
         serializer.save(author=self.request.user)
@@ -49,24 +214,265 @@ class AdvertisementViewSet(viewsets.ModelViewSet):
         """Проверяем, что пользователь удаляет свое объявление"""
         if instance.author != self.request.user:
             raise permissions.PermissionDenied("Вы можете удалять только свои объявления")
-        instance.delete()
+        SyncService.delete_advertisements(Advertisement.objects.filter(pk=instance.pk))
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """Создать несколько объявлений в одной транзакции"""
+        error = BulkAdvertisementService.check_items(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = AdvertisementCreateSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            errors = BulkAdvertisementService.item_errors(serializer, len(request.data))
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        advertisements = BulkAdvertisementService.create(request.user, serializer)
+        return Response(
+            {'results': [{'id': advertisement.id} for advertisement in advertisements]},
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['patch'])
+    def bulk_update(self, request):
+        """Изменить несколько своих объявлений в одной транзакции"""
+        error = BulkAdvertisementService.check_items(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(item, dict) for item in request.data):
+            return Response({'error': 'Каждый элемент должен быть объектом'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        ids = [item.get('id') for item in request.data]
+        owned = BulkAdvertisementService.get_owned(request.user, bulk.int_ids(ids))
+        errors = BulkAdvertisementService.check_ids(ids, owned)
+        
+        serializer = AdvertisementCreateSerializer(data=request.data, many=True, partial=True)
+        if not serializer.is_valid():
+            for item_errors, validation_errors in zip(errors, BulkAdvertisementService.item_errors(serializer, len(ids))):
+                item_errors.update(validation_errors)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        advertisements = BulkAdvertisementService.update(owned, ids, serializer.validated_data)
+        return Response({'results': [{'id': advertisement.id} for advertisement in advertisements]})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        """Удалить несколько своих объявлений: {"ids": [...]}"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        error = BulkAdvertisementService.check_items(ids)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        owned = BulkAdvertisementService.get_owned(request.user, bulk.int_ids(ids))
+        errors = BulkAdvertisementService.check_ids(ids, owned)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        deleted = BulkAdvertisementService.delete(request.user, ids)
+        return Response({'deleted': deleted})
     
     @action(detail=False, methods=['get'])
     def my_advertisements(self, request):
         """Получить все объявления текущего пользователя"""
-        advertisements = self.get_queryset()
-        serializer = AdvertisementSerializer(advertisements, many=True)
-        return Response(serializer.data)
+        fields = self.get_sparse_fields()
+        
+        get_response = Response
+        archived_ids = []
+        if ArchiveService.is_requested(request):
+            # Архивные объявления идут после действующих; их id входят в ETag
+            archived = self.get_archived_advertisements(author=request.user)
+            archived_ids = [advertisement.id for advertisement in archived]
+            get_response = lambda data: Response(list(data) + self.serialize_archived(archived, fields))
+        
+        if fields is not None:
+            advertisements = list(self.apply_sparse_fields(self.get_queryset(), fields))
+            ids = [advertisement.id for advertisement in advertisements]
+            return self.cached_response(
+                ids, get_response, archived_ids, load=lambda: self.serialize_sparse(advertisements, fields)
+            )
+        
+        ids = list(self.get_queryset().values_list('id', flat=True))
+        return self.cached_response(ids, get_response, archived_ids)
+    
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """Вернуть свое объявление из архива"""
+        archived = ArchivedAdvertisement.objects.filter(pk=pk, author=request.user).prefetch_related('responses').first()
+        if archived is None:
+            raise Http404
+        advertisement = ArchiveService.restore(archived)
+        return Response(AdvertisementSerializer(Advertisement.objects.with_related().get(pk=advertisement.pk)).data)
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def public_advertisements(self, request):
-        """Получить все публичные объявления (исключая авторизованного пользователя)"""
+        """Получить публичные объявления постранично (исключая авторизованного пользователя)"""
         if request.user.is_authenticated:
             # Для авторизованных пользователей исключаем их собственные объявления
-            advertisements = Advertisement.objects.exclude(author=request.user).order_by('-created_at')
+            advertisements = Advertisement.objects.exclude(author=request.user)
         else:
             # Для гостей показываем все объявления
-            advertisements = Advertisement.objects.all().order_by('-created_at')
+            advertisements = Advertisement.objects.all()
         
-        serializer = AdvertisementSerializer(advertisements, many=True)
-        return Response(serializer.data)
+        category = request.query_params.get('category')
+        if category:
+            advertisements = advertisements.filter(category=category)
+        
+        # Список откликов выводится только по ?expand=responses
+        expand = request.query_params.get('expand', '').split(',')
+        variant = 'full' if 'responses' in expand else 'feed'
+        
+        # Порядок (-created_at, -id) задает курсорная пагинация
+        return self.paginate_cached(advertisements, variant=variant)
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny],
+            pagination_class=TrendingCursorPagination)
+    def trending(self, request):
+        """Популярные объявления по убыванию трендового рейтинга (?category=)"""
+        advertisements = Advertisement.objects.all()
+        if request.user.is_authenticated:
+            advertisements = advertisements.exclude(author=request.user)
+        
+        category = request.query_params.get('category')
+        if category:
+            advertisements = advertisements.filter(category=category)
+        
+        # Порядок (-trending_score, -id) - обход индекса adv_trending_idx
+        return self.paginate_cached(advertisements, variant='feed')
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def search(self, request):
+        """Полнотекстовый поиск по заголовку и описанию (ранжирование BM25)"""
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 50))
+        except ValueError:
+            return Response({'error': 'Параметр limit должен быть числом'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        hits = search_index.search(query, limit=limit)
+        advertisements = {data['id']: data for data in self.get_cached_advertisements([hit['id'] for hit in hits])}
+        
+        results = []
+        for hit in hits:
+            if hit['id'] not in advertisements:
+                # Индекс может ненадолго отставать от таблицы
+                continue
+            data = dict(advertisements[hit['id']])
+            data['search'] = {
+                'rank': hit['rank'],
+                'title_highlight': hit['title_highlight'],
+                'snippet': hit['snippet'],
+            }
+            results.append(data)
+        
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class AdvertisementUploadViewSet(mixins.CreateModelMixin,
+                                 mixins.RetrieveModelMixin,
+                                 mixins.DestroyModelMixin,
+                                 viewsets.GenericViewSet):
+    """
+    Возобновляемая загрузка видео и аудио объявления по частям:
+    POST - начать, PUT с заголовком Content-Range - отправить часть,
+    GET - узнать смещение для продолжения, POST finalize - прикрепить файл
+    """
+    serializer_class = AdvertisementUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return AdvertisementUpload.objects.filter(user=self.request.user)
+    
+    def error_response(self, error):
+        return Response({'error': str(error)}, status=error.status)
+    
+    def create(self, request, *args, **kwargs):
+        """Начать загрузку"""
+        serializer = AdvertisementUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            upload = ChunkedUploadService.initiate(
+                user=request.user,
+                advertisement=serializer.advertisement,
+                field=serializer.validated_data['field'],
+                filename=serializer.validated_data['filename'],
+                size=serializer.validated_data['size'],
+            )
+        except UploadError as e:
+            return self.error_response(e)
+        
+        data = AdvertisementUploadSerializer(upload).data
+        data['chunk_size'] = ChunkedUploadService.get_chunk_size()
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    def update(self, request, *args, **kwargs):
+        """Принять часть файла (тело запроса - байты части)"""
+        upload = self.get_object()
+        
+        match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            return Response(
+                {'error': 'Укажите заголовок Content-Range: bytes <начало>-<конец>/<размер>'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end, total = (int(value) for value in match.groups())
+        if total != upload.size or end < start:
+            return Response({'error': 'Некорректный диапазон Content-Range'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        length = end - start + 1
+        if length > ChunkedUploadService.get_chunk_size():
+            return Response({'error': 'Часть превышает допустимый размер'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            ChunkedUploadService.write_chunk(upload, start, request.stream, length)
+        except UploadError as e:
+            response = self.error_response(e)
+            response.data['offset'] = upload.offset
+            return response
+        
+        return Response(AdvertisementUploadSerializer(upload).data)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Отменить загрузку"""
+        try:
+            ChunkedUploadService.abort(self.get_object())
+        except UploadError as e:
+            return self.error_response(e)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """
+        Завершить загрузку и прикрепить файл к объявлению.
+        Ответ ждет подсчета SHA-256 всего файла - для больших видео это
+        секунды, клиенту нужен соответствующий таймаут.
+        """
+        upload = self.get_object()
+        try:
+            ChunkedUploadService.finalize(upload)
+        except UploadError as e:
+            return self.error_response(e)
+        return Response(AdvertisementUploadSerializer(upload).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def sync_changes(request):
+    """
+    Объявления, отклики и удаления после ?since=<token> и новый токен.
+    reset=true - токен устарел или изменений слишком много, списки нужно загрузить заново.
+    """
+    changes = SyncService.get_changes(request.user, request.query_params.get('since'))
+    return Response({
+        'token': changes['token'],
+        'reset': changes['reset'],
+        'advertisements': AdvertisementSerializer(changes['advertisements'], many=True, fields=FEED_FIELDS).data,
+        'responses': ResponseSerializer(changes['responses'], many=True).data,
+        'deleted': changes['deleted'],
+    })
+
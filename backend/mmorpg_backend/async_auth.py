@@ -0,0 +1,47 @@
+"""
+Аутентификация для асинхронных (ASGI) представлений.
+
+Повторяет схемы DRF из REST_FRAMEWORK: заголовок Authorization: Token <key>,
+иначе пользователь сессии. Токен с пользователем берется из того же кеша,
+что и у CachedTokenAuthentication, а при промахе читается одним запросом
+через асинхронный ORM.
+"""
+from django.http import JsonResponse
+from rest_framework.authtoken.models import Token
+from users import authentication as token_cache
+
+TOKEN_KEYWORD = 'Token'
+
+
+class AsyncAuthenticationFailed(Exception):
+    """Передан недействительный токен"""
+
+
+async def aget_user(request):
+    """Пользователь запроса; AnonymousUser, если учетные данные не переданы"""
+    keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+    if keyword != TOKEN_KEYWORD:
+        return await request.auser()
+
+    key = key.strip()
+    if not key:
+        raise AsyncAuthenticationFailed('Недопустимый заголовок токена.')
+    token = await token_cache.aget(key)
+    if token is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise AsyncAuthenticationFailed('Недопустимый токен.')
+        await token_cache.astore(token)
+    if not token.user.is_active:
+        raise AsyncAuthenticationFailed('Пользователь неактивен или удален.')
+    return token.user
+
+
+def authentication_error(error):
+    return JsonResponse({'detail': str(error)}, status=401, headers={'WWW-Authenticate': TOKEN_KEYWORD})
+
+
+def not_authenticated():
+    return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=401,
+                        headers={'WWW-Authenticate': TOKEN_KEYWORD})
@@ -0,0 +1,45 @@
+"""
+Проверка тела массовых операций (объявления, отклики).
+
+Список проверяется целиком (непустой, не длиннее лимита), id - по
+элементам: ошибка каждого элемента возвращается по его индексу, пустой
+словарь - элемент корректен. Некорректный id (строка, список, объект)
+не роняет проверку, а попадает в ошибки своего элемента.
+"""
+
+
+def is_id(value):
+    """Целочисленный id; bool - подкласс int, но id не является"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def int_ids(ids):
+    """Корректные id из списка - для выборки объектов одним запросом"""
+    return [value for value in ids if is_id(value)]
+
+
+def check_items(items, max_items, noun):
+    """Ошибка всего списка или None; noun - название объектов в родительном падеже"""
+    if not isinstance(items, list) or not items:
+        return f"Ожидается непустой список {noun}"
+    if len(items) > max_items:
+        return f"Не более {max_items} {noun} за запрос"
+    return None
+
+
+def check_ids(ids, owned, invalid, duplicate, missing):
+    """Ошибки по элементам: не число, повтор, нет среди owned; invalid/duplicate/missing - тексты ошибок"""
+    errors = []
+    seen = set()
+    for value in ids:
+        if not is_id(value):
+            errors.append({'id': [invalid]})
+            continue
+        if value in seen:
+            errors.append({'id': [duplicate]})
+        elif value not in owned:
+            errors.append({'id': [missing]})
+        else:
+            errors.append({})
+        seen.add(value)
+    return errors
@@ -0,0 +1,158 @@
+"""
+Реестр скомпилированных шаблонов писем.
+
+Шаблон письма собирается один раз на процесс: CSS из <style> переносится
+в атрибуты style (почтовые клиенты часто игнорируют блок стилей), а
+текстовая версия строится из HTML-исходника заранее, а не вырезанием
+тегов из каждого готового письма. Отправка письма - только подстановка
+переменных в два скомпилированных шаблона.
+
+Правила, которые нельзя перенести в атрибут (:hover, вложенные
+селекторы), остаются в <style>. Текстовую версию можно задать отдельным
+файлом, если автоматическая не подходит (например, в шаблоне выводится HTML).
+"""
+import html
+import re
+import threading
+from django.template import engines
+from django.template.loader import get_template
+
+STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+RULE_RE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+SIMPLE_SELECTOR_RE = re.compile(r'^([a-z][a-z0-9]*)?(?:\.([\w-]+))?$', re.I)
+START_TAG_RE = re.compile(r'<([a-z][a-z0-9]*)(\s[^<>]*?)?(/?)>', re.I)
+CLASS_ATTR_RE = re.compile(r'\sclass="([^"]*)"', re.I)
+STYLE_ATTR_RE = re.compile(r'\sstyle="([^"]*)"', re.I)
+BODY_RE = re.compile(r'<body[^>]*>.*</body>', re.S | re.I)
+LINK_RE = re.compile(r'<a\s[^>]*?href="([^"]*)"[^>]*>(.*?)</a>', re.S | re.I)
+BLOCK_END_RE = re.compile(r'<br\s*/?>|</(p|div|h[1-6]|li|ul|ol|tr|table)>', re.I)
+LIST_ITEM_RE = re.compile(r'<li[^>]*>', re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+BLANK_LINES_RE = re.compile(r'\n\s*\n(\s*\n)+')
+
+
+def parse_css(css):
+    """
+    Делит правила на переносимые в атрибуты и остальные.
+    Возвращает ([(специфичность, порядок, тег, класс, объявления)], [оставшиеся правила])
+    """
+    inline, rest = [], []
+    for selectors, declarations in RULE_RE.findall(css):
+        declarations = '; '.join(
+            ' '.join(part.split()) for part in declarations.split(';') if part.strip()
+        )
+        for selector in selectors.split(','):
+            selector = selector.strip()
+            match = SIMPLE_SELECTOR_RE.match(selector)
+            if selector and match:
+                tag, css_class = match.groups()
+                specificity = (10 if css_class else 0) + (1 if tag else 0)
+                inline.append((specificity, len(inline), tag and tag.lower(), css_class, declarations))
+            else:
+                rest.append(f'{selector} {{ {declarations} }}')
+    inline.sort(key=lambda rule: rule[:2])
+    return inline, rest
+
+
+def inline_css(source):
+    """Переносит простые правила (тег, .класс, тег.класс) в атрибуты style тегов <body>"""
+    css = '\n'.join(STYLE_RE.findall(source))
+    if not css:
+        return source
+    rules, rest = parse_css(css)
+
+    def apply(match):
+        tag, attrs, closing = match.group(1), match.group(2) or '', match.group(3)
+        class_attr = CLASS_ATTR_RE.search(attrs)
+        classes = set(class_attr.group(1).split()) if class_attr else set()
+        declarations = [
+            rule[4] for rule in rules
+            if (rule[2] is None or rule[2] == tag.lower()) and (rule[3] is None or rule[3] in classes)
+        ]
+        style_attr = STYLE_ATTR_RE.search(attrs)
+        if style_attr:
+            # Собственный style тега важнее правил из <style>
+            declarations.append(style_attr.group(1).strip().rstrip(';'))
+            attrs = STYLE_ATTR_RE.sub('', attrs)
+        if declarations:
+            attrs += ' style="{}"'.format(html.escape('; '.join(declarations), quote=True))
+        return f'<{tag}{attrs}{closing}>'
+
+    body = BODY_RE.search(source)
+    if body:
+        source = source[:body.start()] + START_TAG_RE.sub(apply, body.group()) + source[body.end():]
+    style = '<style>\n{}\n</style>'.format('\n'.join(rest)) if rest else ''
+    # Первый блок заменяется оставшимися правилами, остальные удаляются
+    blocks = iter([style])
+    return STYLE_RE.sub(lambda match: next(blocks, ''), source)
+
+
+def html_to_text(source):
+    """Текстовая версия HTML-шаблона: ссылки с адресом, абзацы и пункты списков с новой строки"""
+    body = BODY_RE.search(source)
+    text = body.group() if body else source
+
+    def link(match):
+        url, label = match.group(1), TAG_RE.sub('', match.group(2)).strip()
+        return url if not label or label == url else f'{label}: {url}'
+
+    text = LINK_RE.sub(link, text)
+    text = LIST_ITEM_RE.sub('- ', text)
+    text = BLOCK_END_RE.sub('\n', text)
+    text = html.unescape(TAG_RE.sub('', text))
+    text = '\n'.join(' '.join(line.split()) for line in text.splitlines())
+    return BLANK_LINES_RE.sub('\n\n', text).strip() + '\n'
+
+
+class EmailTemplate:
+    """Письмо из HTML-шаблона и (необязательно) отдельного текстового"""
+
+    def __init__(self, html_template, text_template=None):
+        self.html_template = html_template
+        self.text_template = text_template
+        self.compiled = None
+        self.lock = threading.Lock()
+
+    def build(self):
+        engine = engines['django']
+        source = get_template(self.html_template).template.source
+        if self.text_template:
+            text_source = get_template(self.text_template).template.source
+        else:
+            text_source = html_to_text(source)
+        # В текстовой версии экранирование HTML не нужно
+        return (
+            engine.from_string(inline_css(source)),
+            engine.from_string(f'{{% autoescape off %}}{text_source}{{% endautoescape %}}'),
+        )
+
+    def get_compiled(self):
+        """(html, текст) - скомпилированные шаблоны; собираются при первом обращении"""
+        if self.compiled is None:
+            with self.lock:
+                if self.compiled is None:
+                    self.compiled = self.build()
+        return self.compiled
+
+    def render(self, context):
+        """Возвращает (текст, html) письма"""
+        html_template, text_template = self.get_compiled()
+        text = BLANK_LINES_RE.sub('\n\n', text_template.render(context))
+        return text.strip() + '\n', html_template.render(context)
+
+
+EMAIL_TEMPLATES = {
+    'verification': EmailTemplate('users/email/verification.html', 'users/email/verification.txt'),
+    'welcome': EmailTemplate('users/email/welcome.html', 'users/email/welcome.txt'),
+    'new_response': EmailTemplate('responses/email/new_response.html'),
+    'status_change': EmailTemplate('responses/email/status_change.html'),
+    'status_changes': EmailTemplate('responses/email/status_changes.html'),
+    'response_digest': EmailTemplate('responses/email/response_digest.html'),
+    # content выводится через |linebreaks - текстовой версии нужен исходный текст
+    'newsletter': EmailTemplate('newsletters/email/newsletter.html', 'newsletters/email/newsletter.txt'),
+}
+
+
+def render_email(name, context):
+    """Текст и HTML письма name из реестра"""
+    return EMAIL_TEMPLATES[name].render(context)
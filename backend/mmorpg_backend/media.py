@@ -0,0 +1,152 @@
+"""
+Отдача медиафайлов с поддержкой Range-запросов.
+
+Если перед приложением стоит прокси, файл отдает он сам по заголовку
+X-Accel-Redirect (nginx, MEDIA_X_ACCEL_REDIRECT_PREFIX) или X-Sendfile
+(Apache/lighttpd, MEDIA_X_SENDFILE). Иначе файл отдается через
+FileResponse: WSGI-сервер с wsgi.file_wrapper (gunicorn) передает его
+системным вызовом sendfile без копирования через Python.
+
+Файлы хранилища по содержимому (blobs/) никогда не меняются под своим
+именем, поэтому отдаются с Cache-Control: immutable на год.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from .storage import is_blob_name
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class RangeFileWrapper:
+    """
+    Файл, читаемый не дальше заданного числа байт от текущей позиции.
+
+    fileno() отдается как есть: sendfile в wsgi.file_wrapper начинает с
+    текущей позиции дескриптора и ограничивается Content-Length.
+    """
+
+    def __init__(self, filelike, length):
+        self.filelike = filelike
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.filelike.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.filelike.fileno()
+
+    def close(self):
+        self.filelike.close()
+
+
+def parse_range(header, size):
+    """
+    Разбирает одиночный диапазон Range в (начало, конец) включительно.
+
+    Возвращает None, если заголовок не распознан (отдается весь файл),
+    и False, если диапазон невыполним (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # bytes=-N: последние N байт
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, last_modified):
+    """If-Range совпадает с текущей версией файла (сильное сравнение)"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдать файл из MEDIA_ROOT с поддержкой условных и Range-запросов"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        if is_blob_name(path):
+            not_modified['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return not_modified
+
+    accel_prefix = getattr(settings, 'MEDIA_X_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix or getattr(settings, 'MEDIA_X_SENDFILE', False):
+        # Диапазоны и отдачу файла обрабатывает прокси
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        filelike = open(full_path, 'rb')
+        if byte_range:
+            start, end = byte_range
+            filelike.seek(start)
+            response = FileResponse(RangeFileWrapper(filelike, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = FileResponse(filelike, content_type=content_type)
+            response['Content-Length'] = size
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_blob_name(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,51 @@
+"""
+Проверка планов SQL-запросов для тестов.
+
+Запросы, выполненные внутри assertNoFullScans, повторно разбираются
+через EXPLAIN QUERY PLAN (SQLite). Строка плана вида "SCAN <таблица>"
+без индекса означает полный просмотр таблицы - тест падает, если
+какой-то из горячих фильтров перестал попадать в индекс.
+"""
+import re
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def explain(sql):
+    """Строки плана запроса (столбец detail EXPLAIN QUERY PLAN)"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(sql):
+    """Шаги плана, просматривающие таблицу целиком"""
+    return [detail for detail in explain(sql) if FULL_SCAN_RE.match(detail)]
+
+
+class QueryPlanAssertionsMixin:
+    """Утверждения о планах запросов для TestCase"""
+
+    def assertNoFullScans(self, func, *args, **kwargs):
+        """Выполняет func и проверяет, что ни один ее запрос не сканирует таблицу целиком"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Проверка планов запросов написана для SQLite')
+
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+
+        problems = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+                continue
+            scans = full_scans(sql)
+            if scans:
+                problems.append(f"{', '.join(scans)}: {sql}")
+
+        if problems:
+            self.fail('Полный просмотр таблицы:\n' + '\n'.join(problems))
+        return result
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     'users',
     'responses',
     'newsletters',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -93,6 +94,40 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Локальная память процесса; общий файловый уровень включается переменной окружения
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mmorpg-default',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+if os.environ.get('FILE_CACHE_DIR'):
+    CACHES['files'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['FILE_CACHE_DIR'],
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+
+# Время жизни закешированного сериализованного объявления (секунды)
+ADVERTISEMENT_CACHE_TIMEOUT = 300
+
+# Кеш аутентификации по токену: время жизни в общем кеше, в памяти процесса
+# (ограничивает задержку выхода для других процессов) и размер LRU процесса.
+# Без FILE_CACHE_DIR общего кеша нет, и снимок живет не дольше локального
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = 10
+AUTH_TOKEN_CACHE_MAX_ENTRIES = 10000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,6 +169,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Отдача медиафайлов через прокси: префикс internal-location nginx
+# для X-Accel-Redirect или X-Sendfile для Apache/lighttpd
+MEDIA_X_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_X_ACCEL_REDIRECT_PREFIX')
+MEDIA_X_SENDFILE = os.environ.get('MEDIA_X_SENDFILE') == '1'
+
+# Загрузка медиафайлов объявлений по частям
+UPLOAD_MAX_SIZE = 2 * 1024 ** 3  # 2 ГБ
+UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2  # 8 МБ
+
+# Уменьшенные копии изображений объявлений (генерируются в фоне)
+IMAGE_VARIANT_WIDTHS = [320, 640, 1280]
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANTS_ASYNC = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -152,7 +201,8 @@ AUTHENTICATION_BACKENDS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication с кешем токенов и пользователей (users/authentication.py)
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -164,6 +214,35 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Максимальное число объявлений в одном массовом запросе
+BULK_MAX_ITEMS = 100
+
+# Максимальное число откликов в одной массовой смене статуса
+BULK_RESPONSE_MAX_ITEMS = 100
+
+# Дельта-синхронизация (/api/sync/): перекрытие окна выборки, лимит
+# изменений до полной перезагрузки и срок хранения журнала удалений
+SYNC_OVERLAP_SECONDS = 5
+SYNC_MAX_ITEMS = 500
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Трендовый рейтинг объявлений: новое объявление и каждый отклик добавляют
+# очки с весом категории, раз в TRENDING_DECAY_INTERVAL_HOURS часов
+# (команда decay_trending_scores по cron) все рейтинги затухают с периодом
+# полураспада TRENDING_HALF_LIFE_HOURS
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_DECAY_INTERVAL_HOURS = 1
+TRENDING_NEW_ADVERTISEMENT_SCORE = 1.0
+TRENDING_RESPONSE_SCORE = 1.0
+TRENDING_CATEGORY_WEIGHTS = {
+    'Танки': 1.5,
+    'Хилы': 1.5,
+}
+
+# Архив: объявления без изменений дольше ARCHIVE_AFTER_DAYS дней вместе
+# с откликами переносятся в архивные таблицы (команда archive_advertisements)
+ARCHIVE_AFTER_DAYS = 365
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -224,3 +303,18 @@ SERVER_EMAIL = 'ahembitski@gmail.com'  # Должен совпадать с EMAI
 # Настройки для подтверждения email
 EMAIL_VERIFICATION_EXPIRE_HOURS = 24
 SITE_URL = os.environ.get('FRONTEND_URL', 'http://localhost:5173')  # URL фронтенда для ссылок в email
+
+# Outbox: письма отправляет команда send_outbox_emails. Неудачная попытка
+# повторяется через RETRY_BASE * 2^(n-1) секунд (не больше RETRY_MAX),
+# после MAX_ATTEMPTS попыток письмо помечается как недоставленное
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+# Сколько письмо остается за воркером, прежде чем его сможет взять другой
+EMAIL_OUTBOX_LEASE_SECONDS = 300
+
+# Сводка откликов (режим digest у автора объявления): отклики копятся
+# RESPONSE_DIGEST_WINDOW_MINUTES минут с первого и уходят одним письмом,
+# по каждому объявлению показываются последние RESPONSE_DIGEST_MAX_PER_ADVERTISEMENT
+RESPONSE_DIGEST_WINDOW_MINUTES = 60
+RESPONSE_DIGEST_MAX_PER_ADVERTISEMENT = 5
@@ -0,0 +1,84 @@
+"""
+Выборочные поля ответа: ?fields=id,title&expand=responses.
+
+Запрошенные поля одновременно ограничивают вывод сериализатора и
+столбцы, загружаемые из БД через .only(), поэтому ненужные столбцы
+(например, description) не читаются вовсе.
+"""
+from rest_framework import serializers
+
+
+def related_columns(prefix, serializer_class):
+    """Столбцы связанной модели, которые выводит вложенный сериализатор"""
+    model = serializer_class.Meta.model
+    names = {field.name for field in model._meta.concrete_fields}
+    return [f'{prefix}__{name}' for name in serializer_class.Meta.fields if name in names]
+
+
+class SparseFieldsSerializerMixin:
+    """Сериализатор с ограничением набора полей через аргумент fields"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """
+    ViewSet с поддержкой ?fields= и ?expand=.
+
+    sparse_field_columns - столбцы модели для поля сериализатора
+    (по умолчанию одноименный столбец), sparse_select_related и
+    sparse_prefetch_related - связи, которые нужно подгрузить для поля.
+    Поля из expandable_fields при заданном ?fields= выводятся только
+    если перечислены в ?expand=.
+    """
+    sparse_field_columns = {}
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+    sparse_required_columns = ['id']
+    expandable_fields = ()
+
+    def get_sparse_fields(self):
+        """Список запрошенных полей или None, если ?fields= не задан"""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        fields = None
+        param = self.request.query_params.get('fields')
+        if param:
+            available = [
+                name for name, field in self.get_serializer_class()().fields.items()
+                if not field.write_only
+            ]
+            fields = [name.strip() for name in param.split(',') if name.strip()]
+            expand = [name.strip() for name in self.request.query_params.get('expand', '').split(',') if name.strip()]
+
+            unknown = [name for name in fields if name not in available]
+            unknown += [name for name in expand if name not in self.expandable_fields]
+            if unknown:
+                raise serializers.ValidationError({'fields': f"Неизвестные поля: {', '.join(unknown)}"})
+
+            fields = [name for name in fields if name not in self.expandable_fields] + expand
+
+        self._sparse_fields = fields
+        return fields
+
+    def apply_sparse_fields(self, queryset, fields, extra_columns=()):
+        """
+        Ограничивает загружаемые столбцы и связи запрошенными полями.
+        extra_columns - столбцы, нужные помимо полей (например, для курсора пагинации)
+        """
+        queryset = queryset.select_related(None).prefetch_related(None)
+        columns = set(self.sparse_required_columns)
+        columns.update(extra_columns)
+        for name in fields:
+            columns.update(self.sparse_field_columns.get(name, [name]))
+            if name in self.sparse_select_related:
+                queryset = queryset.select_related(self.sparse_select_related[name])
+            if name in self.sparse_prefetch_related:
+                queryset = queryset.prefetch_related(self.sparse_prefetch_related[name]())
+        return queryset.only(*columns)
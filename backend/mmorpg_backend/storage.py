@@ -0,0 +1,92 @@
+"""
+Хранилище медиафайлов с адресацией по содержимому.
+
+Файл сохраняется под именем blobs/<ab>/<cd>/<sha256><расширение>, поэтому
+одинаковые загрузки (иконки классов, баннеры гильдий) занимают на диске
+одно место и получают один URL, который можно кешировать навсегда.
+Один файл может принадлежать нескольким объявлениям, поэтому delete()
+его не удаляет: ссылки считает сборщик мусора (команда gc_media_blobs),
+удаляющий файлы, на которые не ссылается ни одно поле модели.
+"""
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'blobs'
+
+
+def is_blob_name(name):
+    return name.replace('\\', '/').startswith(f'{BLOB_DIR}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, именующий файлы по SHA-256 содержимого"""
+
+    def blob_name(self, sha256, extension):
+        return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}'
+
+    def get_available_name(self, name, max_length=None):
+        # Итоговое имя определяется содержимым в _save
+        return name
+
+    def _save(self, name, content):
+        temp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as destination:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    destination.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        return self.ingest(temp_path, digest.hexdigest(), os.path.splitext(name)[1])
+
+    def ingest(self, path, sha256, extension):
+        """
+        Перенести готовый файл path в хранилище под именем по его SHA-256.
+        Если такой файл уже есть, path удаляется. Возвращает имя файла.
+        """
+        name = self.blob_name(sha256, extension)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            os.remove(path)
+            # Свежее время изменения защищает файл от сборщика мусора,
+            # пока ссылка на него еще не сохранена в БД
+            os.utime(full_path)
+            return name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Временный файл лежит в том же хранилище - перенос атомарный
+        os.replace(path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    def delete(self, name):
+        if is_blob_name(name):
+            # Файл может быть общим - удаляет только сборщик мусора
+            return
+        super().delete(name)
+
+    def iter_blobs(self):
+        """Имена и полные пути всех файлов хранилища, включая недописанные временные"""
+        for directory, _, files in os.walk(self.path(BLOB_DIR)):
+            for filename in files:
+                full_path = os.path.join(directory, filename)
+                yield os.path.relpath(full_path, self.location).replace(os.sep, '/'), full_path
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    """Хранилище медиафайлов объявлений (callable для storage= у полей)"""
+    return media_storage
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from .email_templates import EMAIL_TEMPLATES, inline_css, render_email
+
+
+class MediaRangeTests(TestCase):
+    """Отдача медиафайлов с поддержкой Range-запросов"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_X_ACCEL_REDIRECT_PREFIX=None, MEDIA_X_SENDFILE=False
+        )
+        self.settings_override.enable()
+        
+        self.content = bytes(range(256)) * 4
+        os.makedirs(os.path.join(self.media_root, 'advertisements', 'videos'))
+        self.path = os.path.join(self.media_root, 'advertisements', 'videos', 'raid.mp4')
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+        self.url = reverse('media', args=['advertisements/videos/raid.mp4'])
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+    
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+    
+    def test_full_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+    
+    def test_byte_ranges(self):
+        size = len(self.content)
+        cases = [
+            ('bytes=0-0', 0, 0),
+            ('bytes=100-299', 100, 299),
+            ('bytes=1000-', 1000, size - 1),
+            ('bytes=-24', size - 24, size - 1),
+            ('bytes=1000-99999', 1000, size - 1),
+            ('bytes=-99999', 0, size - 1),
+        ]
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response, body = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.content[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(int(response['Content-Length']), end - start + 1)
+    
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=1024-', 'bytes=5-4', 'bytes=-0'):
+            with self.subTest(header=header):
+                response, _ = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+    
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[:10])
+        
+        # Файл изменился - вместо части отдается весь файл
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        
+        response, _ = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_conditional_get(self):
+        etag = self.get()[0]['ETag']
+        response, _ = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_path_traversal(self):
+        response = self.client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_accel_redirect(self):
+        with override_settings(MEDIA_X_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/advertisements/videos/raid.mp4')
+        self.assertEqual(response.content, b'')
+
+
+class EmailTemplateTests(TestCase):
+    """Реестр скомпилированных шаблонов писем"""
+    
+    def test_inline_css(self):
+        source = (
+            '<html><head><style>p { color: red } .note { margin: 0 } '
+            '.btn:hover { color: blue }</style></head>'
+            '<body><p class="note" style="padding: 1px">Текст</p></body></html>'
+        )
+        result = inline_css(source)
+        self.assertIn('<p class="note" style="color: red; margin: 0; padding: 1px">', result)
+        # :hover нельзя перенести в атрибут - правило остается в <style>
+        self.assertIn('.btn:hover { color: blue }', result)
+        self.assertNotIn('margin: 0 }', result)
+    
+    def test_render(self):
+        text, html = render_email('new_response', {
+            'author_username': 'owner',
+            'advertisement_title': 'Рейд <ночью>',
+            'response_text': 'Беру & иду',
+            'respondent_username': 'player',
+            'site_url': 'http://example.com',
+        })
+        self.assertIn('style="', html)
+        self.assertNotIn('<style>\n.header', html)
+        self.assertIn('Рейд &lt;ночью&gt;', html)
+        # Текстовая версия без CSS и HTML-экранирования, ссылки - с адресом
+        self.assertIn('Рейд <ночью>', text)
+        self.assertIn('Беру & иду', text)
+        self.assertIn('Перейти к откликам: http://example.com/board', text)
+        self.assertNotIn('font-family', text)
+        self.assertNotIn('\n\n\n', text)
+    
+    def test_all_templates_build(self):
+        for name, template in EMAIL_TEMPLATES.items():
+            with self.subTest(name):
+                html_template, text_template = template.get_compiled()
+                self.assertNotIn('</', text_template.template.source)
@@ -15,9 +15,9 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,8 +25,7 @@ urlpatterns = [
     path('api/', include('advertisements.urls')),
     path('api/', include('responses.urls')),
     path('api/', include('newsletters.urls')),
+    path('api/', include('notifications.urls')),
+    # Медиафайлы с поддержкой Range; в продакшене отдачу берет на себя прокси
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
-
-# Добавляем поддержку медиа файлов для разработки
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
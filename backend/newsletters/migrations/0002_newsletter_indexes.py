@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletters', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsletter',
+            index=models.Index(fields=['status', 'scheduled_at'], name='newsletter_status_sched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletterrecipient',
+            index=models.Index(fields=['newsletter', 'status'], name='nl_recipient_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletterrecipient',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['newsletter'], name='nl_recipient_pending_idx'),
+        ),
+    ]
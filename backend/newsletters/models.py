@@ -79,6 +79,10 @@ class Newsletter(models.Model):
         verbose_name = 'Новостная рассылка'
         verbose_name_plural = 'Новостные рассылки'
         ordering = ['-created_at']
+        indexes = [
+            # Выборка запланированных черновиков планировщиком
+            models.Index(fields=['status', 'scheduled_at'], name='newsletter_status_sched_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
@@ -139,6 +143,12 @@ class NewsletterRecipient(models.Model):
         verbose_name = 'Получатель рассылки'
         verbose_name_plural = 'Получатели рассылок'
         unique_together = ['newsletter', 'user']
+        indexes = [
+            # Статистика и выборка получателей рассылки по статусу
+            models.Index(fields=['newsletter', 'status'], name='nl_recipient_status_idx'),
+            # Очередь отправки: после рассылки ожидающих почти не остается
+            models.Index(fields=['newsletter'], condition=models.Q(status='pending'), name='nl_recipient_pending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.newsletter.title}"
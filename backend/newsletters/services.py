@@ -1,10 +1,10 @@
 import logging
-from django.core.mail import send_mass_mail
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils import timezone
 from django.conf import settings
 from .models import Newsletter, NewsletterRecipient
 from users.models import User
+from mmorpg_backend.email_templates import render_email
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ class NewsletterService:
         
         try:
             # Получаем всех получателей со статусом 'pending'
-            recipients = newsletter.recipients.filter(status='pending')
+            recipients = newsletter.recipients.filter(status='pending').select_related('user')
             
             if not recipients.exists():
                 newsletter.status = 'sent'
@@ -64,22 +64,21 @@ class NewsletterService:
             email_data = []
             for recipient in recipients:
                 try:
-                    # Формируем HTML контент
-                    html_content = render_to_string(
-                        'newsletters/email/newsletter.html',
-                        {
-                            'user': recipient.user,
-                            'newsletter': newsletter,
-                            'unsubscribe_url': f"{settings.SITE_URL}/unsubscribe/{recipient.id}/"
-                        }
-                    )
+                    # Текст и HTML из скомпилированного шаблона
+                    text_content, html_content = render_email('newsletter', {
+                        'user': recipient.user,
+                        'newsletter': newsletter,
+                        'unsubscribe_url': f"{settings.SITE_URL}/unsubscribe/{recipient.id}/"
+                    })
                     
-                    email_data.append((
+                    message = EmailMultiAlternatives(
                         newsletter.subject,
-                        html_content,
+                        text_content,
                         settings.DEFAULT_FROM_EMAIL,
                         [recipient.user.email]
-                    ))
+                    )
+                    message.attach_alternative(html_content, 'text/html')
+                    email_data.append(message)
                     
                     # Обновляем статус получателя
                     recipient.status = 'sent'
@@ -92,9 +91,9 @@ class NewsletterService:
                     recipient.error_message = str(e)
                     recipient.save(update_fields=['status', 'error_message'])
             
-            # Отправляем письма
+            # Отправляем письма через одно соединение
             if email_data:
-                send_mass_mail(email_data, fail_silently=False)
+                get_connection(fail_silently=False).send_messages(email_data)
             
             # Обновляем статистику
             sent_count = newsletter.recipients.filter(status='sent').count()
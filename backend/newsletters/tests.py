@@ -1,3 +1,53 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from mmorpg_backend.query_plans import QueryPlanAssertionsMixin
+from users.models import User
+from .models import Newsletter, NewsletterRecipient
+from .services import NewsletterScheduler
 
-# Create your tests here.
+
+class NewsletterQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    """Выборки рассылок и получателей идут по индексам"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass12345', is_staff=True
+        )
+        users = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(5)
+        ]
+        self.newsletters = [
+            Newsletter.objects.create(title=f'Новости {i}', content='Текст', subject='Новости', created_by=self.admin)
+            for i in range(3)
+        ]
+        for newsletter in self.newsletters:
+            NewsletterRecipient.objects.bulk_create(
+                NewsletterRecipient(newsletter=newsletter, user=user) for user in users
+            )
+        self.client.force_authenticate(self.admin)
+    
+    def test_recipients_by_status(self):
+        response = self.assertNoFullScans(
+            self.client.get, reverse('newsletterrecipient-list'),
+            {'newsletter_id': self.newsletters[0].id, 'status': 'pending'}
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_newsletter_recipients(self):
+        response = self.assertNoFullScans(
+            self.client.get, reverse('newsletter-recipients', args=[self.newsletters[0].id])
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_pending_recipients_use_partial_index(self):
+        # Очередь неотправленных писем по всем рассылкам
+        plan = NewsletterRecipient.objects.filter(status='pending').values('newsletter_id').explain()
+        self.assertIn('nl_recipient_pending_idx', plan)
+    
+    def test_scheduled_newsletters(self):
+        queryset = Newsletter.objects.filter(status='draft', scheduled_at__lte=timezone.now() - timedelta(days=1))
+        self.assertNoFullScans(list, queryset)
+        self.assertNoFullScans(NewsletterScheduler.process_scheduled_newsletters)
@@ -176,8 +176,11 @@ class NewsletterRecipientViewSet(viewsets.ReadOnlyModelViewSet):
         """Фильтрация по рассылке"""
         queryset = super().get_queryset()
         newsletter_id = self.request.query_params.get('newsletter_id')
+        recipient_status = self.request.query_params.get('status')
         
         if newsletter_id:
             queryset = queryset.filter(newsletter_id=newsletter_id)
+        if recipient_status:
+            queryset = queryset.filter(status=recipient_status)
         
         return queryset
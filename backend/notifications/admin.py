@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import Notification, NotificationCounter
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Админка для уведомлений"""
+    list_display = ['user', 'kind', 'message', 'is_read', 'created_at']
+    list_filter = ['kind', 'is_read']
+    search_fields = ['user__username', 'message']
+    raw_id_fields = ['user']
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    """Админка для счетчиков непрочитанных уведомлений"""
+    list_display = ['user', 'unread_count']
+    raw_id_fields = ['user']
@@ -0,0 +1,66 @@
+from django.db import models
+from django.conf import settings
+
+
+class Notification(models.Model):
+    """
+    Уведомление во внутреннем почтовом ящике пользователя.
+
+    Объявление и отклик хранятся числовыми id, а не внешними ключами:
+    уведомление переживает удаление и архивацию отклика, а его запись не
+    требует проверки связей.
+    """
+    
+    KIND_CHOICES = [
+        ('new_response', 'Новый отклик'),
+        ('status_change', 'Изменение статуса отклика'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Тип')
+    advertisement_id = models.IntegerField(verbose_name='ID объявления')
+    response_id = models.IntegerField(verbose_name='ID отклика')
+    message = models.CharField(max_length=255, verbose_name='Текст')
+    is_read = models.BooleanField(default=False, verbose_name='Прочитано')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Ящик пользователя и курсорная пагинация (-created_at, -id)
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return self.message
+
+
+class NotificationCounter(models.Model):
+    """
+    Число непрочитанных уведомлений пользователя - одна строка на пользователя.
+    Меняется атомарно вместе с уведомлениями (NotificationService), поэтому
+    значок в шапке читается по первичному ключу без подсчета уведомлений.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name='Пользователь'
+    )
+    unread_count = models.IntegerField(default=0, verbose_name='Непрочитанных')
+    
+    class Meta:
+        verbose_name = 'Счетчик уведомлений'
+        verbose_name_plural = 'Счетчики уведомлений'
+    
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count}'
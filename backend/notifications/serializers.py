@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Сериализатор уведомления"""
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'advertisement_id', 'response_id', 'message', 'is_read', 'created_at']
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Отметка прочитанными: ids - список уведомлений, без ids - все"""
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
@@ -0,0 +1,90 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import Notification, NotificationCounter
+
+
+class NotificationService:
+    """
+    Внутренние уведомления об откликах.
+
+    Уведомления пишутся пачкой одним INSERT в транзакции события, счетчики
+    непрочитанных получателей меняются одним UPDATE. Счетчик уменьшается
+    ровно на число уведомлений, которые UPDATE отметил прочитанными,
+    поэтому повторная или одновременная отметка его не искажает.
+    """
+    
+    @staticmethod
+    def notify_many(notifications):
+        """Сохранить уведомления и увеличить счетчики получателей"""
+        if not notifications:
+            return []
+        notifications = Notification.objects.bulk_create(notifications)
+        counts = Counter(notification.user_id for notification in notifications)
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in counts], ignore_conflicts=True
+        )
+        NotificationService.adjust_counters(counts)
+        return notifications
+    
+    @staticmethod
+    def adjust_counters(deltas):
+        """Прибавить к счетчикам {user_id: delta} одним UPDATE"""
+        NotificationCounter.objects.filter(user_id__in=deltas).update(unread_count=F('unread_count') + Case(
+            *[When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+            output_field=IntegerField(),
+        ))
+    
+    @staticmethod
+    def build_new_response(response):
+        advertisement = response.advertisement
+        return Notification(
+            user_id=advertisement.author_id,
+            kind='new_response',
+            advertisement_id=advertisement.id,
+            response_id=response.id,
+            message=f'{response.author.username} откликнулся на объявление "{advertisement.title}"'[:255],
+        )
+    
+    @staticmethod
+    def build_status_change(response):
+        return Notification(
+            user_id=response.author_id,
+            kind='status_change',
+            advertisement_id=response.advertisement_id,
+            response_id=response.id,
+            message=(
+                f'Ваш отклик на объявление "{response.advertisement.title}" '
+                f'{response.get_status_display().lower()}'
+            )[:255],
+        )
+    
+    @staticmethod
+    def response_created(response):
+        return NotificationService.notify_many([NotificationService.build_new_response(response)])
+    
+    @staticmethod
+    def statuses_changed(changes):
+        """changes - список (отклик, старый статус), как у ResponseCounterService.statuses_changed"""
+        return NotificationService.notify_many([
+            NotificationService.build_status_change(response) for response, old_status in changes
+            if response.status != old_status
+        ])
+    
+    @staticmethod
+    def unread_count(user):
+        """Число непрочитанных - чтение одной строки по первичному ключу"""
+        count = NotificationCounter.objects.filter(user=user).values_list('unread_count', flat=True).first()
+        return count or 0
+    
+    @staticmethod
+    def mark_read(user, ids=None):
+        """Отметить прочитанными уведомления ids (все, если None). Возвращает число отмеченных"""
+        notifications = Notification.objects.filter(user=user, is_read=False)
+        if ids is not None:
+            notifications = notifications.filter(id__in=ids)
+        with transaction.atomic():
+            marked = notifications.update(is_read=True)
+            if marked:
+                NotificationService.adjust_counters({user.id: -marked})
+        return marked
@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from advertisements.models import Advertisement
+from users.models import User
+from .models import Notification, NotificationCounter
+
+
+class NotificationTests(APITestCase):
+    """Уведомления об откликах и счетчик непрочитанных"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=self.owner
+        )
+    
+    def respond(self, player):
+        self.client.force_authenticate(player)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Беру'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+    
+    def unread_count(self, user):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-unread-count'))
+        return response.data['unread_count']
+    
+    def test_response_events(self):
+        response_ids = [self.respond(player) for player in self.players]
+        self.assertEqual(self.unread_count(self.owner), 3)
+        
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            reverse('response-bulk-change-status'), {'ids': response_ids[:2], 'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(reverse('response-change-status', args=[response_ids[2]]), {'status': 'rejected'})
+        self.assertEqual(response.status_code, 200)
+        
+        self.assertEqual(self.unread_count(self.players[0]), 1)
+        self.assertEqual(self.unread_count(self.players[2]), 1)
+        self.client.force_authenticate(self.players[2])
+        response = self.client.get(reverse('notification-list'))
+        self.assertEqual(
+            [(item['kind'], item['message']) for item in response.data['results']],
+            [('status_change', 'Ваш отклик на объявление "Рейд" отклонен')]
+        )
+    
+    def test_inbox_pages(self):
+        Notification.objects.bulk_create(
+            Notification(user=self.owner, kind='new_response', advertisement_id=1, response_id=i, message=f'{i}')
+            for i in range(5)
+        )
+        self.client.force_authenticate(self.owner)
+        expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        ids = []
+        url = reverse('notification-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+        
+        self.client.force_authenticate(self.players[0])
+        self.assertEqual(self.client.get(reverse('notification-list')).data['results'], [])
+    
+    def test_mark_read(self):
+        for player in self.players:
+            self.respond(player)
+        first = Notification.objects.filter(user=self.owner).order_by('id').first()
+        other = Notification.objects.create(
+            user=self.players[0], kind='new_response', advertisement_id=1, response_id=1, message='Чужое'
+        )
+        
+        self.client.force_authenticate(self.owner)
+        url = reverse('notification-mark-read')
+        response = self.client.post(url, {'ids': [first.id, first.id, other.id]}, format='json')
+        self.assertEqual(response.data, {'marked': 1, 'unread_count': 2})
+        # Повторная отметка не уменьшает счетчик
+        self.assertEqual(self.client.post(url, {'ids': [first.id]}, format='json').data['marked'], 0)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.data, {'marked': 2, 'unread_count': 0})
+        self.assertEqual(NotificationCounter.objects.get(user=self.owner).unread_count, 0)
+        self.assertFalse(Notification.objects.filter(user=self.owner, is_read=False).exists())
+        self.assertFalse(Notification.objects.get(id=other.id).is_read)
+        self.assertFalse(any('COUNT' in query['sql'] for query in queries.captured_queries))
+    
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(reverse('notification-unread-count')).status_code, 403)
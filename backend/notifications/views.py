@@ -0,0 +1,31 @@
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import Notification
+from .pagination import NotificationCursorPagination
+from .serializers import MarkReadSerializer, NotificationSerializer
+from .services import NotificationService
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Ящик уведомлений текущего пользователя"""
+    
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Число непрочитанных для значка в шапке - из счетчика, без подсчета уведомлений"""
+        return Response({'unread_count': NotificationService.unread_count(request.user)})
+    
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """Отметить прочитанными уведомления из ids или все"""
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = NotificationService.mark_read(request.user, serializer.validated_data.get('ids'))
+        return Response({'marked': marked, 'unread_count': NotificationService.unread_count(request.user)})
@@ -0,0 +1,85 @@
+"""
+Асинхронные (ASGI) представления списков откликов.
+
+Отклики с автором и объявлением читаются одним JOIN через aiterator и
+сериализуются уже загруженными, без запросов из асинхронного кода.
+Формат ответа (страница по курсору и счетчики для фильтров) совпадает
+с синхронными my_responses и advertisement_responses.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from mmorpg_backend.async_auth import (
+    AsyncAuthenticationFailed, aget_user, authentication_error, not_authenticated,
+)
+from . import pagination
+from .models import Response
+from .serializers import ResponseSerializer
+from .services import ResponseFacetService
+
+
+async def serialize_responses(request, responses, base, advertisement_id=None, status_filter=None):
+    """Страница откликов по ?cursor=; на первой странице - счетчики по base"""
+    try:
+        position = pagination.get_position(request.GET)
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'detail': str(e)}, status=404)
+    page_size = pagination.get_page_size(request.GET)
+
+    page, = pagination.page_querysets([responses.select_related('author', 'advertisement')], position, page_size)
+    rows, cursor = pagination.merge_page([[response async for response in page.aiterator()]], page_size)
+    data = {
+        'next': pagination.next_link(request, cursor),
+        'previous': None,
+        'results': ResponseSerializer(rows, many=True).data,
+    }
+    if position is None:
+        facet_rows = [row async for row in ResponseFacetService.rows_query(base)]
+        data['facets'] = ResponseFacetService.fold([facet_rows], advertisement_id, status_filter)
+    return JsonResponse(data)
+
+
+async def get_authenticated_user(request):
+    """Пользователь запроса или ответ 401"""
+    try:
+        user = await aget_user(request)
+    except AsyncAuthenticationFailed as e:
+        return None, authentication_error(e)
+    if not user.is_authenticated:
+        return None, not_authenticated()
+    return user, None
+
+
+@require_safe
+async def my_responses(request):
+    """Отклики текущего пользователя"""
+    user, error = await get_authenticated_user(request)
+    if error:
+        return error
+    responses = Response.objects.filter(author=user)
+    return await serialize_responses(request, responses, responses)
+
+
+@require_safe
+async def advertisement_responses(request):
+    """Отклики на объявления текущего пользователя (?advertisement_id=, ?status=)"""
+    user, error = await get_authenticated_user(request)
+    if error:
+        return error
+
+    base = Response.objects.filter(advertisement__author=user)
+    responses = base
+    advertisement_id = request.GET.get('advertisement_id')
+    status_filter = request.GET.get('status')
+    if advertisement_id and advertisement_id != 'all':
+        try:
+            advertisement_id = int(advertisement_id)
+        except ValueError:
+            return JsonResponse({'advertisement_id': ['Неверный идентификатор объявления.']}, status=400)
+        responses = responses.filter(advertisement_id=advertisement_id)
+    else:
+        advertisement_id = None
+    if status_filter and status_filter != 'all':
+        responses = responses.filter(status=status_filter)
+    else:
+        status_filter = None
+    return await serialize_responses(request, responses, base, advertisement_id, status_filter)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from responses.services import ResponseDigestService
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в outbox сводки новых откликов для авторов в режиме digest, '
+        'у которых первый отклик ждет дольше RESPONSE_DIGEST_WINDOW_MINUTES. '
+        'Запускается по cron раз в несколько минут.'
+    )
+    
+    def handle(self, *args, **options):
+        digests, responses = ResponseDigestService.send_due()
+        self.stdout.write(self.style.SUCCESS(f'Сводок: {digests}, откликов в них: {responses}'))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0006_advertisement_indexes'),
+        ('responses', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['advertisement', 'status'], name='resp_adv_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(condition=models.Q(('status', 'new')), fields=['advertisement'], name='resp_adv_new_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('responses', '0005_archivedresponse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseDigestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='responses.response', verbose_name='Отклик')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_digest_entries', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Отклик в сводке',
+                'verbose_name_plural': 'Отклики в сводке',
+                'indexes': [models.Index(fields=['user', 'created_at'], name='digest_user_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisements', '0011_archivedadvertisement'),
+        ('responses', '0006_responsedigestentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='resp_author_created_idx'),
+        ),
+    ]
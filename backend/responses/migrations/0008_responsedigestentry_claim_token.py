@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('responses', '0007_response_author_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responsedigestentry',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name='Метка отправки'),
+        ),
+    ]
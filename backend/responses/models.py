@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from advertisements.models import Advertisement
+from advertisements.models import Advertisement, ArchivedAdvertisement
 
 class Response(models.Model):
     """Модель отклика на объявление"""
@@ -38,6 +38,73 @@ class Response(models.Model):
         verbose_name_plural = 'Отклики'
         ordering = ['-created_at']
         unique_together = ['advertisement', 'author']  # Один отклик от одного пользователя на одно объявление
+        indexes = [
+            # Отклики на объявления автора с фильтром по статусу
+            models.Index(fields=['advertisement', 'status'], name='resp_adv_status_idx'),
+            # Необработанные отклики - малая доля таблицы, частичный индекс
+            models.Index(fields=['advertisement'], condition=models.Q(status='new'), name='resp_adv_new_idx'),
+            # Выборка изменений для /api/sync/
+            models.Index(fields=['updated_at'], name='resp_updated_idx'),
+            # Мои отклики постранично - просмотр индекса в порядке курсора
+            models.Index(fields=['author', '-created_at', '-id'], name='resp_author_created_idx'),
+        ]
     
     def __str__(self):
         return f'Отклик от {self.author.username} на "{self.advertisement.title}"'
+
+
+class ArchivedResponse(models.Model):
+    """Архивный отклик - переносится вместе со своим объявлением (ArchiveService)"""
+    
+    id = models.IntegerField(primary_key=True)
+    advertisement = models.ForeignKey(
+        ArchivedAdvertisement,
+        on_delete=models.CASCADE,
+        related_name='responses',
+        verbose_name='Объявление'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_responses',
+        verbose_name='Автор отклика'
+    )
+    text = models.TextField(verbose_name='Текст отклика')
+    status = models.CharField(max_length=10, choices=Response.STATUS_CHOICES, verbose_name='Статус')
+    created_at = models.DateTimeField(verbose_name='Дата создания')
+    updated_at = models.DateTimeField(verbose_name='Дата обновления')
+    
+    class Meta:
+        verbose_name = 'Архивный отклик'
+        verbose_name_plural = 'Архивные отклики'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f'Архивный отклик {self.id}'
+
+
+class ResponseDigestEntry(models.Model):
+    """Отклик, ожидающий отправки автору объявления в сводке (ResponseDigestService)"""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='response_digest_entries',
+        verbose_name='Получатель'
+    )
+    # Удаленный отклик выпадает из сводки
+    response = models.ForeignKey(Response, on_delete=models.CASCADE, related_name='+', verbose_name='Отклик')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    # Метка запуска send_response_digests, забравшего отклик в письмо
+    claim_token = models.UUIDField(null=True, blank=True, editable=False, verbose_name='Метка отправки')
+    
+    class Meta:
+        verbose_name = 'Отклик в сводке'
+        verbose_name_plural = 'Отклики в сводке'
+        indexes = [
+            # Срок сводки - по самому старому отклику получателя
+            models.Index(fields=['user', 'created_at'], name='digest_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f'Отклик {self.response_id} для пользователя {self.user_id}'
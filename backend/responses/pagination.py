@@ -0,0 +1,69 @@
+"""
+Keyset-пагинация списков откликов по (-created_at, -id).
+
+Курсор - позиция последнего отклика страницы (тот же формат, что у
+асинхронной ленты объявлений). Страница может собираться из нескольких
+таблиц (действующие и архивные отклики): из каждой читается не больше
+page_size + 1 строк после позиции, и выборки сливаются в общем порядке,
+поэтому глубина листания не влияет на стоимость запроса.
+"""
+import heapq
+from itertools import islice
+from advertisements.pagination import decode_keyset_cursor, encode_keyset_cursor, keyset_page_filter
+
+ORDERING = ('-created_at', '-id')
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+PAGE_SIZE_QUERY_PARAM = 'page_size'
+
+
+class InvalidCursor(Exception):
+    """Курсор поврежден"""
+
+
+def get_page_size(query_params):
+    try:
+        page_size = int(query_params[PAGE_SIZE_QUERY_PARAM])
+    except (KeyError, ValueError):
+        return PAGE_SIZE
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def get_position(query_params):
+    """Позиция из ?cursor= или None для первой страницы"""
+    cursor = query_params.get('cursor')
+    if not cursor:
+        return None
+    position = decode_keyset_cursor(cursor)
+    if position is None:
+        raise InvalidCursor('Неверный курсор.')
+    return position
+
+
+def page_querysets(querysets, position, page_size):
+    """Срезы querysets для страницы после position (лишняя строка - признак следующей страницы)"""
+    pages = []
+    for queryset in querysets:
+        if position is not None:
+            queryset = keyset_page_filter(queryset, position)
+        pages.append(queryset.order_by(*ORDERING)[:page_size + 1])
+    return pages
+
+
+def merge_page(row_lists, page_size):
+    """Сливает упорядоченные выборки в страницу; возвращает (строки, курсор следующей страницы)"""
+    merged = heapq.merge(*row_lists, key=lambda row: (row.created_at, row.id), reverse=True)
+    rows = list(islice(merged, page_size + 1))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_keyset_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def next_link(request, cursor):
+    """Абсолютная ссылка на следующую страницу с теми же параметрами запроса"""
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import Response
+from .models import ArchivedResponse, Response
 from users.serializers import UserSerializer
-from advertisements.models import Advertisement
+from advertisements.models import Advertisement, ArchivedAdvertisement
+from mmorpg_backend.sparse_fields import SparseFieldsSerializerMixin
 
 class AdvertisementSerializer(serializers.ModelSerializer):
     """Простой сериализатор для объявления в откликах"""
@@ -9,7 +10,7 @@ class AdvertisementSerializer(serializers.ModelSerializer):
         model = Advertisement
         fields = ['id', 'title', 'category']
 
-class ResponseSerializer(serializers.ModelSerializer):
+class ResponseSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отклика"""
     author = UserSerializer(read_only=True)
     advertisement = AdvertisementSerializer(read_only=True)
@@ -21,25 +22,28 @@ class ResponseSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'author', 'status', 'created_at', 'updated_at']
     
     def create(self, validated_data):
-        # Устанавливаем автора из request.user
+        # Автор - текущий пользователь; объявление проверяет и передает
+        # ResponseViewSet.perform_create, повтор отсекает unique_together
         validated_data['author'] = self.context['request'].user
-        
-        # Проверяем, что пользователь не является автором объявления
-        advertisement_id = validated_data.get('advertisement_id')
-        user = self.context['request'].user
-        
-        from advertisements.models import Advertisement
-        try:
-            advertisement = Advertisement.objects.get(id=advertisement_id)
-            if advertisement.author == user:
-                raise serializers.ValidationError(
-                    "Вы не можете оставить отклик на свое собственное объявление."
-                )
-        except Advertisement.DoesNotExist:
-            raise serializers.ValidationError("Объявление не найдено.")
-        
         return super().create(validated_data)
 
+class ArchivedAdvertisementSummarySerializer(serializers.ModelSerializer):
+    """Архивное объявление в архивных откликах"""
+    class Meta:
+        model = ArchivedAdvertisement
+        fields = ['id', 'title', 'category']
+
+class ArchivedResponseSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """Архивный отклик (только чтение); формат совпадает с ResponseSerializer"""
+    author = UserSerializer(read_only=True)
+    advertisement = ArchivedAdvertisementSummarySerializer(read_only=True)
+    archived = serializers.BooleanField(default=True, read_only=True)
+    
+    class Meta:
+        model = ArchivedResponse
+        fields = ['id', 'advertisement', 'author', 'text', 'status', 'created_at', 'updated_at', 'archived']
+        read_only_fields = fields
+
 class ResponseStatusSerializer(serializers.ModelSerializer):
     """Сериализатор для изменения статуса отклика"""
     
@@ -0,0 +1,227 @@
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.text import Truncator
+from advertisements import cache as advertisement_cache
+from advertisements.services import ResponseCounterService
+from mmorpg_backend import bulk
+from mmorpg_backend.email_templates import render_email
+from notifications.services import NotificationService
+from users.services import EmailService
+from .models import Response, ResponseDigestEntry
+
+
+class ResponseFacetService:
+    """
+    Счетчики для фильтров списка откликов: по статусам и по объявлениям.
+
+    Оба набора считаются из одного GROUP BY (объявление, статус): счетчики
+    статусов учитывают выбранное объявление, счетчики объявлений -
+    выбранный статус, как в боковой панели фильтров.
+    """
+    
+    @staticmethod
+    def rows_query(queryset):
+        return queryset.order_by().values('advertisement_id', 'advertisement__title', 'status').annotate(count=Count('id'))
+    
+    @staticmethod
+    def fold(row_lists, advertisement_id=None, status=None):
+        statuses = {value: 0 for value, _ in Response.STATUS_CHOICES}
+        advertisements = {}
+        for rows in row_lists:
+            for row in rows:
+                if advertisement_id is None or row['advertisement_id'] == advertisement_id:
+                    statuses[row['status']] += row['count']
+                facet = advertisements.setdefault(row['advertisement_id'], {
+                    'id': row['advertisement_id'], 'title': row['advertisement__title'], 'count': 0,
+                })
+                if status is None or row['status'] == status:
+                    facet['count'] += row['count']
+        return {
+            'total': sum(statuses.values()),
+            'status': statuses,
+            'advertisements': sorted(advertisements.values(), key=lambda facet: (-facet['count'], facet['id'])),
+        }
+    
+    @staticmethod
+    def facets(querysets, advertisement_id=None, status=None):
+        """Счетчики по querysets без фильтров по объявлению и статусу - один запрос на таблицу"""
+        return ResponseFacetService.fold(
+            [list(ResponseFacetService.rows_query(queryset)) for queryset in querysets], advertisement_id, status
+        )
+
+
+class ResponseDigestService:
+    """
+    Сводка новых откликов для авторов в режиме digest.
+
+    Отклик не порождает письмо, а добавляется в ResponseDigestEntry в
+    транзакции отклика. Команда send_response_digests раз в несколько минут
+    находит получателей, чей самый старый отклик ждет дольше окна, и ставит
+    в outbox одно письмо со всеми накопленными откликами: автор популярного
+    объявления получает не больше одного письма за окно.
+    """
+    
+    @staticmethod
+    def get_window():
+        return timedelta(minutes=getattr(settings, 'RESPONSE_DIGEST_WINDOW_MINUTES', 60))
+    
+    @staticmethod
+    def get_max_per_advertisement():
+        return getattr(settings, 'RESPONSE_DIGEST_MAX_PER_ADVERTISEMENT', 5)
+    
+    @staticmethod
+    def add(response, user):
+        """Добавить отклик в сводку пользователя user"""
+        return ResponseDigestEntry.objects.create(user=user, response=response)
+    
+    @staticmethod
+    def due_user_ids(now=None):
+        """Получатели, у которых самый старый отклик в сводке старше окна (один GROUP BY)"""
+        cutoff = (now or timezone.now()) - ResponseDigestService.get_window()
+        return list(
+            ResponseDigestEntry.objects.order_by().values('user_id').annotate(first=Min('created_at'))
+            .filter(first__lte=cutoff).values_list('user_id', flat=True)
+        )
+    
+    @staticmethod
+    def build_groups(entries):
+        """Отклики по объявлениям: последние отклики каждого и число остальных"""
+        groups = {}
+        for entry in entries:
+            response = entry.response
+            group = groups.setdefault(response.advertisement_id, {
+                'title': response.advertisement.title, 'count': 0, 'responses': [],
+            })
+            group['count'] += 1
+            group['responses'].append({'text': response.text, 'respondent_username': response.author.username})
+        
+        limit = ResponseDigestService.get_max_per_advertisement()
+        for group in groups.values():
+            group['more'] = max(group['count'] - limit, 0)
+            # Обрезаем текст один раз - он выводится и в HTML, и в текстовой версии
+            group['responses'] = [
+                dict(item, text=Truncator(item['text']).chars(200)) for item in group['responses'][-limit:][::-1]
+            ]
+        return sorted(groups.values(), key=lambda group: -group['count'])
+    
+    @staticmethod
+    def send_digest(user_id):
+        """Поставить в outbox сводку пользователя и очистить ее. Возвращает число откликов"""
+        token = uuid.uuid4()
+        with transaction.atomic():
+            # Отклики забираются условным UPDATE до чтения: параллельный запуск
+            # ждет фиксации этой транзакции и не находит уже взятых откликов
+            claimed = ResponseDigestEntry.objects.filter(user_id=user_id, claim_token__isnull=True).update(claim_token=token)
+            if not claimed:
+                return 0
+            entries = list(
+                ResponseDigestEntry.objects.filter(claim_token=token)
+                .select_related('user', 'response__author', 'response__advertisement')
+                .order_by('created_at', 'id')
+            )
+            
+            user = entries[0].user
+            plain_message, html_message = render_email('response_digest', {
+                'author_username': user.username,
+                'total': len(entries),
+                'groups': ResponseDigestService.build_groups(entries),
+                'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001'),
+            })
+            EmailService.enqueue(
+                recipient=user.email,
+                subject=f'Новые отклики на ваши объявления: {len(entries)}',
+                body=plain_message,
+                html_body=html_message,
+            )
+            # Удаляем только вошедшие в письмо: отклики, пришедшие во время сборки, уйдут в следующей сводке
+            ResponseDigestEntry.objects.filter(claim_token=token).delete()
+        return len(entries)
+    
+    @staticmethod
+    def send_due():
+        """Отправить все сводки, срок которых наступил. Возвращает (писем, откликов)"""
+        digests = responses = 0
+        for user_id in ResponseDigestService.due_user_ids():
+            sent = ResponseDigestService.send_digest(user_id)
+            if sent:
+                digests += 1
+                responses += sent
+        return digests, responses
+
+
+class BulkResponseStatusService:
+    """
+    Массовая смена статуса откликов автором объявлений.
+
+    Права проверяются одним запросом на весь набор (он же загружает
+    авторов откликов и объявления для писем), статус меняется одним
+    UPDATE ... WHERE id IN, письма (одно на автора откликов) ставятся в
+    outbox одним INSERT.
+    Как и массовые операции с объявлениями - все или ничего.
+    """
+    
+    @staticmethod
+    def get_max_items():
+        return getattr(settings, 'BULK_RESPONSE_MAX_ITEMS', 100)
+    
+    @staticmethod
+    def check_items(ids):
+        return bulk.check_items(ids, BulkResponseStatusService.get_max_items(), 'откликов')
+    
+    @staticmethod
+    def get_owned(user, ids):
+        """Отклики на объявления пользователя из набора ids одним запросом"""
+        return Response.objects.filter(id__in=ids, advertisement__author=user).select_related(
+            'author', 'advertisement'
+        ).in_bulk()
+    
+    @staticmethod
+    def check_ids(ids, owned):
+        """Ошибки по элементам: не число, повтор, чужой или несуществующий отклик"""
+        return bulk.check_ids(
+            ids, owned,
+            invalid="Укажите числовой id отклика.",
+            duplicate="Отклик указан несколько раз.",
+            missing="Отклик не найден среди откликов на ваши объявления.",
+        )
+    
+    @staticmethod
+    def group_by_respondent(changes):
+        """Изменения (отклик, старый статус) по авторам откликов в порядке первого появления"""
+        groups = {}
+        for response, old_status in changes:
+            groups.setdefault(response.author_id, []).append((response, old_status))
+        return list(groups.values())
+    
+    @staticmethod
+    def change_status(owned, status, build_notification):
+        """
+        Установить status откликам owned. build_notification(changes) возвращает
+        аргументы одного письма автору откликов changes - каждый автор получает
+        одно письмо на весь вызов. Возвращает список (отклик, старый статус)
+        для откликов, статус которых изменился
+        """
+        changes = [(response, response.status) for response in owned.values() if response.status != status]
+        if not changes:
+            return []
+        
+        now = timezone.now()
+        for response, _ in changes:
+            response.status = status
+            response.updated_at = now
+        
+        with transaction.atomic():
+            # update() не вызывает auto_now и сигналы - дату и кеш обновляем сами
+            Response.objects.filter(id__in=[response.id for response, _ in changes]).update(status=status, updated_at=now)
+            ResponseCounterService.statuses_changed(changes)
+            EmailService.enqueue_many([
+                build_notification(respondent_changes)
+                for respondent_changes in BulkResponseStatusService.group_by_respondent(changes)
+            ])
+            NotificationService.statuses_changed(changes)
+            advertisement_cache.invalidate_on_commit(*{response.advertisement_id for response, _ in changes})
+        return changes
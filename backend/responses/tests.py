@@ -1,3 +1,511 @@
-from django.test import TestCase
+import io
+import uuid
+from datetime import timedelta
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from mmorpg_backend.query_plans import QueryPlanAssertionsMixin
+from users.models import OutboxEmail, User
+from advertisements.models import Advertisement
+from advertisements.services import ResponseCounterService
+from .models import Response, ResponseDigestEntry
+from .services import ResponseDigestService
+
+
+class ResponseQueryBudgetTests(APITestCase):
+    """Число SQL-запросов на чтение откликов не зависит от их количества"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.respondent = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+    
+    def create_responses(self, count):
+        for i in range(count):
+            advertisement = Advertisement.objects.create(
+                title=f'Объявление {i}', description='Описание', category='Хилы', author=self.owner
+            )
+            Response.objects.create(advertisement=advertisement, author=self.respondent, text='Отклик')
+    
+    def assert_constant_queries(self, user, url, num_queries):
+        self.client.force_authenticate(user)
+        for count in (1, 5):
+            self.create_responses(count)
+            with self.assertNumQueries(num_queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+    
+    def test_my_responses(self):
+        # валидаторы условного GET + счетчики для фильтров + страница откликов с авторами и объявлениями
+        self.assert_constant_queries(self.respondent, reverse('response-my-responses'), 3)
+    
+    def test_advertisement_responses(self):
+        self.assert_constant_queries(self.owner, reverse('response-advertisement-responses'), 2)
+
+
+class MyResponsesConditionalGetTests(APITestCase):
+    """Условный GET для списка откликов пользователя"""
+    
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.respondent = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.advertisement = Advertisement.objects.create(
+            title='Рейд', description='Описание', category='ДД', author=owner
+        )
+        self.response = Response.objects.create(advertisement=self.advertisement, author=self.respondent, text='Отклик')
+        self.client.force_authenticate(self.respondent)
+        self.url = reverse('response-my-responses')
+    
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_delete_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.response.delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_advertisement_change_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.advertisement.title = 'Новый рейд'
+        self.advertisement.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ResponseSparseFieldsTests(APITestCase):
+    """Выборочные поля списков откликов"""
+    
+    def test_my_responses_fields(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        respondent = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        advertisement = Advertisement.objects.create(title='Рейд', description='Описание', category='ДД', author=owner)
+        Response.objects.create(advertisement=advertisement, author=respondent, text='Длинный текст отклика')
+        self.client.force_authenticate(respondent)
+        
+        response = self.client.get(reverse('response-my-responses'), {'fields': 'id,status,advertisement'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status', 'advertisement'})
+        self.assertEqual(response.data['results'][0]['advertisement']['title'], 'Рейд')
+
+
+class ResponseQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    """Списки откликов и смена статуса идут по индексам"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.respondents = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.advertisements = [
+            Advertisement.objects.create(title=f'Рейд {i}', description='Описание', category='ДД', author=self.owner)
+            for i in range(3)
+        ]
+        for advertisement in self.advertisements:
+            for respondent in self.respondents:
+                Response.objects.create(advertisement=advertisement, author=respondent, text='Отклик')
+    
+    def get(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        response = self.assertNoFullScans(self.client.get, url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+    
+    def test_advertisement_responses(self):
+        url = reverse('response-advertisement-responses')
+        self.get(self.owner, url)
+        response = self.get(self.owner, url, {'status': 'new'})
+        self.assertEqual(len(response.data['results']), 9)
+        self.get(self.owner, url, {'status': 'accepted', 'advertisement_id': self.advertisements[0].id})
+    
+    def test_my_responses(self):
+        self.get(self.respondents[0], reverse('response-my-responses'))
+    
+    def test_change_status(self):
+        self.client.force_authenticate(self.owner)
+        response = Response.objects.filter(advertisement=self.advertisements[0]).first()
+        result = self.assertNoFullScans(
+            self.client.patch, reverse('response-change-status', args=[response.id]), {'status': 'accepted'}
+        )
+        self.assertEqual(result.status_code, 200)
+    
+    def test_new_responses_use_partial_index(self):
+        queryset = Response.objects.filter(status='new', advertisement__author=self.owner)
+        self.assertNoFullScans(list, queryset)
+        self.assertIn('resp_adv_new_idx', Response.objects.filter(status='new').values('advertisement_id').explain())
+
+
+class ResponseCounterTests(APITestCase):
+    """Счетчики откликов объявления меняются вместе с откликами"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(2)
+        ]
+        self.advertisement = Advertisement.objects.create(title='Рейд', description='Описание', category='ДД', author=self.owner)
+    
+    def assert_counters(self, total, new, accepted, rejected):
+        self.advertisement.refresh_from_db()
+        self.assertEqual(
+            (self.advertisement.response_count, self.advertisement.new_response_count,
+             self.advertisement.accepted_response_count, self.advertisement.rejected_response_count),
+            (total, new, accepted, rejected)
+        )
+    
+    def create_response(self, player):
+        self.client.force_authenticate(player)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Беру'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+    
+    def test_counters_follow_responses(self):
+        first = self.create_response(self.players[0])
+        second = self.create_response(self.players[1])
+        self.assert_counters(2, 2, 0, 0)
+        
+        self.client.force_authenticate(self.owner)
+        self.client.patch(reverse('response-change-status', args=[first]), {'status': 'accepted'})
+        self.client.patch(reverse('response-change-status', args=[second]), {'status': 'rejected'})
+        self.assert_counters(2, 0, 1, 1)
+        
+        # Повторная установка того же статуса счетчики не меняет
+        self.client.patch(reverse('response-change-status', args=[second]), {'status': 'rejected'})
+        self.assert_counters(2, 0, 1, 1)
+        
+        self.assertEqual(self.client.delete(reverse('response-detail', args=[first])).status_code, 204)
+        self.assert_counters(1, 0, 0, 1)
+    
+    def test_create_query_budget(self):
+        self.client.force_authenticate(self.players[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Беру'})
+        self.assertEqual(response.status_code, 201)
+        # Объявление с автором, INSERT отклика, UPDATE счетчиков, INSERT письма в outbox,
+        # INSERT уведомления и счетчика непрочитанных (если его нет), UPDATE счетчика
+        statements = [query['sql'].split()[0] for query in queries.captured_queries
+                      if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'UPDATE', 'INSERT', 'INSERT', 'INSERT', 'UPDATE'])
+        self.assertEqual(response.data['advertisement']['title'], 'Рейд')
+    
+    def test_rejects_own_and_missing_advertisement(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Беру'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id + 100, 'text': 'Беру'})
+        self.assertEqual(response.data, ["Объявление не найдено."])
+        self.assert_counters(0, 0, 0, 0)
+    
+    def test_duplicate_response_keeps_counters(self):
+        self.create_response(self.players[0])
+        response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Еще раз'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Вы уже оставляли отклик на это объявление. Ваш предыдущий отклик: 'Беру...'", response.data[0])
+        self.assert_counters(1, 1, 0, 0)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+
+class ResponseNotificationOutboxTests(APITestCase):
+    """Уведомления об откликах ставятся в outbox в транзакции отклика, а не отправляются в запросе"""
+    
+    def test_notifications_are_queued(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        player = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        advertisement = Advertisement.objects.create(title='Рейд', description='Описание', category='ДД', author=owner)
+        
+        self.client.force_authenticate(player)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': advertisement.id, 'text': 'Беру'})
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(owner)
+        self.client.patch(reverse('response-change-status', args=[response.data['id']]), {'status': 'accepted'})
+        
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            list(OutboxEmail.objects.order_by('id').values_list('recipient', flat=True)),
+            ['owner@example.com', 'player@example.com']
+        )
+        
+        call_command('send_outbox_emails', stdout=io.StringIO())
+        self.assertEqual([message.to for message in mail.outbox], [['owner@example.com'], ['player@example.com']])
+
+
+class BulkStatusChangeTests(APITestCase):
+    """Массовая смена статуса: одна проверка прав, один UPDATE, письма одним INSERT"""
+    
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(4)
+        ]
+        self.advertisement = Advertisement.objects.create(title='Рейд', description='Описание', category='ДД', author=self.owner)
+        self.responses = []
+        for player in self.players:
+            self.client.force_authenticate(player)
+            response = self.client.post(reverse('response-list'), {'advertisement_id': self.advertisement.id, 'text': 'Беру'})
+            self.responses.append(response.data['id'])
+        OutboxEmail.objects.all().delete()
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('response-bulk-change-status')
+    
+    def test_bulk_accept(self):
+        Response.objects.filter(id=self.responses[3]).update(status='accepted')
+        ResponseCounterService.reconcile()
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ids': self.responses, 'status': 'accepted'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 3)
+        statements = [query['sql'].split()[0] for query in queries.captured_queries
+                      if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+        # Отклики с проверкой прав, UPDATE откликов, UPDATE счетчиков, INSERT писем,
+        # INSERT уведомлений и счетчиков непрочитанных, UPDATE счетчиков
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'UPDATE', 'INSERT', 'INSERT', 'INSERT', 'UPDATE'])
+        
+        self.assertEqual(set(Response.objects.values_list('status', flat=True)), {'accepted'})
+        self.advertisement.refresh_from_db()
+        self.assertEqual((self.advertisement.new_response_count, self.advertisement.accepted_response_count), (0, 4))
+        self.assertEqual(
+            sorted(OutboxEmail.objects.values_list('recipient', flat=True)),
+            ['player0@example.com', 'player1@example.com', 'player2@example.com']
+        )
+        detail = self.client.get(reverse('advertisement-detail', args=[self.advertisement.id]))
+        self.assertEqual({item['status'] for item in detail.data['responses']}, {'accepted'})
+    
+    def test_foreign_response_rejects_whole_batch(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client.force_authenticate(other)
+        response = self.client.post(self.url, {'ids': self.responses[:2], 'status': 'rejected'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['errors']), 2)
+        
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(self.url, {'ids': [self.responses[0], 'x'], 'status': 'rejected'}, format='json')
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertEqual(self.client.post(self.url, {'ids': self.responses, 'status': 'done'}, format='json').status_code, 400)
+        self.assertFalse(Response.objects.exclude(status='new').exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+    
+    def test_malformed_body(self):
+        response = self.client.post(self.url, {'ids': [[self.responses[0]], self.responses[1]], 'status': 'accepted'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['errors'][0])
+        self.assertEqual(response.data['errors'][1], {})
+        
+        response = self.client.post(self.url, {'ids': self.responses[:1], 'status': ['accepted']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Response.objects.exclude(status='new').exists())
+    
+    @override_settings(BULK_RESPONSE_MAX_ITEMS=2)
+    def test_max_items(self):
+        response = self.client.post(self.url, {'ids': self.responses[:3], 'status': 'accepted'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('2', response.data['error'])
+    
+    def test_one_email_per_respondent(self):
+        second = Advertisement.objects.create(title='Подземелье', description='Описание', category='ДД', author=self.owner)
+        self.client.force_authenticate(self.players[0])
+        extra = self.client.post(reverse('response-list'), {'advertisement_id': second.id, 'text': 'Беру'}).data['id']
+        OutboxEmail.objects.all().delete()
+        
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(self.url, {'ids': [self.responses[0], extra, self.responses[1]], 'status': 'accepted'}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        emails = {email.recipient: email for email in OutboxEmail.objects.all()}
+        self.assertEqual(sorted(emails), ['player0@example.com', 'player1@example.com'])
+        self.assertIn('Рейд', emails['player0@example.com'].html_body)
+        self.assertIn('Подземелье', emails['player0@example.com'].html_body)
+        self.assertIn('Подземелье', emails['player0@example.com'].body)
+
+
+@override_settings(RESPONSE_DIGEST_WINDOW_MINUTES=60, RESPONSE_DIGEST_MAX_PER_ADVERTISEMENT=2)
+class ResponseDigestTests(APITestCase):
+    """Режим сводки: отклики копятся окно и уходят автору одним письмом"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.advertisements = [
+            Advertisement.objects.create(title=title, description='Описание', category='ДД', author=self.owner)
+            for title in ['Рейд', 'Подземелье']
+        ]
+    
+    def respond(self, player, advertisement):
+        self.client.force_authenticate(player)
+        response = self.client.post(reverse('response-list'), {'advertisement_id': advertisement.id, 'text': f'Беру {player.username}'})
+        self.assertEqual(response.status_code, 201)
+    
+    def send_digests(self):
+        call_command('send_response_digests', stdout=io.StringIO())
+    
+    def test_digest_mode(self):
+        self.client.force_authenticate(self.owner)
+        url = reverse('users:notification_settings')
+        self.assertEqual(self.client.get(url).data, {'response_notification_mode': 'immediate'})
+        response = self.client.patch(url, {'response_notification_mode': 'digest'})
+        self.assertEqual(response.data, {'response_notification_mode': 'digest'})
+        
+        for player in self.players:
+            self.respond(player, self.advertisements[0])
+        self.respond(self.players[0], self.advertisements[1])
+        self.assertFalse(OutboxEmail.objects.exists())
+        
+        # Окно еще не истекло
+        self.send_digests()
+        self.assertFalse(OutboxEmail.objects.exists())
+        
+        ResponseDigestEntry.objects.update(created_at=timezone.now() - timedelta(minutes=61))
+        self.send_digests()
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, 'owner@example.com')
+        self.assertIn('4', email.subject)
+        self.assertIn('Рейд - откликов: 3', email.html_body)
+        self.assertIn('И еще откликов: 1', email.html_body)
+        self.assertIn('Беру player2', email.html_body)
+        # Самый старый отклик на «Рейд» не показан, player0 есть только в «Подземелье»
+        self.assertEqual(email.html_body.count('Беру player0'), 1)
+        self.assertFalse(ResponseDigestEntry.objects.exists())
+    
+    def test_claimed_entries_are_not_sent_twice(self):
+        self.owner.response_notification_mode = 'digest'
+        self.owner.save()
+        self.respond(self.players[0], self.advertisements[0])
+        self.respond(self.players[1], self.advertisements[1])
+        
+        # Первый отклик уже забрал параллельный запуск команды
+        first = ResponseDigestEntry.objects.order_by('id').first()
+        ResponseDigestEntry.objects.filter(pk=first.pk).update(claim_token=uuid.uuid4())
+        self.assertEqual(ResponseDigestService.send_digest(self.owner.id), 1)
+        self.assertEqual(OutboxEmail.objects.get().html_body.count('Беру player0'), 0)
+        self.assertEqual(list(ResponseDigestEntry.objects.all()), [first])
+        self.assertEqual(ResponseDigestService.send_digest(self.owner.id), 0)
+    
+    def test_invalid_mode(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(reverse('users:notification_settings'), {'response_notification_mode': 'never'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_anonymous_settings(self):
+        # SessionAuthentication идет первой, поэтому без входа DRF отвечает 403, а не 401
+        url = reverse('users:notification_settings')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.patch(url, {'response_notification_mode': 'digest'}).status_code, 403)
+
+
+class ResponsePaginationTests(APITestCase):
+    """Постраничные списки откликов и счетчики для фильтров"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.advertisements = [
+            Advertisement.objects.create(title=f'Рейд {i}', description='Описание', category='ДД', author=self.owner)
+            for i in range(2)
+        ]
+        for player in self.players:
+            Response.objects.create(advertisement=self.advertisements[0], author=player, text='Отклик')
+        Response.objects.create(advertisement=self.advertisements[1], author=self.players[0], text='Отклик', status='accepted')
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('response-advertisement-responses')
+    
+    def test_pages_follow_cursor(self):
+        expected = list(Response.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        ids = []
+        response = self.client.get(self.url, {'page_size': 3})
+        self.assertIn('facets', response.data)
+        while True:
+            ids += [item['id'] for item in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+            self.assertNotIn('facets', response.data)
+        self.assertEqual(ids, expected)
+    
+    def test_facets_cross_filter(self):
+        response = self.client.get(self.url, {'advertisement_id': self.advertisements[0].id, 'status': 'accepted'})
+        self.assertEqual(response.data['results'], [])
+        facets = response.data['facets']
+        # Статусы - в пределах выбранного объявления, объявления - в пределах выбранного статуса
+        self.assertEqual(facets['status'], {'new': 3, 'accepted': 0, 'rejected': 0})
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['advertisements'], [
+            {'id': self.advertisements[1].id, 'title': 'Рейд 1', 'count': 1},
+            {'id': self.advertisements[0].id, 'title': 'Рейд 0', 'count': 0},
+        ])
+    
+    def test_advertisement_route(self):
+        url = reverse('advertisement-responses', args=[self.advertisements[1].id])
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['facets']['total'], 1)
+    
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'bad'}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'advertisement_id': 'x'}).status_code, 400)
+
+
+class AsyncResponseListTests(APITestCase):
+    """Асинхронные списки откликов"""
+    
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass12345')
+        self.player = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.owner_token = Token.objects.create(user=self.owner)
+        self.player_token = Token.objects.create(user=self.player)
+        self.advertisements = [
+            Advertisement.objects.create(title=f'Рейд {i}', description='Описание', category='ДД', author=self.owner)
+            for i in range(2)
+        ]
+        Response.objects.create(advertisement=self.advertisements[0], author=self.player, text='Беру', status='accepted')
+        Response.objects.create(advertisement=self.advertisements[1], author=self.player, text='Тоже беру')
+    
+    async def get(self, name, token, params=None):
+        return await self.async_client.get(reverse(name), params or {}, headers={'Authorization': f'Token {token.key}'})
+    
+    async def test_my_responses(self):
+        response = await self.get('async-my-responses', self.player_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['text'] for item in response.json()['results']], ['Тоже беру', 'Беру'])
+        self.assertEqual(response.json()['results'][0]['advertisement']['title'], 'Рейд 1')
+        self.assertEqual(response.json()['facets']['status'], {'new': 1, 'accepted': 1, 'rejected': 0})
+        
+        self.assertEqual((await self.get('async-my-responses', self.owner_token)).json()['results'], [])
+        self.assertEqual((await self.async_client.get(reverse('async-my-responses'))).status_code, 401)
+    
+    async def test_advertisement_responses_filters(self):
+        response = await self.get('async-advertisement-responses', self.owner_token, {'status': 'accepted'})
+        self.assertEqual([item['text'] for item in response.json()['results']], ['Беру'])
+        
+        response = await self.get(
+            'async-advertisement-responses', self.owner_token, {'advertisement_id': self.advertisements[1].id}
+        )
+        self.assertEqual([item['text'] for item in response.json()['results']], ['Тоже беру'])
+        
+        response = await self.get(
+            'async-advertisement-responses', self.owner_token, {'page_size': 1}
+        )
+        self.assertEqual([item['text'] for item in response.json()['results']], ['Тоже беру'])
+        response = await self.async_client.get(
+            response.json()['next'], headers={'Authorization': f'Token {self.owner_token.key}'}
+        )
+        self.assertEqual([item['text'] for item in response.json()['results']], ['Беру'])
+        self.assertNotIn('facets', response.json())
+        
+        response = await self.get('async-advertisement-responses', self.owner_token, {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
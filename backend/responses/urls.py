@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ResponseViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'responses', ResponseViewSet, basename='response')
@@ -15,4 +16,8 @@ urlpatterns = [
     path('responses/<int:pk>/change_status/', 
          ResponseViewSet.as_view({'patch': 'change_status'}), 
          name='response-change-status'),
+    # Асинхронный путь чтения для ASGI-сервера
+    path('async/responses/my/', async_views.my_responses, name='async-my-responses'),
+    path('async/responses/advertisement/', async_views.advertisement_responses,
+         name='async-advertisement-responses'),
 ]
@@ -1,187 +1,336 @@
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response as DRFResponse
-from django.core.mail import send_mail
+import hashlib
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import Response
-from .serializers import ResponseSerializer, ResponseStatusSerializer
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from mmorpg_backend import bulk
+from mmorpg_backend.email_templates import render_email
+from mmorpg_backend.sparse_fields import SparseFieldsViewMixin, related_columns
+from advertisements.models import Advertisement
+from advertisements.services import ArchiveService, ResponseCounterService
+from users.serializers import UserSerializer
+from notifications.services import NotificationService
+from users.services import EmailService
+from .models import ArchivedResponse, Response
+from . import pagination
+from .services import BulkResponseStatusService, ResponseDigestService, ResponseFacetService
+from .serializers import AdvertisementSerializer, ArchivedResponseSerializer, ResponseSerializer, ResponseStatusSerializer
 
-class ResponseViewSet(viewsets.ModelViewSet):
+def get_my_responses_validators(request):
+    """
+    Валидаторы списка откликов пользователя: последнее изменение откликов
+    и их объявлений плюс число строк (учитывает удаления).
+    Считаются одним агрегатным запросом и запоминаются на время запроса.
+    """
+    if not hasattr(request, '_my_responses_validators'):
+        request._my_responses_validators = Response.objects.filter(author=request.user).aggregate(
+            count=Count('id'),
+            last_modified=Max('updated_at'),
+            advertisement_last_modified=Max('advertisement__updated_at'),
+        )
+    return request._my_responses_validators
+
+
+def my_responses_etag(request, *args, **kwargs):
+    validators = get_my_responses_validators(request)
+    source = f"{request.get_full_path()}:{request.user.pk}:{validators['count']}:{validators['last_modified']}:{validators['advertisement_last_modified']}"
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def my_responses_last_modified(request, *args, **kwargs):
+    validators = get_my_responses_validators(request)
+    dates = [date for date in (validators['last_modified'], validators['advertisement_last_modified']) if date]
+    return max(dates) if dates else None
+
+
+class ResponseViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """ViewSet для управления откликами"""
     serializer_class = ResponseSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Выборочные поля (?fields=) для действий чтения
+    sparse_read_actions = ['list', 'retrieve', 'my_responses', 'advertisement_responses']
+    sparse_field_columns = {
+        'author': related_columns('author', UserSerializer),
+        'advertisement': related_columns('advertisement', AdvertisementSerializer),
+    }
+    sparse_select_related = {
+        'author': 'author',
+        'advertisement': 'advertisement',
+    }
+    # Курсор страницы строится по (created_at, id)
+    sparse_required_columns = ['id', 'created_at']
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_read_actions:
+            kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+    
+    def with_read_columns(self, responses):
+        """Подгружает только столбцы и связи, которые попадут в ответ"""
+        fields = self.get_sparse_fields() if self.action in self.sparse_read_actions else None
+        if fields is not None:
+            return self.apply_sparse_fields(responses, fields)
+        # Автор и объявление сериализуются вложенно - загружаем их одним JOIN
+        return responses.select_related('author', 'advertisement')
+    
+    def paginate_responses(self, responses, archived, base, archived_base, advertisement_id=None, status_filter=None):
+        """
+        Страница откликов по курсору (-created_at, -id) с архивными при ?include_archived=1.
+        На первой странице добавляются счетчики для фильтров (facets) по base -
+        тем же откликам без фильтров по объявлению и статусу
+        """
+        params = self.request.query_params
+        try:
+            position = pagination.get_position(params)
+        except pagination.InvalidCursor as e:
+            raise NotFound(str(e))
+        page_size = pagination.get_page_size(params)
+        
+        querysets = [responses]
+        facet_querysets = [base]
+        if ArchiveService.is_requested(self.request):
+            querysets.append(archived.select_related('author', 'advertisement'))
+            facet_querysets.append(archived_base)
+        rows, cursor = pagination.merge_page(
+            [list(queryset) for queryset in pagination.page_querysets(querysets, position, page_size)], page_size
+        )
+        
+        # Действующие и архивные отклики сериализуются своими сериализаторами
+        # и собираются обратно в порядке страницы
+        hot = [row for row in rows if isinstance(row, Response)]
+        items = iter(self.get_serializer(hot, many=True).data)
+        archived_items = iter(ArchivedResponseSerializer(
+            [row for row in rows if not isinstance(row, Response)], many=True, fields=self.get_sparse_fields()
+        ).data)
+        data = {
+            'next': pagination.next_link(self.request, cursor),
+            'previous': None,
+            'results': [next(items) if isinstance(row, Response) else next(archived_items) for row in rows],
+        }
+        if position is None:
+            data['facets'] = ResponseFacetService.facets(facet_querysets, advertisement_id, status_filter)
+        return DRFResponse(data)
+    
     def get_queryset(self):
         """Возвращает отклики в зависимости от роли пользователя"""
         user = self.request.user
+        responses = self.with_read_columns(Response.objects.all())
         
         if self.action == 'my_responses':
             # Пользователь видит свои отклики
-            return Response.objects.filter(author=user)
+            return responses.filter(author=user)
         elif self.action == 'advertisement_responses':
             # Автор объявления видит отклики на свои объявления
             advertisement_id = self.kwargs.get('advertisement_id')
-            return Response.objects.filter(advertisement_id=advertisement_id, advertisement__author=user)
+            return responses.filter(advertisement_id=advertisement_id, advertisement__author=user)
         elif self.action in ['change_status', 'destroy', 'update', 'partial_update', 'retrieve']:
             # Для изменения/удаления/просмотра - все отклики на объявления пользователя
-            return Response.objects.filter(advertisement__author=user)
+            return responses.filter(advertisement__author=user)
         else:
             # По умолчанию пользователь видит свои отклики
-            return Response.objects.filter(author=user)
+            return responses.filter(author=user)
     
     def perform_create(self, serializer):
-        """Создание отклика с отправкой email уведомления"""
+        """
+        Создание отклика с отправкой email уведомления.
+        Объявление с автором читается одним запросом, а повторный отклик
+        отсекает ограничение unique_together (advertisement, author) при INSERT
+        """
+        advertisement_id = serializer.validated_data.get('advertisement_id')
+        user = self.request.user
+        
+        # Автор объявления нужен для проверки и для письма - берем его тем же JOIN
+        advertisement = Advertisement.objects.select_related('author').only(
+            'title', 'category', 'author__username', 'author__email', 'author__response_notification_mode'
+        ).filter(id=advertisement_id).first()
+        if advertisement is None:
+            raise serializers.ValidationError("Объявление не найдено.")
+        if advertisement.author_id == user.id:
+            raise serializers.ValidationError(
+                "Вы не можете оставить отклик на свое собственное объявление."
+            )
+        
         try:
-            # Проверяем, не оставлял ли пользователь уже отклик на это объявление
-            advertisement_id = serializer.validated_data.get('advertisement_id')
-            user = self.request.user
-            
-            # Проверяем, что пользователь не является автором объявления
-            from advertisements.models import Advertisement
-            try:
-                advertisement = Advertisement.objects.get(id=advertisement_id)
-                if advertisement.author == user:
-                    raise serializers.ValidationError(
-                        "Вы не можете оставить отклик на свое собственное объявление."
-                    )
-            except Advertisement.DoesNotExist:
-                raise serializers.ValidationError("Объявление не найдено.")
-            
+            with transaction.atomic():
+                response = serializer.save(advertisement=advertisement)
+                ResponseCounterService.response_created(response)
+                # Письмо автору объявления уходит через outbox вместе с откликом
+                self.send_response_notification(response)
+                NotificationService.response_created(response)
+        except IntegrityError:
             existing_response = Response.objects.filter(
                 advertisement_id=advertisement_id,
                 author=user
-            ).first()
-            
-            if existing_response:
-                raise serializers.ValidationError(
-                    f"Вы уже оставляли отклик на это объявление. "
-                    f"Ваш предыдущий отклик: '{existing_response.text[:50]}...'"
-                )
-            
-            response = serializer.save()
-            
-            # Отправляем email уведомление автору объявления
-            self.send_response_notification(response)
-            
-        except Exception as e:
-            raise
+            ).only('text').first()
+            if existing_response is None:
+                # Объявление удалили между проверкой и вставкой
+                raise serializers.ValidationError("Объявление не найдено.")
+            raise serializers.ValidationError(
+                f"Вы уже оставляли отклик на это объявление. "
+                f"Ваш предыдущий отклик: '{existing_response.text[:50]}...'"
+            )
     
     def perform_update(self, serializer):
         """Обновление статуса отклика с отправкой email уведомления"""
         old_status = serializer.instance.status
-        response = serializer.save()
-        
-        # Если статус изменился, отправляем уведомление
-        if old_status != response.status:
-            print(f"🔄 Статус отклика изменился: {old_status} -> {response.status}")
-            self.send_status_change_notification(response, old_status)
-        else:
-            print(f"ℹ️ Статус отклика не изменился: {old_status}")
+        with transaction.atomic():
+            response = serializer.save()
+            ResponseCounterService.status_changed(response, old_status)
+            
+            # Если статус изменился, ставим уведомление в outbox в той же транзакции
+            if old_status != response.status:
+                self.send_status_change_notification(response, old_status)
+                NotificationService.statuses_changed([(response, old_status)])
+    
+    def perform_destroy(self, instance):
+        """Удаление отклика вместе с уменьшением счетчиков объявления"""
+        with transaction.atomic():
+            instance.delete()
+            ResponseCounterService.response_deleted(instance)
     
     def send_response_notification(self, response):
-        """Отправка email уведомления о новом отклике"""
-        try:
-            advertisement = response.advertisement
-            author_email = advertisement.author.email
-            author_username = advertisement.author.username
-            
-            subject = f'Новый отклик на ваше объявление "{advertisement.title}"'
-            
-            # HTML версия письма
-            html_message = render_to_string('responses/email/new_response.html', {
-                'author_username': author_username,
-                'advertisement_title': advertisement.title,
-                'response_text': response.text,
-                'respondent_username': response.author.username,
-                'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001')
-            })
-            
-            # Текстовая версия письма
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[author_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-        except Exception as e:
-            # Логируем ошибку для отладки
-            print(f"❌ Ошибка отправки email уведомления: {e}")
-            # Не прерываем создание отклика из-за ошибки email
+        """Email уведомление автору объявления о новом отклике (через outbox)"""
+        advertisement = response.advertisement
+        if advertisement.author.response_notification_mode == 'digest':
+            # Автор получает отклики сводкой (команда send_response_digests)
+            ResponseDigestService.add(response, advertisement.author)
+            return
+        
+        author_email = advertisement.author.email
+        author_username = advertisement.author.username
+        
+        subject = f'Новый отклик на ваше объявление "{advertisement.title}"'
+        
+        plain_message, html_message = render_email('new_response', {
+            'author_username': author_username,
+            'advertisement_title': advertisement.title,
+            'response_text': response.text,
+            'respondent_username': response.author.username,
+            'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001')
+        })
+        
+        EmailService.enqueue(
+            recipient=author_email,
+            subject=subject,
+            body=plain_message,
+            html_body=html_message,
+        )
     
     def send_status_change_notification(self, response, old_status):
-        """Отправка email уведомления об изменении статуса отклика"""
-        try:
-            advertisement = response.advertisement
-            respondent_email = response.author.email
-            respondent_username = response.author.username
-            
-            status_labels = {
-                'accepted': 'принят',
-                'rejected': 'отклонен'
-            }
-            
-            subject = f'Статус вашего отклика изменен на "{status_labels.get(response.status, response.status)}"'
-            
-            # HTML версия письма
-            html_message = render_to_string('responses/email/status_change.html', {
-                'respondent_username': respondent_username,
-                'advertisement_title': advertisement.title,
-                'old_status': status_labels.get(old_status, old_status),
-                'new_status': status_labels.get(response.status, response.status),
-                'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001')
-            })
-            
-            # Текстовая версия письма
-            plain_message = strip_tags(html_message)
-            
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[respondent_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-        except Exception as e:
-            # Логируем ошибку для отладки
-            print(f"❌ Ошибка отправки email уведомления: {e}")
-            # Не прерываем процесс из-за ошибки email
+        """Email уведомление автору отклика об изменении статуса (через outbox)"""
+        EmailService.enqueue(**self.build_status_change_notification(response, old_status))
+    
+    def build_status_change_notification(self, response, old_status):
+        """Письмо об изменении статуса отклика - аргументы EmailService.enqueue"""
+        advertisement = response.advertisement
+        respondent_email = response.author.email
+        respondent_username = response.author.username
+        
+        status_labels = {
+            'accepted': 'принят',
+            'rejected': 'отклонен'
+        }
+        
+        subject = f'Статус вашего отклика изменен на "{status_labels.get(response.status, response.status)}"'
+        
+        plain_message, html_message = render_email('status_change', {
+            'respondent_username': respondent_username,
+            'advertisement_title': advertisement.title,
+            'old_status': status_labels.get(old_status, old_status),
+            'new_status': status_labels.get(response.status, response.status),
+            'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001')
+        })
+        
+        return {
+            'recipient': respondent_email,
+            'subject': subject,
+            'body': plain_message,
+            'html_body': html_message,
+        }
+    
+    def build_status_changes_notification(self, changes):
+        """Одно письмо автору откликов changes [(отклик, старый статус)] - аргументы EmailService.enqueue"""
+        if len(changes) == 1:
+            return self.build_status_change_notification(*changes[0])
+        
+        respondent = changes[0][0].author
+        status_labels = dict(Response.STATUS_CHOICES)
+        plain_message, html_message = render_email('status_changes', {
+            'respondent_username': respondent.username,
+            'changes': [
+                {
+                    'advertisement_title': response.advertisement.title,
+                    'old_status': status_labels.get(old_status, old_status),
+                    'new_status': response.status,
+                    'new_status_label': status_labels.get(response.status, response.status),
+                }
+                for response, old_status in changes
+            ],
+            'site_url': getattr(settings, 'SITE_URL', 'http://localhost:3001')
+        })
+        
+        return {
+            'recipient': respondent.email,
+            'subject': f'Статус ваших откликов изменен: {len(changes)}',
+            'body': plain_message,
+            'html_body': html_message,
+        }
     
     @action(detail=False, methods=['get'])
+    @method_decorator(condition(etag_func=my_responses_etag, last_modified_func=my_responses_last_modified))
     def my_responses(self, request):
-        """Получить все отклики текущего пользователя"""
-        responses = self.get_queryset()
-        serializer = ResponseSerializer(responses, many=True)
-        return DRFResponse(serializer.data)
+        """Отклики текущего пользователя постранично, со счетчиками по статусам и объявлениям"""
+        return self.paginate_responses(
+            self.get_queryset(),
+            ArchivedResponse.objects.filter(author=request.user),
+            Response.objects.filter(author=request.user),
+            ArchivedResponse.objects.filter(author=request.user),
+        )
     
     @action(detail=False, methods=['get'])
     def advertisement_responses(self, request, advertisement_id=None):
-        """Получить все отклики на объявления текущего пользователя с фильтрацией"""
+        """
+        Отклики на объявления текущего пользователя с фильтрацией
+        (?advertisement_id=, ?status=) постранично, со счетчиками для фильтров
+        """
         user = request.user
+        base = Response.objects.filter(advertisement__author=user)
+        archived_base = ArchivedResponse.objects.filter(advertisement__author=user)
+        # Маршрут advertisements/<id>/responses/ задает объявление в пути
+        if advertisement_id is not None:
+            base = base.filter(advertisement_id=advertisement_id)
+            archived_base = archived_base.filter(advertisement_id=advertisement_id)
         
-        # Получаем все отклики на объявления пользователя
-        queryset = Response.objects.filter(advertisement__author=user)
+        queryset = self.with_read_columns(base)
+        archived = archived_base
         
         # Применяем фильтры
-        advertisement_id = request.query_params.get('advertisement_id')
+        advertisement_filter = request.query_params.get('advertisement_id')
         status_filter = request.query_params.get('status')
         
-        if advertisement_id and advertisement_id != 'all':
-            queryset = queryset.filter(advertisement_id=advertisement_id)
+        if advertisement_filter and advertisement_filter != 'all':
+            try:
+                advertisement_filter = int(advertisement_filter)
+            except ValueError:
+                raise serializers.ValidationError({'advertisement_id': 'Неверный идентификатор объявления.'})
+            queryset = queryset.filter(advertisement_id=advertisement_filter)
+            archived = archived.filter(advertisement_id=advertisement_filter)
+        else:
+            advertisement_filter = None
         
         if status_filter and status_filter != 'all':
             queryset = queryset.filter(status=status_filter)
+            archived = archived.filter(status=status_filter)
+        else:
+            status_filter = None
         
-        serializer = ResponseSerializer(queryset, many=True)
-        return DRFResponse(serializer.data)
+        return self.paginate_responses(queryset, archived, base, archived_base, advertisement_filter, status_filter)
     
     @action(detail=True, methods=['patch'])
     def change_status(self, request, pk=None):
@@ -194,3 +343,27 @@ class ResponseViewSet(viewsets.ModelViewSet):
             self.perform_update(serializer)
             return DRFResponse(serializer.data)
         return DRFResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_change_status(self, request):
+        """Изменить статус нескольких откликов на свои объявления: {"ids": [...], "status": "accepted"}"""
+        data = request.data if isinstance(request.data, dict) else {}
+        ids = data.get('ids')
+        error = BulkResponseStatusService.check_items(ids)
+        if error:
+            return DRFResponse({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        new_status = data.get('status')
+        if not isinstance(new_status, str) or new_status not in dict(Response.STATUS_CHOICES):
+            return DRFResponse({'error': 'Неизвестный статус отклика'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        owned = BulkResponseStatusService.get_owned(request.user, bulk.int_ids(ids))
+        errors = BulkResponseStatusService.check_ids(ids, owned)
+        if any(errors):
+            return DRFResponse({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        changes = BulkResponseStatusService.change_status(owned, new_status, self.build_status_changes_notification)
+        return DRFResponse({
+            'results': [{'id': response_id, 'status': new_status} for response_id in ids],
+            'updated': len(changes),
+        })
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, EmailVerification
+from .models import User, EmailVerification, OutboxEmail
+from .services import EmailOutboxService
 
 
 @admin.register(User)
@@ -43,3 +44,20 @@ class EmailVerificationAdmin(admin.ModelAdmin):
         return obj.is_expired()
     is_expired.boolean = True
     is_expired.short_description = 'Истек'
+
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Админка исходящих писем"""
+    
+    list_display = ['subject', 'recipient', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'sent_at']
+    actions = ['retry_dead']
+    
+    @admin.action(description='Повторить отправку недоставленных писем')
+    def retry_dead(self, request, queryset):
+        retried = EmailOutboxService.retry_dead(queryset)
+        self.message_user(request, f'Возвращено в очередь: {retried}')
@@ -0,0 +1,185 @@
+"""
+Аутентификация по токену с кешем.
+
+TokenAuthentication из DRF читает Token с пользователем (JOIN) на каждый
+запрос. Здесь токен и снимок пользователя кешируются в два уровня:
+ограниченный LRU в памяти процесса (короткий TTL) и общий кеш - файловый
+CACHES['files'], если он настроен, иначе CACHES['default']. При
+попадании в кеш аутентификация не делает запросов к БД.
+
+Снимок не содержит хеша пароля: пользователь восстанавливается с
+отложенным полем password, поэтому save() такого объекта пароль не
+перезаписывает, а check_password() дочитывает его из БД.
+
+Записи удаляются при удалении токена (logout), сохранении пользователя
+(деактивация, смена пароля, изменение профиля) и удалении пользователя -
+см. users/signals.py. Удаление видно сразу в общем кеше и в памяти
+процесса, где оно произошло; в памяти других процессов запись живет не
+дольше AUTH_TOKEN_CACHE_LOCAL_TIMEOUT секунд.
+
+Если общего кеша нет (CACHES['default'] в памяти процесса), другие
+процессы удаления не видят. Тогда и этот уровень хранит снимок не дольше
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT, так что граница устаревания та же.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+KEY = 'auth_token:{key}'
+# Поля пользователя, которые не попадают в кеш
+EXCLUDED_FIELDS = {'password'}
+
+
+def get_timeout():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300)
+
+
+def get_local_timeout():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_LOCAL_TIMEOUT', 10)
+
+
+def get_max_entries():
+    return getattr(settings, 'AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)
+
+
+class LocalTokenCache:
+    """LRU-кеш снимков в памяти процесса: не больше max_entries записей, каждая живет timeout секунд"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return snapshot
+
+    def set(self, key, snapshot):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + get_local_timeout(), snapshot)
+            self.entries.move_to_end(key)
+            while len(self.entries) > get_max_entries():
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalTokenCache()
+
+
+def get_shared_cache():
+    if 'files' in settings.CACHES:
+        return caches['files']
+    return caches['default']
+
+
+def get_shared_timeout():
+    """Кеш в памяти процесса не общий - снимок в нем живет не дольше локального"""
+    if isinstance(get_shared_cache(), LocMemCache):
+        return min(get_timeout(), get_local_timeout())
+    return get_timeout()
+
+
+def make_snapshot(token):
+    """Токен и поля пользователя (кроме пароля) в виде, пригодном для кеша"""
+    user = token.user
+    fields = [field.attname for field in user._meta.concrete_fields if field.attname not in EXCLUDED_FIELDS]
+    return {
+        'created': token.created,
+        'user_fields': fields,
+        'user_values': [getattr(user, name) for name in fields],
+    }
+
+
+def restore(key, snapshot):
+    """Токен с пользователем из снимка - без запросов к БД"""
+    user = get_user_model().from_db(None, snapshot['user_fields'], snapshot['user_values'])
+    token = Token.from_db(None, ['key', 'user_id', 'created'], [key, user.pk, snapshot['created']])
+    token.user = user
+    return token
+
+
+def get(key):
+    """Токен из кеша или None"""
+    snapshot = local_cache.get(key)
+    if snapshot is None:
+        snapshot = get_shared_cache().get(KEY.format(key=key))
+        if snapshot is None:
+            return None
+        local_cache.set(key, snapshot)
+    return restore(key, snapshot)
+
+
+async def aget(key):
+    """Асинхронный get: общий кеш читается через его асинхронный интерфейс"""
+    snapshot = local_cache.get(key)
+    if snapshot is None:
+        snapshot = await get_shared_cache().aget(KEY.format(key=key))
+        if snapshot is None:
+            return None
+        local_cache.set(key, snapshot)
+    return restore(key, snapshot)
+
+
+def store(token):
+    snapshot = make_snapshot(token)
+    local_cache.set(token.key, snapshot)
+    get_shared_cache().set(KEY.format(key=token.key), snapshot, get_shared_timeout())
+
+
+async def astore(token):
+    snapshot = make_snapshot(token)
+    local_cache.set(token.key, snapshot)
+    await get_shared_cache().aset(KEY.format(key=token.key), snapshot, get_shared_timeout())
+
+
+def invalidate(*keys):
+    """Удалить токены из кеша сейчас и еще раз после фиксации транзакции"""
+    def delete():
+        for key in keys:
+            local_cache.delete(key)
+        get_shared_cache().delete_many([KEY.format(key=key) for key in keys])
+
+    if keys:
+        # Повторное удаление после COMMIT убирает снимок, сохраненный
+        # параллельным запросом, который успел прочитать старые данные
+        delete()
+        transaction.on_commit(delete)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, читающий токен и пользователя из кеша"""
+
+    def authenticate_credentials(self, key):
+        token = get(key)
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise AuthenticationFailed('Недопустимый токен.')
+            store(token)
+
+        if not token.user.is_active:
+            raise AuthenticationFailed('Пользователь неактивен или удален.')
+        return token.user, token
@@ -0,0 +1,101 @@
+"""
+Команда лежит в users рядом с send_outbox_emails: все письма проекта
+ставятся в outbox через users.services.EmailService. Сам реестр
+(mmorpg_backend.email_templates) не является приложением Django и не
+может содержать команд.
+"""
+import time
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from mmorpg_backend.email_templates import EMAIL_TEMPLATES, render_email
+
+SITE_URL = 'http://localhost:3001'
+
+# До реестра эти письма собирались f-строками в EmailService, а не из
+# шаблонов, поэтому прежнего пути render_to_string для них не было
+NO_TEMPLATE_BEFORE = {'verification', 'welcome'}
+
+# Типичные переменные каждого письма
+SAMPLE_CONTEXTS = {
+    'verification': {
+        'username': 'player', 'verification_url': f'{SITE_URL}/verify-email?token=abc123',
+        'token': 'abc123', 'expire_hours': 24,
+    },
+    'welcome': {'username': 'player', 'site_url': SITE_URL},
+    'new_response': {
+        'author_username': 'guildmaster', 'advertisement_title': 'Набор в рейд',
+        'response_text': 'Хил 60 уровня, готов по вечерам. ' * 5, 'respondent_username': 'player',
+        'site_url': SITE_URL,
+    },
+    'status_change': {
+        'respondent_username': 'player', 'advertisement_title': 'Набор в рейд',
+        'old_status': 'new', 'new_status': 'accepted', 'site_url': SITE_URL,
+    },
+    'status_changes': {
+        'respondent_username': 'player', 'site_url': SITE_URL,
+        'changes': [
+            {'advertisement_title': f'Набор в рейд {i}', 'old_status': 'Новый',
+             'new_status': 'accepted', 'new_status_label': 'Принят'}
+            for i in range(3)
+        ],
+    },
+    'response_digest': {
+        'author_username': 'guildmaster', 'total': 12, 'site_url': SITE_URL,
+        'groups': [
+            {
+                'title': f'Набор в рейд {i}', 'count': 4, 'more': 0,
+                'responses': [{'text': 'Готов идти', 'respondent_username': f'player{j}'} for j in range(4)],
+            }
+            for i in range(3)
+        ],
+    },
+    'newsletter': {
+        'user': SimpleNamespace(username='player'),
+        'newsletter': SimpleNamespace(
+            title='Новости недели', subject='Новости недели', content='Обновление 1.2\n\nНовые рейды и гильдии.'
+        ),
+        'unsubscribe_url': f'{SITE_URL}/unsubscribe/1/',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость подготовки писем: прежний путь (render_to_string HTML-шаблона '
+        'и strip_tags для текстовой версии на каждое письмо) и реестр скомпилированных '
+        'шаблонов (mmorpg_backend.email_templates). Письма verification и welcome '
+        'раньше собирались f-строками без шаблонов - для них выводится только новая скорость.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', choices=sorted(EMAIL_TEMPLATES), help='Только одно письмо')
+        parser.add_argument('--messages', type=int, default=2000, help='Писем на каждый путь')
+
+    def handle(self, *args, **options):
+        names = [options['template']] if options['template'] else sorted(EMAIL_TEMPLATES)
+        for name in names:
+            context = SAMPLE_CONTEXTS[name]
+            html_template = EMAIL_TEMPLATES[name].html_template
+
+            def legacy():
+                html_message = render_to_string(html_template, context)
+                return strip_tags(html_message), html_message
+
+            # Сборка шаблона (инлайнинг CSS, текстовая версия) - один раз до замера
+            EMAIL_TEMPLATES[name].get_compiled()
+            after = self.measure(lambda: render_email(name, context), options['messages'])
+            if name in NO_TEMPLATE_BEFORE:
+                self.stdout.write(f'{name}: {after:.0f} писем/с (до реестра - f-строки, не сравнивается)')
+                continue
+            before = self.measure(legacy, options['messages'])
+            self.stdout.write(
+                f'{name}: до {before:.0f} писем/с, после {after:.0f} писем/с (x{after / before:.1f})'
+            )
+
+    def measure(self, render, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            render()
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from users.services import EmailOutboxService
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из outbox с повторами и экспоненциальной задержкой. '
+        'Без --loop отправляет все письма, срок которых наступил, и завершается.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Писем за одно SMTP-соединение')
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно, опрашивая очередь')
+        parser.add_argument('--interval', type=float, default=5, help='Пауза между опросами пустой очереди, секунд')
+    
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = EmailOutboxService.dispatch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {total_sent}, с ошибкой: {total_failed}'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='response_notification_mode',
+            field=models.CharField(choices=[('immediate', 'Письмо на каждый отклик'), ('digest', 'Сводка откликов')], default='immediate', max_length=10, verbose_name='Уведомления об откликах'),
+        ),
+    ]
@@ -7,11 +7,22 @@ import uuid
 class User(AbstractUser):
     """Кастомная модель пользователя"""
     
+    RESPONSE_NOTIFICATION_CHOICES = [
+        ('immediate', 'Письмо на каждый отклик'),
+        ('digest', 'Сводка откликов'),
+    ]
+    
     # Дополнительные поля
     email = models.EmailField(unique=True, verbose_name='Email')
     email_verified = models.BooleanField(default=False, verbose_name='Email подтвержден')
     verification_token = models.UUIDField(default=uuid.uuid4, verbose_name='Токен подтверждения')
     verification_token_created = models.DateTimeField(default=timezone.now, verbose_name='Дата создания токена')
+    # Как автор объявлений получает письма о новых откликах: сразу или
+    # сводкой раз в RESPONSE_DIGEST_WINDOW_MINUTES минут
+    response_notification_mode = models.CharField(
+        max_length=10, choices=RESPONSE_NOTIFICATION_CHOICES, default='immediate',
+        verbose_name='Уведомления об откликах'
+    )
     
     # Переопределяем username как необязательное поле
     username = models.CharField(max_length=150, unique=True, null=True, blank=True, verbose_name='Имя пользователя')
@@ -52,3 +63,48 @@ class EmailVerification(models.Model):
     
     def is_expired(self):
         return timezone.now() > self.expires_at
+
+
+class OutboxEmail(models.Model):
+    """
+    Исходящее письмо (transactional outbox).
+
+    Письмо записывается в той же транзакции, что и изменение, которое
+    его порождает, а отправляет его команда send_outbox_emails. Неудачная
+    отправка повторяется с экспоненциальной задержкой; после
+    EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо получает статус dead.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлено'),
+        ('dead', 'Не доставлено'),
+    ]
+    
+    recipient = models.EmailField(verbose_name='Получатель')
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст письма')
+    html_body = models.TextField(blank=True, verbose_name='HTML-версия')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    # Метка воркера, взявшего письмо в работу; пока идет отправка, next_attempt_at
+    # сдвинут на время аренды, и после падения воркера письмо снова станет доступно
+    claim_token = models.UUIDField(null=True, blank=True, editable=False, verbose_name='Метка воркера')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки')
+    
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ['-created_at']
+        indexes = [
+            # Очередь отправки: ожидающие письма по времени следующей попытки
+            models.Index(
+                fields=['next_attempt_at', 'id'], condition=models.Q(status='pending'), name='outbox_pending_due_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient}"
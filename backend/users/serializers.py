@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from .models import User, EmailVerification
 from django.utils import timezone
 from datetime import timedelta
@@ -57,23 +58,25 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             username = f"{base_username}_{counter}"
             counter += 1
         
-        # Создаем пользователя как неактивного
-        user = User.objects.create_user(
-            username=username,
-            email=validated_data['email'],
-            password=validated_data['password'],
-            is_active=False  # Пользователь неактивен до подтверждения email
-        )
-        
-        # Создаем токен для подтверждения email
-        expires_at = timezone.now() + timedelta(hours=settings.EMAIL_VERIFICATION_EXPIRE_HOURS)
-        verification = EmailVerification.objects.create(
-            user=user,
-            expires_at=expires_at
-        )
-        
-        # Отправляем email с токеном подтверждения
-        EmailService.send_verification_email(user, verification)
+        # Пользователь, токен и письмо в outbox сохраняются одной транзакцией
+        with transaction.atomic():
+            # Создаем пользователя как неактивного
+            user = User.objects.create_user(
+                username=username,
+                email=validated_data['email'],
+                password=validated_data['password'],
+                is_active=False  # Пользователь неактивен до подтверждения email
+            )
+            
+            # Создаем токен для подтверждения email
+            expires_at = timezone.now() + timedelta(hours=settings.EMAIL_VERIFICATION_EXPIRE_HOURS)
+            verification = EmailVerification.objects.create(
+                user=user,
+                expires_at=expires_at
+            )
+            
+            # Ставим в очередь email с токеном подтверждения
+            EmailService.send_verification_email(user, verification)
         
         return user
 
@@ -126,15 +129,16 @@ class EmailVerificationSerializer(serializers.Serializer):
         verification = self.verification
         user = verification.user
         
-        user.is_active = True
-        user.email_verified = True
-        user.save()
-        
-        verification.is_used = True
-        verification.save()
-        
-        # Отправляем приветственное письмо
-        EmailService.send_welcome_email(user)
+        with transaction.atomic():
+            user.is_active = True
+            user.email_verified = True
+            user.save()
+            
+            verification.is_used = True
+            verification.save()
+            
+            # Ставим в очередь приветственное письмо
+            EmailService.send_welcome_email(user)
         
         return user
 
@@ -152,4 +156,18 @@ class UserSerializer(serializers.ModelSerializer):
     
     def get_login_display(self, obj):
         """Возвращаем email как логин для отображения"""
-        return obj.email 
\ No newline at end of file
+        return obj.email 
+
+class NotificationSettingsSerializer(serializers.ModelSerializer):
+    """Настройки уведомлений пользователя"""
+    
+    class Meta:
+        model = User
+        fields = ['response_notification_mode']
+    
+    def update(self, instance, validated_data):
+        # update_fields: настройки не входят в данные объявлений, их кеш не сбрасывается
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
@@ -1,196 +1,176 @@
-from django.core.mail import send_mail
+import logging
+import uuid
+from datetime import timedelta
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import EmailVerification
+from django.db.models import F
+from django.utils import timezone
+from mmorpg_backend.email_templates import render_email
+from .models import EmailVerification, OutboxEmail
+
+logger = logging.getLogger(__name__)
 
 
 class EmailService:
     """Сервис для отправки email"""
     
     @staticmethod
-    def send_verification_email(user, verification):
-        """Отправляет email для подтверждения регистрации"""
-        
-        # Создаем ссылку для подтверждения
-        verification_url = f"{settings.SITE_URL}/verify-email?token={verification.token}"
-        
-        # HTML версия письма
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Подтверждение регистрации - MMORPG</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                          color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .button {{ display: inline-block; background: #667eea; color: white; 
-                          padding: 12px 30px; text-decoration: none; border-radius: 5px; 
-                          margin: 20px 0; }}
-                .footer {{ text-align: center; margin-top: 30px; color: #666; font-size: 14px; }}
-                .token {{ background: #e9ecef; padding: 10px; border-radius: 5px; 
-                         font-family: monospace; margin: 15px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🎮 MMORPG</h1>
-                    <p>Подтверждение регистрации</p>
-                </div>
-                <div class="content">
-                    <h2>Здравствуйте, {user.username or user.email.split('@')[0]}!</h2>
-                    
-                    <p>Спасибо за регистрацию на нашем игровом портале MMORPG!</p>
-                    
-                    <p>Для завершения регистрации и активации вашего аккаунта, пожалуйста, 
-                    подтвердите ваш email одним из способов:</p>
-                    
-                    <div style="text-align: center;">
-                        <a href="{verification_url}" class="button">
-                            Подтвердить Email
-                        </a>
-                    </div>
-                    
-                    <p><strong>Или скопируйте токен подтверждения:</strong></p>
-                    <div class="token">{verification.token}</div>
-                    
-                    <p><strong>Важно:</strong></p>
-                    <ul>
-                        <li>Токен действителен в течение {settings.EMAIL_VERIFICATION_EXPIRE_HOURS} часов</li>
-                        <li>Если вы не регистрировались на нашем сайте, просто проигнорируйте это письмо</li>
-                        <li>После подтверждения вы сможете войти в свой аккаунт</li>
-                    </ul>
-                </div>
-                <div class="footer">
-                    <p>С уважением,<br>Команда MMORPG</p>
-                    <p>Это автоматическое письмо, не отвечайте на него</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def enqueue(recipient, subject, body, html_body=''):
         """
-        
-        # Текстовая версия письма
-        text_message = f"""
-Здравствуйте, {user.username or user.email.split('@')[0]}!
-
-Спасибо за регистрацию на нашем игровом портале MMORPG!
-
-Для завершения регистрации и активации вашего аккаунта, пожалуйста, подтвердите ваш email.
-
-Ссылка для подтверждения: {verification_url}
-
-Токен подтверждения: {verification.token}
-
-Токен действителен в течение {settings.EMAIL_VERIFICATION_EXPIRE_HOURS} часов.
-
-Если вы не регистрировались на нашем сайте, просто проигнорируйте это письмо.
-
-С уважением,
-Команда MMORPG
+        Поставить письмо в очередь отправки (outbox). Запись идет в текущей
+        транзакции: письмо уйдет, только если изменение, которое его
+        порождает, будет зафиксировано. Отправляет команда send_outbox_emails.
         """
-        
-        try:
-            send_mail(
-                subject='🎮 Подтверждение регистрации - MMORPG',
-                message=strip_tags(text_message),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            return True
-        except Exception as e:
+        return OutboxEmail.objects.create(recipient=recipient, subject=subject, body=body, html_body=html_body)
+    
+    @staticmethod
+    def enqueue_many(messages):
+        """Поставить в очередь несколько писем одним INSERT; messages - словари аргументов enqueue"""
+        return OutboxEmail.objects.bulk_create([OutboxEmail(**message) for message in messages])
     
-            return False
+    @staticmethod
+    def get_display_name(user):
+        return user.username or user.email.split('@')[0]
+    
+    @staticmethod
+    def send_verification_email(user, verification):
+        """Отправляет email для подтверждения регистрации"""
+        body, html_body = render_email('verification', {
+            'username': EmailService.get_display_name(user),
+            'verification_url': f"{settings.SITE_URL}/verify-email?token={verification.token}",
+            'token': verification.token,
+            'expire_hours': settings.EMAIL_VERIFICATION_EXPIRE_HOURS,
+        })
+        return EmailService.enqueue(
+            recipient=user.email,
+            subject='🎮 Подтверждение регистрации - MMORPG',
+            body=body,
+            html_body=html_body,
+        )
     
     @staticmethod
     def send_welcome_email(user):
         """Отправляет приветственное письмо после подтверждения email"""
-        
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Добро пожаловать в MMORPG!</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #28a745 0%, #20c997 100%); 
-                          color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .button {{ display: inline-block; background: #28a745; color: white; 
-                          padding: 12px 30px; text-decoration: none; border-radius: 5px; 
-                          margin: 20px 0; }}
-                .footer {{ text-align: center; margin-top: 30px; color: #666; font-size: 14px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🎉 Добро пожаловать!</h1>
-                    <p>Ваш аккаунт успешно активирован</p>
-                </div>
-                <div class="content">
-                    <h2>Поздравляем, {user.username or user.email.split('@')[0]}!</h2>
-                    
-                    <p>Ваш аккаунт в MMORPG успешно активирован! 🎮</p>
-                    
-                    <p>Теперь вы можете:</p>
-                    <ul>
-                        <li>Войти в свой аккаунт</li>
-                        <li>Создавать объявления</li>
-                        <li>Отвечать на объявления других игроков</li>
-                        <li>Участвовать в игровом сообществе</li>
-                    </ul>
-                    
-                    <div style="text-align: center;">
-                        <a href="{settings.SITE_URL}" class="button">
-                            Перейти на сайт
-                        </a>
-                    </div>
-                    
-                    <p>Удачной игры! 🚀</p>
-                </div>
-                <div class="footer">
-                    <p>С уважением,<br>Команда MMORPG</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text_message = f"""
-Поздравляем, {user.username or user.email.split('@')[0]}!
-
-Ваш аккаунт в MMORPG успешно активирован!
+        body, html_body = render_email('welcome', {
+            'username': EmailService.get_display_name(user),
+            'site_url': settings.SITE_URL,
+        })
+        return EmailService.enqueue(
+            recipient=user.email,
+            subject='🎉 Добро пожаловать в MMORPG!',
+            body=body,
+            html_body=html_body,
+        )
 
-Теперь вы можете войти в свой аккаунт и начать использовать все возможности нашего игрового портала.
 
-Перейти на сайт: {settings.SITE_URL}
+class EmailOutboxService:
+    """
+    Отправка писем из outbox.
 
-Удачной игры!
-
-С уважением,
-Команда MMORPG
-        """
+    Воркер забирает пачку писем, срок попытки которых наступил, одним
+    условным UPDATE со своей меткой, поэтому несколько воркеров не
+    отправят одно письмо дважды. Пачка уходит через одно SMTP-соединение.
+    Ошибка отправки переносит попытку на RETRY_BASE * 2^(попытка - 1)
+    секунд (не больше RETRY_MAX), после MAX_ATTEMPTS попыток письмо
+    получает статус dead и больше не отправляется.
+    """
+    
+    @staticmethod
+    def get_max_attempts():
+        return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    
+    @staticmethod
+    def get_retry_delay(attempts):
+        """Задержка перед следующей попыткой после attempts неудачных"""
+        base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+        limit = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), limit))
+    
+    @staticmethod
+    def get_lease():
+        return timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    
+    @staticmethod
+    def claim(batch_size):
+        """Забрать до batch_size писем, срок отправки которых наступил"""
+        now = timezone.now()
+        token = uuid.uuid4()
+        due_ids = list(
+            OutboxEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not due_ids:
+            return []
+        # Повторная проверка условия в UPDATE отсекает письма, взятые другим воркером
+        OutboxEmail.objects.filter(id__in=due_ids, status='pending', next_attempt_at__lte=now).update(
+            claim_token=token,
+            next_attempt_at=now + EmailOutboxService.get_lease(),
+            attempts=F('attempts') + 1,
+        )
+        return list(OutboxEmail.objects.filter(claim_token=token).order_by('id'))
+    
+    @staticmethod
+    def build_message(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email.recipient],
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+    
+    @staticmethod
+    def mark_failed(email, error):
+        if email.attempts >= EmailOutboxService.get_max_attempts():
+            email.status = 'dead'
+            logger.error('Письмо %s не доставлено после %s попыток: %s', email.pk, email.attempts, error)
+        else:
+            email.next_attempt_at = timezone.now() + EmailOutboxService.get_retry_delay(email.attempts)
+        email.last_error = str(error)
+        email.claim_token = None
+        email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'claim_token'])
+    
+    @staticmethod
+    def dispatch(batch_size=100):
+        """Отправить одну пачку писем. Возвращает (отправлено, с ошибкой)"""
+        emails = EmailOutboxService.claim(batch_size)
+        if not emails:
+            return 0, 0
         
+        sent_ids = []
+        failed = 0
         try:
-            send_mail(
-                subject='🎉 Добро пожаловать в MMORPG!',
-                message=strip_tags(text_message),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            return True
+            connection = get_connection(fail_silently=False)
+            connection.open()
         except Exception as e:
+            for email in emails:
+                EmailOutboxService.mark_failed(email, e)
+            return 0, len(emails)
+        
+        try:
+            for email in emails:
+                try:
+                    EmailOutboxService.build_message(email, connection).send()
+                except Exception as e:
+                    EmailOutboxService.mark_failed(email, e)
+                    failed += 1
+                else:
+                    sent_ids.append(email.id)
+        finally:
+            connection.close()
+        
+        OutboxEmail.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), last_error='', claim_token=None
+        )
+        return len(sent_ids), failed
     
-            return False 
\ No newline at end of file
+    @staticmethod
+    def retry_dead(queryset):
+        """Вернуть недоставленные письма в очередь с новым счетчиком попыток"""
+        return queryset.filter(status='dead').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), claim_token=None
+        )
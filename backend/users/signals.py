@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from . import authentication
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Выход (удаление auth_token) и удаление пользователя сразу закрывают доступ по токену"""
+    authentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    """Деактивация, смена пароля и изменение профиля сбрасывают снимок пользователя в кеше токенов"""
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        # Дата входа на аутентификацию не влияет
+        return
+    authentication.invalidate(*Token.objects.filter(user=instance).values_list('key', flat=True))
@@ -1,3 +1,184 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from . import authentication
+from .models import EmailVerification, OutboxEmail, User
 
-# Create your tests here.
+
+class UserProfileConditionalGetTests(APITestCase):
+    """Условный GET для профиля пользователя"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('users:profile')
+    
+    def test_not_modified_until_change(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        self.user.username = 'guildmaster'
+        self.user.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_BASE_SECONDS=60)
+class EmailOutboxTests(APITestCase):
+    """Письма пишутся в outbox вместе с изменением и отправляются воркером"""
+    
+    def register(self):
+        response = self.client.post(reverse('users:register'), {
+            'username': 'newbie', 'email': 'newbie@example.com',
+            'password': 'Dragon-slayer-42', 'password_confirm': 'Dragon-slayer-42',
+        })
+        self.assertEqual(response.status_code, 201)
+    
+    def send(self):
+        call_command('send_outbox_emails', stdout=io.StringIO())
+    
+    def test_registration_and_verification_emails(self):
+        self.register()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboxEmail.objects.get().status, 'pending')
+        
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['newbie@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(OutboxEmail.objects.get().status, 'sent')
+        
+        verification = EmailVerification.objects.get()
+        response = self.client.post(reverse('users:verify_email'), {'token': str(verification.token)})
+        self.assertEqual(response.status_code, 200)
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Добро пожаловать', mail.outbox[1].subject)
+    
+    def test_retry_with_backoff_then_dead(self):
+        self.register()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException('down')):
+            self.send()
+            email = OutboxEmail.objects.get()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'down'))
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5
+            )
+            
+            # До срока повтора письмо не берется
+            self.send()
+            self.assertEqual(OutboxEmail.objects.get().attempts, 1)
+            
+            OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            with self.assertLogs('users.services', 'ERROR'):
+                self.send()
+            email = OutboxEmail.objects.get()
+            self.assertEqual((email.status, email.attempts), ('dead', 2))
+        
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.send()
+        self.assertEqual(mail.outbox, [])
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    """Аутентификация по токену из кеша и ее инвалидация"""
+    
+    def setUp(self):
+        cache.clear()
+        authentication.local_cache.clear()
+        self.user = User.objects.create_user(username='player', email='player@example.com', password='pass12345')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('users:profile')
+    
+    def test_cache_hit_without_queries(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['username'], 'player')
+        
+        # Промах в памяти процесса - снимок берется из общего кеша
+        authentication.local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+    
+    def test_logout(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.post(reverse('users:logout')).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    def test_deactivation_and_password_change(self):
+        self.client.get(self.url)
+        self.user.set_password('new-pass12345')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    def test_cached_user_save_keeps_password(self):
+        self.client.get(self.url)
+        response = self.client.patch(
+            reverse('users:notification_settings'), {'response_notification_mode': 'digest'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        # Снимок сброшен - следующий запрос видит новую настройку
+        self.assertEqual(self.client.get(reverse('users:notification_settings')).data['response_notification_mode'], 'digest')
+        
+        self.client.get(self.url)
+        token = authentication.get(self.token.key)
+        token.user.first_name = 'Игрок'
+        token.user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('pass12345'))
+    
+    @override_settings(AUTH_TOKEN_CACHE_MAX_ENTRIES=2)
+    def test_local_cache_is_bounded(self):
+        tokens = [self.token] + [
+            Token.objects.create(user=User.objects.create_user(
+                username=f'player{i}', email=f'player{i}@example.com', password='pass12345'
+            ))
+            for i in range(2)
+        ]
+        for token in tokens:
+            authentication.store(token)
+        self.assertEqual(list(authentication.local_cache.entries), [token.key for token in tokens[1:]])
+    
+    def test_shared_cache_timeout(self):
+        # Без общего кеша снимок в CACHES['default'] живет не дольше локального
+        self.assertEqual(authentication.get_shared_cache(), cache)
+        self.assertEqual(authentication.get_shared_timeout(), authentication.get_local_timeout())
+    
+    def test_revocation_visible_to_other_process(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'files': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        }
+        # Общий кеш другого процесса - отдельный экземпляр на том же каталоге
+        other_process = FileBasedCache(cache_dir, {})
+        key = authentication.KEY.format(key=self.token.key)
+        with override_settings(CACHES=caches):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertIsNotNone(other_process.get(key))
+            
+            self.token.delete()
+            self.assertIsNone(other_process.get(key))
+            authentication.local_cache.clear()
+            self.assertEqual(self.client.get(self.url).status_code, 403)
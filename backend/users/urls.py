@@ -8,5 +8,6 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('verify-email/', views.verify_email, name='verify_email'),
     path('profile/', views.user_profile, name='profile'),
+    path('notification-settings/', views.notification_settings, name='notification_settings'),
     path('logout/', views.logout, name='logout'),
 ] 
\ No newline at end of file
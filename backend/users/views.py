@@ -1,7 +1,9 @@
+import hashlib
 from django.shortcuts import render
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import login
@@ -9,6 +11,7 @@ from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
     EmailVerificationSerializer,
+    NotificationSettingsSerializer,
     UserSerializer
 )
 from .models import User
@@ -78,13 +81,33 @@ def verify_email(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def user_profile_etag(request):
+    """ETag профиля по сериализуемым полям - пользователь уже загружен аутентификацией"""
+    values = [getattr(request.user, field, None) for field in UserSerializer.Meta.fields]
+    return hashlib.md5(repr(values).encode()).hexdigest()
+
+
 @api_view(['GET'])
+@condition(etag_func=user_profile_etag)
 def user_profile(request):
     """Получение профиля пользователя"""
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
 
+@api_view(['GET', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def notification_settings(request):
+    """Настройки уведомлений: письмо на каждый отклик или сводка"""
+    if request.method == 'GET':
+        return Response(NotificationSettingsSerializer(request.user).data)
+    
+    serializer = NotificationSettingsSerializer(request.user, data=request.data, partial=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response(serializer.data)
+
+
 @api_view(['POST'])
 def logout(request):
     """Выход пользователя"""
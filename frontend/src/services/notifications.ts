@@ -0,0 +1,59 @@
+import axios from 'axios'
+
+const API_BASE_URL = 'http://localhost:8000/api'
+
+export interface Notification {
+  id: number
+  kind: 'new_response' | 'status_change'
+  advertisement_id: number
+  response_id: number
+  message: string
+  is_read: boolean
+  created_at: string
+}
+
+// Страница ящика по курсору
+export interface NotificationsPage {
+  next: string | null
+  previous: string | null
+  results: Notification[]
+}
+
+export class NotificationsService {
+  private static getAuthHeaders(): Record<string, string> {
+    const token = localStorage.getItem('auth_token')
+    return token ? { 'Authorization': `Token ${token}` } : {}
+  }
+
+  /**
+   * Страница уведомлений: первая или по ссылке next
+   */
+  static async getPage(url?: string | null): Promise<NotificationsPage> {
+    const response = await axios.get(url || `${API_BASE_URL}/notifications/`, {
+      headers: this.getAuthHeaders()
+    })
+    return response.data
+  }
+
+  /**
+   * Число непрочитанных для значка (читается из счетчика на сервере)
+   */
+  static async getUnreadCount(): Promise<number> {
+    const response = await axios.get(`${API_BASE_URL}/notifications/unread_count/`, {
+      headers: this.getAuthHeaders()
+    })
+    return response.data.unread_count
+  }
+
+  /**
+   * Отметить прочитанными уведомления ids или все; возвращает новое число непрочитанных
+   */
+  static async markRead(ids?: number[]): Promise<number> {
+    const response = await axios.post(
+      `${API_BASE_URL}/notifications/mark_read/`,
+      ids ? { ids } : {},
+      { headers: this.getAuthHeaders() }
+    )
+    return response.data.unread_count
+  }
+}
@@ -9,6 +9,22 @@ interface ResponseFilters {
   status?: 'new' | 'accepted' | 'rejected' | 'all'
 }
 
+// Счетчики для фильтров: по статусам (в пределах выбранного объявления)
+// и по объявлениям (в пределах выбранного статуса)
+export interface ResponseFacets {
+  total: number
+  status: Record<'new' | 'accepted' | 'rejected', number>
+  advertisements: { id: number; title: string; count: number }[]
+}
+
+// Страница откликов по курсору; facets есть только у первой страницы
+export interface ResponsesPage {
+  next: string | null
+  previous: string | null
+  results: Response[]
+  facets?: ResponseFacets
+}
+
 export class ResponsesService {
   private static getAuthHeaders() {
     const token = localStorage.getItem('auth_token')
@@ -19,9 +35,10 @@ export class ResponsesService {
   }
 
   /**
-   * Получить все отклики на объявления текущего пользователя
+   * Получить первую страницу откликов на объявления текущего пользователя
+   * (со счетчиками для фильтров)
    */
-  static async getMyAdvertisementResponses(filters?: ResponseFilters): Promise<Response[]> {
+  static async getMyAdvertisementResponses(filters?: ResponseFilters): Promise<ResponsesPage> {
     try {
       const params = new URLSearchParams()
       if (filters?.advertisement_id && filters.advertisement_id !== 'all') {
@@ -45,6 +62,19 @@ export class ResponsesService {
     }
   }
 
+  /**
+   * Получить следующую страницу откликов по ссылке next
+   */
+  static async getResponsesPage(url: string): Promise<ResponsesPage> {
+    try {
+      const response = await axios.get(url, { headers: this.getAuthHeaders() })
+      return response.data
+    } catch (error) {
+      console.error('Ошибка при получении откликов:', error)
+      throw error
+    }
+  }
+
   /**
    * Получить все объявления текущего пользователя
    */
@@ -0,0 +1,45 @@
+import axios from 'axios'
+import type { Advertisement, Response } from '@/types/advertisement'
+
+const API_BASE_URL = 'http://localhost:8000/api'
+
+// Ответ /api/sync/: изменения после токена и новый токен
+export interface SyncChanges {
+  token: string
+  // true - токен устарел или изменений слишком много: списки нужно загрузить заново
+  reset: boolean
+  advertisements: Advertisement[]
+  responses: Response[]
+  deleted: {
+    advertisements: number[]
+    responses: number[]
+  }
+}
+
+export class SyncService {
+  private static getAuthHeaders(): Record<string, string> {
+    const token = localStorage.getItem('auth_token')
+    return token ? { 'Authorization': `Token ${token}` } : {}
+  }
+
+  /**
+   * Получить изменения объявлений и откликов после токена предыдущей синхронизации
+   */
+  static async getChanges(since?: string | null): Promise<SyncChanges> {
+    const response = await axios.get(`${API_BASE_URL}/sync/`, {
+      headers: this.getAuthHeaders(),
+      params: since ? { since } : {}
+    })
+    return response.data
+  }
+
+  /**
+   * Применить изменения к списку: обновить по id, добавить новые, убрать удаленные
+   */
+  static applyChanges<T extends { id: number }>(items: T[], changed: T[], deletedIds: number[]): T[] {
+    const byId = new Map(items.map(item => [item.id, item]))
+    changed.forEach(item => byId.set(item.id, { ...byId.get(item.id), ...item }))
+    deletedIds.forEach(id => byId.delete(id))
+    return Array.from(byId.values())
+  }
+}
@@ -18,6 +18,12 @@ export interface User {
   date_joined: string
 }
 
+// Уменьшенные копии изображения: srcset по форматам и размытая заглушка
+export interface ImageVariants {
+  srcset: Record<'webp' | 'jpg', string>
+  placeholder: string
+}
+
 export interface Advertisement {
   id: number
   title: string
@@ -25,10 +31,16 @@ export interface Advertisement {
   category: AdvertisementCategory
   author: User
   image?: string
+  image_variants?: ImageVariants | null
   video?: string
   audio?: string
   created_at: string
   updated_at: string
+  // Счетчики откликов; в ленте приходят вместо списка responses
+  response_count: number
+  new_response_count: number
+  accepted_response_count: number
+  rejected_response_count: number
   responses?: Response[]
 }
 